@@ -1,162 +1,211 @@
-from langchain.chat_models import ChatOpenAI
 from langchain.agents import initialize_agent, Tool, AgentType
 from utils import (
     get_total_spent, get_total_earned, registrar_transaccion_desde_texto, get_ultimas_transacciones,
-    resumen_mensual, get_balance_actual, get_gastos_por_categoria,
+    tabla_resumen_mensual, get_balance_actual, get_gastos_por_categoria,
     get_promedio_gastos, proyeccion_saldo_fin_mes, ranking_gastos_categorias, ranking_ingresos_categorias,
-    porcentaje_gastos_por_categoria, alerta_gasto_excesivo, sugerencia_ahorro, buscar_transacciones,
-    evolucion_balance, comparativa_gastos_mensual, gastos_recurrentes, sugerencia_presupuesto, simulador_sin_gasto_en,get_total_ahorrado, get_total_asignado_metas, get_ahorro_disponible,
-    get_resumen_metas, get_recomendacion_asignacion,construir_presupuesto_asistido
+    porcentaje_gastos_por_categoria, alerta_gasto_excesivo, sugerencia_ahorro, tabla_busqueda,
+    evolucion_balance, tabla_gastos_mensuales, tabla_gastos_recurrentes, sugerencia_presupuesto, simulador_sin_gasto_en,get_total_ahorrado, get_total_asignado_metas, get_ahorro_disponible,
+    get_resumen_metas, get_recomendacion_asignacion,construir_presupuesto_asistido, get_mayor_gasto
 )
-import streamlit as st
-
-def crear_agente(username,engine):
-    llm = ChatOpenAI(
-        #openai_api_key=st.secrets["openrouter"]["api_key"],
-        #base_url="https://openrouter.ai/api/v1",
-        #model="mistralai/mixtral-8x7b-instruct",
-        openai_api_key=st.secrets["openai"]["api_key"],
-        model="gpt-4",
-        #openai_api_key=st.secrets["openrouter2"]["api_key"],
-        #base_url="https://openrouter.ai/api/v1",
-        #model="deepseek/deepseek-chat-v3-0324:free",
+from db import get_engine
+from formato_salidas import formatear
+from proveedores_llm import crear_llm as crear_llm_proveedor
+import os
+import threading
+import time
+
+# Modelo por defecto; forma parte de la llave del registro de agentes
+CONFIG_MODELO = {
+    "model": "gpt-4",
+    "streaming": True,  # tokens vía callbacks, ver flujo_tokens.py
+    #"base_url": "https://openrouter.ai/api/v1",
+    #"model": "mistralai/mixtral-8x7b-instruct",
+    #"model": "deepseek/deepseek-chat-v3-0324:free",
+}
+
+# Segundos sin uso tras los cuales se descarta el agente de un usuario
+AGENTE_TTL = float(os.getenv("BILLIE_AGENTE_TTL", "1800"))
+
+# "planificador": las preguntas de consulta se resuelven con un plan de
+# herramientas en paralelo (ver planificador.py); "react": siempre el agente ReAct
+MODO_AGENTE = os.getenv("BILLIE_MODO_AGENTE", "planificador")
+
+# ─── Herramientas ─────────────────────────────────────────────────────────
+# (nombre, descripción, función(entrada, usuario)). El motor y los datos del
+# usuario se resuelven al llamar la herramienta, no al construir el agente, así
+# que un agente en caché nunca trabaja con datos viejos. Las que devuelven
+# tablas completas entregan el DataFrame/Series: `ejecutar_herramienta` lo
+# compacta al presupuesto de tokens (ver formato_salidas.py).
+HERRAMIENTAS = [
+    ("Gasto total", "Devuelve el total de dinero gastado por el usuario.",
+     lambda _, u: get_total_spent(u)),
+    ("Ingreso total", "Devuelve el total de dinero generado por el usuario.",
+     lambda _, u: get_total_earned(u)),
+    ("Gastos por categoria", "Obtiene los gastos por categoría especificada.",
+     lambda t, u: get_gastos_por_categoria(t, u)),
+    ("Registrar transacción", "Registra una transacción a partir de un texto como 'gasté 200 en comida con tarjeta'.",
+     lambda t, u: registrar_transaccion_desde_texto(t, u, get_engine())),
+    ("Ver últimas transacciones", "Muestra los últimos movimientos.",
+     lambda _, u: get_ultimas_transacciones()),
+    ("Resumen mensual", "Muestra resumen mensual de ingresos y egresos.",
+     lambda _, u: tabla_resumen_mensual(u, get_engine())),
+    ("Balance actual", "Muestra el balance acumulado.",
+     lambda _, u: get_balance_actual()),
+    ("Mayor gasto", "Muestra el gasto individual más grande del usuario.",
+     lambda _, u: get_mayor_gasto(u)),
+    # FUNCIONES AVANZADAS:
+    ("Promedio de gastos",
+     "Devuelve el promedio de gastos diario, semanal o mensual. Usa como input 'diario', 'semanal' o 'mensual'.",
+     lambda p, u: get_promedio_gastos(periodo=p if p else "mensual", username=u)),
+    ("Proyección de saldo fin de mes",
+     "Estima el saldo que tendrá el usuario al final del mes si mantiene su ritmo de gasto/ingreso.",
+     lambda _, u: proyeccion_saldo_fin_mes(u)),
+    ("Ranking gastos por categoría", "Muestra las categorías donde el usuario ha gastado más.",
+     lambda _, u: ranking_gastos_categorias(u)),
+    ("Ranking ingresos por categoría", "Muestra las categorías de ingresos más importantes.",
+     lambda _, u: ranking_ingresos_categorias(u)),
+    ("Porcentaje gastos por categoría", "Devuelve el porcentaje del gasto que representa cada categoría.",
+     lambda _, u: porcentaje_gastos_por_categoria(u)),
+    ("Alerta gasto excesivo", "Alerta si el usuario gasta mucho más que su promedio habitual.",
+     lambda _, u: alerta_gasto_excesivo(u, get_engine())),
+    ("Sugerencia de ahorro", "Sugiere una meta de ahorro reduciendo un poco los gustos.",
+     lambda _, u: sugerencia_ahorro(u)),
+    ("Buscar transacciones", "Busca transacciones por palabra clave o descripción.",
+     lambda palabra, u: tabla_busqueda(palabra, u)),
+    ("Evolución de balance", "Muestra la evolución del balance a lo largo del tiempo.",
+     lambda _, u: evolucion_balance(u)),
+    ("Comparativa de gastos mensual", "Compara los gastos mes a mes.",
+     lambda _, u: tabla_gastos_mensuales(u, get_engine())),
+    ("Gastos recurrentes", "Detecta gastos recurrentes como suscripciones.",
+     lambda _, u: tabla_gastos_recurrentes(u)),
+    ("Sugerencia presupuesto mensual", "Sugiere un presupuesto mensual personalizado.",
+     lambda _, u: sugerencia_presupuesto(u, get_engine())),
+    ("Simulador: sin gasto en categoría",
+     "Simula el balance si dejas de gastar en cierta categoría. Especifica la categoría como input.",
+     lambda c, u: simulador_sin_gasto_en(c, u)),
+    ("Ver total ahorrado", "Muestra el total ahorrado en Metas financieras 💰",
+     lambda _, u: get_total_ahorrado(get_engine(), u)),
+    ("Ver total asignado", "Muestra cuánto del ahorro está asignado a metas.",
+     lambda _, u: get_total_asignado_metas(get_engine(), u)),
+    ("Ver ahorro disponible", "Muestra el ahorro no asignado.",
+     lambda _, u: get_ahorro_disponible(get_engine(), u)),
+    ("Ver resumen de metas", "Muestra el resumen y progreso de todas las metas.",
+     lambda _, u: get_resumen_metas(get_engine(), u)),
+    ("Recomendación de asignación", "Sugiere cómo distribuir el ahorro disponible entre las metas.",
+     lambda _, u: get_recomendacion_asignacion(get_engine(), u)),
+    ("Asistente de presupuesto",
+     "Guía al usuario para construir su presupuesto mensual basado en su ingreso y estilo de vida.",
+     lambda _, u: construir_presupuesto_asistido(u, get_engine())),
+]
+
+# Herramientas que escriben en la base o dibujan en la página: nunca se llaman
+# fuera del agente ReAct (ni en paralelo ni desde el enrutador)
+HERRAMIENTAS_CON_EFECTOS = {"Registrar transacción", "Asistente de presupuesto"}
+
+
+def crear_llm(config=None):
+    # El proveedor (OpenAI, local, trazas grabadas...) se elige en proveedores_llm.py
+    return crear_llm_proveedor(config or CONFIG_MODELO)
 
-    )
 
-    tools = [
-        Tool(
-            name="Gasto total",
-            func=lambda _: get_total_spent(username),
-            description="Devuelve el total de dinero gastado por el usuario."
-        ),
-        Tool(
-            name="Ingreso total",
-            func=lambda _: get_total_earned(username),
-            description="Devuelve el total de dinero generado por el usuario."
-        ),
-        Tool(
-            name="Gastos por categoria",
-            func=lambda t: get_gastos_por_categoria(t, username),
-            description="Obtiene los gastos por categoría especificada."
-        ),
-        Tool(
-            name="Registrar transacción",
-            func=lambda t: registrar_transaccion_desde_texto(t, username,engine),
-            description="Registra una transacción a partir de un texto como 'gasté 200 en comida con tarjeta'."
-        ),
-        Tool(
-            name="Ver últimas transacciones", 
-            func=lambda _: get_ultimas_transacciones(), 
-            description="Muestra los últimos movimientos."
-        ),
-        Tool(
-            name="Resumen mensual", 
-            func=lambda _: resumen_mensual(), 
-            description="Muestra resumen mensual de ingresos y egresos."
-        ),
-        Tool(
-            name="Balance actual", 
-            func=lambda _: get_balance_actual(), 
-            description="Muestra el balance acumulado."
-        ),
-        # FUNCIONES AVANZADAS:
-        Tool(
-            name="Promedio de gastos",
-            func=lambda p: get_promedio_gastos(periodo=p if p else "mensual", username=username),
-            description="Devuelve el promedio de gastos diario, semanal o mensual. Usa como input 'diario', 'semanal' o 'mensual'."
-        ),
-        Tool(
-            name="Proyección de saldo fin de mes",
-            func=lambda _: proyeccion_saldo_fin_mes(username),
-            description="Estima el saldo que tendrá el usuario al final del mes si mantiene su ritmo de gasto/ingreso."
-        ),
-        Tool(
-            name="Ranking gastos por categoría",
-            func=lambda _: ranking_gastos_categorias(username),
-            description="Muestra las categorías donde el usuario ha gastado más."
-        ),
-        Tool(
-            name="Ranking ingresos por categoría",
-            func=lambda _: ranking_ingresos_categorias(username),
-            description="Muestra las categorías de ingresos más importantes."
-        ),
-        Tool(
-            name="Porcentaje gastos por categoría",
-            func=lambda _: porcentaje_gastos_por_categoria(username),
-            description="Devuelve el porcentaje del gasto que representa cada categoría."
-        ),
-        Tool(
-            name="Alerta gasto excesivo",
-            func=lambda _: alerta_gasto_excesivo(username),
-            description="Alerta si el usuario gasta mucho más que su promedio habitual."
-        ),
-        Tool(
-            name="Sugerencia de ahorro",
-            func=lambda _: sugerencia_ahorro(username),
-            description="Sugiere una meta de ahorro reduciendo un poco los gustos."
-        ),
-        Tool(
-            name="Buscar transacciones",
-            func=lambda palabra: buscar_transacciones(palabra, username),
-            description="Busca transacciones por palabra clave o descripción."
-        ),
-        Tool(
-            name="Evolución de balance",
-            func=lambda _: evolucion_balance(username).to_string(index=False),
-            description="Muestra la evolución del balance a lo largo del tiempo."
-        ),
-        Tool(
-            name="Comparativa de gastos mensual",
-            func=lambda _: comparativa_gastos_mensual(username),
-            description="Compara los gastos mes a mes."
-        ),
-        Tool(
-            name="Gastos recurrentes",
-            func=lambda _: gastos_recurrentes(username),
-            description="Detecta gastos recurrentes como suscripciones."
-        ),
-        Tool(
-            name="Sugerencia presupuesto mensual",
-            func=lambda _: sugerencia_presupuesto(username),
-            description="Sugiere un presupuesto mensual personalizado."
-        ),
-        Tool(
-            name="Simulador: sin gasto en categoría",
-            func=lambda c: simulador_sin_gasto_en(c, username),
-            description="Simula el balance si dejas de gastar en cierta categoría. Especifica la categoría como input."
-        ),
-        Tool(name="Ver total ahorrado", 
-             func=lambda x: get_total_ahorrado(engine, username), 
-             description="Muestra el total ahorrado en Metas financieras 💰"
-        ),
-        Tool(name="Ver total asignado", 
-             func=lambda x: get_total_asignado_metas(engine, username), 
-             description="Muestra cuánto del ahorro está asignado a metas."
-        ),
-        Tool(name="Ver ahorro disponible", 
-            func=lambda x: get_ahorro_disponible(engine, username), 
-            description="Muestra el ahorro no asignado."
-        ),
-        Tool(name="Ver resumen de metas", 
-            func=lambda x: get_resumen_metas(engine, username), 
-            description="Muestra el resumen y progreso de todas las metas."
-        ),
-        Tool(name="Recomendación de asignación", 
-            func=lambda x: get_recomendacion_asignacion(engine, username), 
-            description="Sugiere cómo distribuir el ahorro disponible entre las metas."
-        ),
-        Tool(name="Asistente de presupuesto",
-        func=construir_presupuesto_asistido,
-        description="Guía al usuario para construir su presupuesto mensual basado en su ingreso y estilo de vida."
-        ),
+def ejecutar_herramienta(nombre, funcion, entrada, username):
+    """Salida de la herramienta como texto acotado en tokens, lista para el prompt."""
+    return formatear(nombre, funcion(entrada, username))
+
+
+def _ejecutor(nombre, funcion, username):
+    # Función de un solo parámetro: el prompt ReAct incluye la firma de cada herramienta
+    def ejecutar(entrada):
+        return ejecutar_herramienta(nombre, funcion, entrada, username)
+    return ejecutar
+
+
+def crear_herramientas(username, herramientas=None):
+    return [
+        Tool(name=nombre, func=_ejecutor(nombre, funcion, username), description=descripcion)
+        for nombre, descripcion, funcion in (herramientas or HERRAMIENTAS)
     ]
 
+
+def crear_agente(username, engine=None, config=None, llm=None, herramientas=None):
+    """Construye un agente nuevo. En las páginas usa `obtener_agente`, que lo reutiliza.
+
+    `engine` se conserva por compatibilidad: las herramientas usan `get_engine()`.
+    """
     agent = initialize_agent(
-        tools,
-        llm,
+        crear_herramientas(username, herramientas),
+        llm or crear_llm(config),
         agent=AgentType.ZERO_SHOT_REACT_DESCRIPTION,
         handle_parsing_errors=True,
         verbose=True
     )
 
     return agent
+
+
+# ─── Registro de agentes ──────────────────────────────────────────────────
+class RegistroAgentes:
+    """Agentes por (usuario, configuración de modelo), creados al primer uso y
+    descartados al cerrar sesión o tras `ttl` segundos sin uso."""
+
+    def __init__(self, ttl=AGENTE_TTL, fabrica=crear_agente):
+        self.ttl = ttl
+        self.fabrica = fabrica
+        self._agentes = {}
+        self._lock = threading.Lock()
+        self.construidos = 0
+
+    @staticmethod
+    def _llave(username, config):
+        return username, tuple(sorted(config.items()))
+
+    def obtener(self, username, config=None):
+        config = config or CONFIG_MODELO
+        llave = self._llave(username, config)
+        ahora = time.monotonic()
+        with self._lock:
+            self._purgar(ahora)
+            entrada = self._agentes.get(llave)
+            if entrada is None:
+                entrada = self._agentes[llave] = [self.fabrica(username, config=config), ahora]
+                self.construidos += 1
+            entrada[1] = ahora
+            return entrada[0]
+
+    def liberar(self, username):
+        with self._lock:
+            for llave in [llave for llave in self._agentes if llave[0] == username]:
+                del self._agentes[llave]
+
+    def _purgar(self, ahora):
+        vencidos = [llave for llave, (_, uso) in self._agentes.items() if ahora - uso > self.ttl]
+        for llave in vencidos:
+            del self._agentes[llave]
+
+    def __len__(self):
+        return len(self._agentes)
+
+
+def crear_planificador(username, config=None):
+    from planificador import AgentePlanificador
+    return AgentePlanificador(username, crear_llm(config), agente_react=lambda: obtener_agente(username, config))
+
+
+REGISTRO = RegistroAgentes()
+REGISTRO_PLANIFICADORES = RegistroAgentes(fabrica=crear_planificador)
+
+
+def obtener_agente(username, config=None):
+    return REGISTRO.obtener(username, config)
+
+
+def obtener_asistente(username, config=None):
+    """Agente para preguntas de consulta: el planificador o el ReAct según MODO_AGENTE."""
+    if MODO_AGENTE == "react":
+        return obtener_agente(username, config)
+    return REGISTRO_PLANIFICADORES.obtener(username, config)
+
+
+def liberar_agentes(username):
+    REGISTRO.liberar(username)
+    REGISTRO_PLANIFICADORES.liberar(username)
@@ -1,21 +1,19 @@
 from langchain.agents import Tool, initialize_agent, AgentType
-from langchain.chat_models import ChatOpenAI
 from sqlalchemy import text
 from utils import construir_prompt_recomendaciones_fondos, cargar_fondos_desde_db
-import streamlit as st
+from proveedores_llm import crear_llm
+
+CONFIG_INVERSION = {
+    "model": "gpt-4",
+    "streaming": True,
+    # Con proveedor "openrouter":
+    #"model": "mistralai/mixtral-8x7b-instruct",
+    #"model": "deepseek/deepseek-chat-v3-0324:free",
+}
 
 
 def crear_agente_inversion(username, engine):
-    llm = ChatOpenAI(
-        #openai_api_key=st.secrets["openrouter"]["api_key"],
-        #base_url="https://openrouter.ai/api/v1",
-        #model="mistralai/mixtral-8x7b-instruct",
-        openai_api_key=st.secrets["openai"]["api_key"],
-        model="gpt-4",
-        #openai_api_key=st.secrets["openrouter2"]["api_key"],
-        #base_url="https://openrouter.ai/api/v1",
-        #model="deepseek/deepseek-chat-v3-0324:free",
-    )
+    llm = crear_llm(CONFIG_INVERSION)
 
     # ────────────────────────────────────────────────────────
     # Función interna para generar el prompt con perfil y fondos
@@ -0,0 +1,266 @@
+"""
+analitica.py – Métricas de transacciones sobre un marco preprocesado
+===================================================================
+`AnalyticsFrame` toma las transacciones de un usuario y las normaliza una sola
+vez: Fecha como datetime64, Categoria y Descripcion como categóricas y Monto
+como float64. Los agrupamientos (por categoría, por mes, por día, ...) se
+calculan la primera vez que alguna métrica los pide y se reutilizan en las
+demás, así que las ~20 funciones de `utils.py` ya no vuelven a filtrar por
+usuario ni a convertir fechas en cada llamada.
+
+`obtener_analitica(username)` guarda los marcos en `st.session_state` y los
+reconstruye sólo cuando `st.session_state["transacciones"]` cambia de objeto.
+Las altas y bajas de la propia sesión pasan por `actualizar_analitica` (ver
+sesion_transacciones.py): `AnalyticsFrame.actualizar` normaliza sólo las filas
+que cambian y ajusta los agrupamientos ya calculados sumando y restando.
+"""
+from functools import cached_property
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+from pandas.api.types import union_categoricals
+
+COLUMNAS_DETALLE = ["Fecha", "Descripcion", "Categoria", "Cuenta", "Monto"]
+# Cachés que se ajustan al agregar o quitar filas; los demás se recalculan al pedirlos
+AGRUPAMIENTOS = ("por_categoria", "por_mes", "por_dia", "por_semana_iso")
+TOTALES = ("balance", "total_gastos", "total_ingresos")
+
+
+def _concatenar(a, b):
+    # Une las categorías para que Descripcion y Categoria sigan siendo categóricas
+    columnas = {}
+    for columna in a.columns:
+        if isinstance(a[columna].dtype, pd.CategoricalDtype):
+            columnas[columna] = union_categoricals([a[columna].array, b[columna].array], sort_categories=True)
+        else:
+            columnas[columna] = pd.concat([a[columna], b[columna]]).to_numpy()
+    return pd.DataFrame(columnas, index=a.index.append(b.index))
+
+
+class AnalyticsFrame:
+    def __init__(self, df, username=None):
+        self.username = username
+        if username and "Usuario" in df.columns:
+            df = df[df["Usuario"] == username]
+        self._asignar(pd.DataFrame({
+            "Fecha": pd.to_datetime(df["Fecha"], errors="coerce") if "Fecha" in df else pd.Series(dtype="datetime64[ns]"),
+            "Descripcion": (df["Descripcion"] if "Descripcion" in df else pd.Series(dtype=object)).astype("category"),
+            "Categoria": (df["Categoria"] if "Categoria" in df else pd.Series(dtype=object)).astype("category"),
+            "Cuenta": df["Cuenta"] if "Cuenta" in df else pd.Series(dtype=object),
+            "Monto": pd.to_numeric(df["Monto"], errors="coerce").astype("float64") if "Monto" in df else pd.Series(dtype="float64"),
+        }, index=df.index))
+
+    def _asignar(self, df):
+        self.df = df
+        self.monto = self.df["Monto"].to_numpy()
+        self.es_gasto = self.monto < 0
+        self.es_ingreso = self.monto > 0
+
+    @classmethod
+    def _normalizado(cls, df, username=None):
+        marco = cls.__new__(cls)
+        marco.username = username
+        marco._asignar(df)
+        return marco
+
+    def actualizar(self, nuevas=None, quitadas=None):
+        """Marco nuevo con las transacciones `nuevas` agregadas y las filas con índice en `quitadas` fuera.
+
+        Sólo se normalizan las filas nuevas; los agrupamientos y totales ya
+        calculados pasan al marco nuevo sumando los de las filas nuevas y
+        restando los de las quitadas.
+        """
+        df = self.df
+        cambios = []
+        if quitadas is not None and len(quitadas):
+            mascara = df.index.isin(quitadas)
+            cambios.append((AnalyticsFrame._normalizado(df[mascara]), -1))
+            df = df[~mascara]
+        if nuevas is not None and not nuevas.empty:
+            agregadas = AnalyticsFrame(nuevas, self.username)
+            cambios.append((agregadas, 1))
+            df = _concatenar(df, agregadas.df)
+        marco = AnalyticsFrame._normalizado(df, self.username)
+        for nombre in AGRUPAMIENTOS:
+            if nombre in self.__dict__:
+                grupos = self.__dict__[nombre]
+                for cambio, signo in cambios:
+                    grupos = grupos.add(signo * getattr(cambio, nombre), fill_value=0)
+                # Grupos que se quedaron sin filas desaparecen, como en un groupby nuevo
+                marco.__dict__[nombre] = grupos[grupos["n"] > 0].astype(self.__dict__[nombre].dtypes).sort_index()
+        for nombre in TOTALES:
+            if nombre in self.__dict__:
+                marco.__dict__[nombre] = self.__dict__[nombre] + sum(signo * getattr(c, nombre) for c, signo in cambios)
+        return marco
+
+    @property
+    def vacio(self):
+        return self.df.empty
+
+    # ─── Totales ──────────────────────────────────────────────────────────
+    @cached_property
+    def balance(self):
+        return self.df["Monto"].sum()
+
+    @cached_property
+    def total_gastos(self):
+        return self.df["Monto"][self.es_gasto].sum()
+
+    @cached_property
+    def total_ingresos(self):
+        return self.df["Monto"][self.es_ingreso].sum()
+
+    # ─── Agrupamientos compartidos ────────────────────────────────────────
+    def _sumas_por(self, clave, filas=None):
+        # Una sola pasada de groupby con todas las columnas que usan las métricas
+        columnas = pd.DataFrame({
+            "total": self.monto,
+            "gastos": np.where(self.es_gasto, self.monto, 0.0),
+            "ingresos": np.where(self.es_ingreso, self.monto, 0.0),
+            "n_gastos": self.es_gasto.astype("int64"),
+            "n_ingresos": self.es_ingreso.astype("int64"),
+            "n": np.ones(len(self.monto), dtype="int64"),
+        })
+        if filas is not None:
+            columnas, clave = columnas[filas], clave[filas]
+        return columnas.groupby(clave, observed=True).sum()
+
+    def _sumas_por_periodo(self, unidad, freq):
+        # Agrupa por el ordinal entero del periodo (más barato que hashear fechas)
+        fechas = self.df["Fecha"].to_numpy()
+        ordinales = fechas.astype(f"datetime64[{unidad}]").astype("int64")
+        resumen = self._sumas_por(ordinales, filas=~np.isnat(fechas))
+        resumen.index = pd.PeriodIndex.from_ordinals(resumen.index.to_numpy(), freq=freq)
+        return resumen.rename_axis("Fecha")
+
+    @cached_property
+    def por_categoria(self):
+        return self._sumas_por(self.df["Categoria"].array).rename_axis("Categoria")
+
+    @cached_property
+    def por_mes(self):
+        return self._sumas_por_periodo("M", "M")
+
+    @cached_property
+    def por_dia(self):
+        return self._sumas_por_periodo("D", "D")
+
+    @cached_property
+    def por_semana_iso(self):
+        # Sólo el número de semana, sin año: así agrupaba la versión original.
+        semanas = self.df["Fecha"].dt.isocalendar().week
+        return self._sumas_por(semanas.to_numpy(), filas=semanas.notna().to_numpy())
+
+    @cached_property
+    def gastos_por_categoria(self):
+        """Gasto absoluto por categoría, sólo categorías con gastos, de mayor a menor."""
+        gastos = self.por_categoria.loc[self.por_categoria["n_gastos"] > 0, "gastos"]
+        return gastos.rename("Monto").abs().sort_values(ascending=False)
+
+    @cached_property
+    def ingresos_por_categoria(self):
+        ingresos = self.por_categoria.loc[self.por_categoria["n_ingresos"] > 0, "ingresos"]
+        return ingresos.rename("Monto").sort_values(ascending=False)
+
+    @cached_property
+    def gastos_por_mes(self):
+        """Gasto absoluto por mes (PeriodIndex 'Fecha'), sólo meses con gastos."""
+        gastos = self.por_mes.loc[self.por_mes["n_gastos"] > 0, "gastos"]
+        return gastos.rename("Monto").abs()
+
+    @cached_property
+    def _orden_desc(self):
+        # Mismo ordenamiento que DataFrame.sort_values, pero sólo sobre Fecha
+        fechas = pd.Series(self.df["Fecha"].to_numpy())
+        return fechas.sort_values(ascending=False).index.to_numpy()
+
+    @cached_property
+    def _orden_asc(self):
+        return pd.Series(self.df["Fecha"].to_numpy()).sort_values().index.to_numpy()
+
+    @cached_property
+    def descripciones_gasto(self):
+        return self.df["Descripcion"][self.es_gasto].astype(object).value_counts()
+
+    # ─── Métricas ─────────────────────────────────────────────────────────
+    def gasto_categoria(self, categoria):
+        return self.por_categoria["gastos"].get(categoria, 0.0)
+
+    def total_categoria(self, categoria):
+        return self.por_categoria["total"].get(categoria, 0.0)
+
+    def gasto_mes(self, mes, anio):
+        return self.por_mes["gastos"].get(pd.Period(year=anio, month=mes, freq="M"), 0.0)
+
+    def movimientos_mes_del_anio(self, mes):
+        """Gastos e ingresos de todos los meses `mes` del histórico (sin distinguir año)."""
+        filas = self.por_mes[self.por_mes.index.month == mes]
+        return filas["gastos"].sum(), filas["ingresos"].sum()
+
+    def promedio_gastos(self, periodo="mensual"):
+        if periodo == "mensual":
+            grupos = self.por_mes
+        elif periodo == "semanal":
+            grupos = self.por_semana_iso
+        else:  # diario
+            grupos = self.por_dia
+        return grupos.loc[grupos["n_gastos"] > 0, "gastos"].mean()
+
+    def ultimas(self, n=5):
+        return self.df.iloc[self._orden_desc[:n]][COLUMNAS_DETALLE]
+
+    def mayor_gasto(self):
+        """Fila del gasto individual más grande, o None si no hay gastos."""
+        if not self.es_gasto.any():
+            return None
+        return self.df.iloc[int(np.nanargmin(np.where(self.es_gasto, self.monto, np.nan)))][COLUMNAS_DETALLE]
+
+    def buscar(self, keyword):
+        # La búsqueda corre sobre las descripciones únicas y se proyecta a las filas
+        descripciones = self.df["Descripcion"]
+        categorias = descripciones.cat.categories
+        coincide = np.append(categorias.str.contains(keyword, case=False, na=False), False)
+        return self.df[coincide[descripciones.cat.codes.to_numpy()]][COLUMNAS_DETALLE]
+
+    def evolucion_balance(self):
+        ordenado = self.df[["Fecha", "Monto"]].iloc[self._orden_asc]
+        return pd.DataFrame({"Fecha": ordenado["Fecha"], "Balance": ordenado["Monto"].cumsum()})
+
+
+def obtener_analitica(username=None):
+    """Marco analítico del usuario para las transacciones actuales de la sesión."""
+    df = st.session_state.get("transacciones", pd.DataFrame())
+    cache = st.session_state.get("_analitica")
+    if cache is None or cache["origen"] is not df:
+        cache = {"origen": df, "marcos": {}}
+        st.session_state["_analitica"] = cache
+    marcos = cache["marcos"]
+    if username not in marcos:
+        # La sesión suele traer sólo al usuario actual: entonces comparte el marco sin filtrar
+        if username and "Usuario" in df.columns and not (df["Usuario"] == username).all():
+            marcos[username] = AnalyticsFrame(df, username)
+        else:
+            marcos[username] = marcos.get(None) or AnalyticsFrame(df)
+            marcos.setdefault(None, marcos[username])
+    return marcos[username]
+
+
+def actualizar_analitica(df, nuevas=None, quitadas=None):
+    """Pone `df` como transacciones de la sesión llevando al día los marcos ya construidos.
+
+    `nuevas` son las filas agregadas a `df` y `quitadas` los índices que se le
+    quitaron respecto al DataFrame anterior.
+    """
+    cache = st.session_state.get("_analitica")
+    st.session_state["transacciones"] = df
+    if cache is None:
+        return
+    # Varios usuarios pueden compartir el mismo marco: se actualiza una vez cada uno
+    actualizados = {}
+    marcos = {}
+    for usuario, marco in cache["marcos"].items():
+        if id(marco) not in actualizados:
+            actualizados[id(marco)] = marco.actualizar(nuevas, quitadas)
+        marcos[usuario] = actualizados[id(marco)]
+    st.session_state["_analitica"] = {"origen": df, "marcos": marcos}
@@ -0,0 +1,59 @@
+"""
+Benchmark del costo del agente por rerun de Streamlit.
+
+Antes cada rerun de la página construía el agente hasta tres veces
+(`crear_agente` en registro, métricas y ahorro) aunque nadie le preguntara
+nada. Con `RegistroAgentes` se construye al primer uso por (usuario, modelo) y
+los reruns siguientes no pagan nada. No se hace ninguna llamada al LLM: sólo
+se mide la construcción (ChatOpenAI + 26 herramientas + initialize_agent).
+
+$ python -m benchmarks.bench_agente
+$ python -m benchmarks.bench_agente --reruns 200 --usuarios 5
+"""
+import argparse
+import os
+import time
+
+# ChatOpenAI sólo valida la llave al llamar al modelo, así que basta una falsa
+os.environ.setdefault("OPENAI_API_KEY", "sk-bench")
+
+from agente import RegistroAgentes, crear_agente  # noqa: E402
+
+CONSTRUCCIONES_POR_RERUN = 3
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--reruns", type=int, default=100, help="Reruns por usuario")
+    parser.add_argument("--usuarios", type=int, default=3)
+    parser.add_argument("--preguntas", type=int, default=10, help="Reruns por usuario que consultan al agente")
+    args = parser.parse_args()
+    usuarios = [f"usuario{i + 1}" for i in range(args.usuarios)]
+
+    inicio = time.perf_counter()
+    for username in usuarios:
+        for _ in range(args.reruns):
+            for _ in range(CONSTRUCCIONES_POR_RERUN):
+                crear_agente(username)
+    t_legado = time.perf_counter() - inicio
+    construidos_legado = len(usuarios) * args.reruns * CONSTRUCCIONES_POR_RERUN
+
+    registro = RegistroAgentes()
+    inicio = time.perf_counter()
+    for username in usuarios:
+        for rerun in range(args.reruns):
+            # Sólo los reruns en los que el usuario pregunta algo tocan el registro
+            if rerun < args.preguntas:
+                registro.obtener(username)
+    t_registro = time.perf_counter() - inicio
+
+    total = len(usuarios) * args.reruns
+    print(f"{total:,} reruns ({len(usuarios)} usuarios, {args.preguntas} preguntas c/u)")
+    print(f"por rerun (original): {t_legado:7.2f} s  {construidos_legado:>5} agentes  "
+          f"{t_legado / total * 1000:8.1f} ms/rerun")
+    print(f"registro:             {t_registro:7.2f} s  {registro.construidos:>5} agentes  "
+          f"{t_registro / total * 1000:8.1f} ms/rerun   {t_legado / max(t_registro, 1e-9):.0f}x")
+
+
+if __name__ == "__main__":
+    main()
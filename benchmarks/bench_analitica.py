@@ -0,0 +1,289 @@
+"""
+Benchmark de las métricas de sesión: implementación original vs AnalyticsFrame.
+
+Genera un histórico sintético de un usuario, lo coloca en
+`st.session_state["transacciones"]` y ejecuta las métricas de `utils.py`
+con la versión original (copiada abajo, cada una filtra y convierte fechas por
+su cuenta) y con las vistas sobre `analitica.AnalyticsFrame`. Antes de medir
+verifica que ambas versiones devuelvan exactamente el mismo texto.
+
+$ python -m benchmarks.bench_analitica                  # 1M filas
+$ python -m benchmarks.bench_analitica --filas 100000 --repeticiones 5
+"""
+import argparse
+import statistics
+import time
+from calendar import monthrange
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+import utils
+
+CATEGORIAS = ["Necesidades 🍎", "Gustos 🎁", "Metas financieras 💰", "Ingresos 💵"]
+CUENTAS = ["General", "Tarjeta", "Banorte", "Efectivo"]
+DESCRIPCIONES = [f"Comercio {i}" for i in range(300)] + ["Renta", "Super", "Netflix", "Gasolina", "Nómina"]
+USUARIO = "usuario_bench"
+
+
+def generar_historico(filas, semilla=42):
+    rng = np.random.default_rng(semilla)
+    categorias = rng.choice(CATEGORIAS, filas)
+    montos = np.round(rng.uniform(10, 5000, filas), 2)
+    montos = np.where(categorias == "Ingresos 💵", montos, -montos)
+    dias = rng.integers(0, 365 * 8, filas)
+    fechas = (np.datetime64("2018-01-01") + dias).astype(str)
+    return pd.DataFrame({
+        "ID": np.arange(1, filas + 1),
+        "Usuario": USUARIO,
+        "Fecha": fechas,
+        "Categoria": categorias,
+        "Cuenta": rng.choice(CUENTAS, filas),
+        "Monto": montos,
+        "Descripcion": rng.choice(DESCRIPCIONES, filas),
+    })
+
+
+# ─── Implementación original (referencia) ────────────────────────────────
+def _sesion(username=None):
+    df = st.session_state.get("transacciones", pd.DataFrame())
+    if username:
+        df = df[df["Usuario"] == username]
+    return df
+
+
+def legado_total_spent(username):
+    df = _sesion(username)
+    return f"Has gastado ${abs(df[df['Monto'] < 0]['Monto'].sum()):,.2f}"
+
+
+def legado_total_earned(username):
+    df = _sesion(username)
+    return f"Has ingresado ${df[df['Monto'] > 0]['Monto'].sum():,.2f}"
+
+
+def legado_gastos_por_categoria(categoria_real, username):
+    df = _sesion(username)
+    total = df[(df["Categoria"] == categoria_real) & (df["Monto"] < 0)]["Monto"].sum()
+    if total == 0:
+        return f"No hay gastos registrados en la categoría '{categoria_real}'."
+    return f"Gasto en {categoria_real}: ${abs(total):,.2f}"
+
+
+def legado_gastos_por_mes(mes, anio):
+    df = _sesion()
+    df["Fecha"] = pd.to_datetime(df["Fecha"], errors="coerce")
+    mask = (df["Fecha"].dt.month == mes) & (df["Fecha"].dt.year == anio) & (df["Monto"] < 0)
+    return f"Gasto en {anio}-{mes:02d}: ${abs(df[mask]['Monto'].sum()):,.2f}"
+
+
+def legado_resumen_mensual():
+    df = _sesion()
+    df["Fecha"] = pd.to_datetime(df["Fecha"], errors="coerce")
+    df["Mes"] = df["Fecha"].dt.to_period("M")
+    resumen = df.groupby("Mes")["Monto"].sum().reset_index()
+    resumen["Monto"] = resumen["Monto"].map(lambda x: f"${x:,.2f}")
+    return resumen.to_string(index=False)
+
+
+def legado_balance_actual():
+    return f"Tu balance actual es de ${_sesion()['Monto'].sum():,.2f}"
+
+
+def legado_ultimas_transacciones(n=5):
+    df = _sesion()
+    df["Fecha"] = pd.to_datetime(df["Fecha"], errors="coerce")
+    ultimas = df.sort_values("Fecha", ascending=False).head(n)
+    return ultimas[["Fecha", "Descripcion", "Categoria", "Cuenta", "Monto"]].to_string(index=False)
+
+
+def legado_promedio_gastos(periodo, username):
+    df = _sesion(username)
+    df = df[df["Monto"] < 0]
+    df["Fecha"] = pd.to_datetime(df["Fecha"], errors="coerce")
+    if periodo == "mensual":
+        res = df.groupby([df["Fecha"].dt.year, df["Fecha"].dt.month])["Monto"].sum()
+    elif periodo == "semanal":
+        res = df.groupby(df["Fecha"].dt.isocalendar().week)["Monto"].sum()
+    else:
+        res = df.groupby(df["Fecha"].dt.date)["Monto"].sum()
+    return f"El gasto promedio {periodo} es de ${abs(res.mean()):,.2f}"
+
+
+def legado_proyeccion_saldo(username):
+    df = _sesion(username)
+    df["Fecha"] = pd.to_datetime(df["Fecha"], errors="coerce")
+    hoy = datetime.today()
+    saldo_actual = df["Monto"].sum()
+    gastos_mes = df[(df["Fecha"].dt.month == hoy.month) & (df["Monto"] < 0)]["Monto"].sum()
+    ingresos_mes = df[(df["Fecha"].dt.month == hoy.month) & (df["Monto"] > 0)]["Monto"].sum()
+    dias_faltantes = monthrange(hoy.year, hoy.month)[1] - hoy.day
+    saldo = saldo_actual + dias_faltantes * (ingresos_mes / hoy.day + gastos_mes / hoy.day)
+    return f"Tu saldo proyectado a fin de mes es de ${saldo:,.2f}"
+
+
+def legado_ranking_gastos(username, top=3):
+    df = _sesion(username)
+    return df[df["Monto"] < 0].groupby("Categoria")["Monto"].sum().abs().sort_values(ascending=False).head(top).to_string()
+
+
+def legado_ranking_ingresos(username, top=3):
+    df = _sesion(username)
+    return df[df["Monto"] > 0].groupby("Categoria")["Monto"].sum().sort_values(ascending=False).head(top).to_string()
+
+
+def legado_porcentaje_gastos(username):
+    df = _sesion(username)
+    total_gastos = abs(df[df["Monto"] < 0]["Monto"].sum())
+    resumen = df[df["Monto"] < 0].groupby("Categoria")["Monto"].sum().abs() / total_gastos * 100
+    return resumen.round(2).to_string()
+
+
+def legado_alerta_gasto():
+    df = _sesion()
+    df["Fecha"] = pd.to_datetime(df["Fecha"], errors="coerce")
+    gastos_mes = abs(df[(df["Fecha"].dt.month == datetime.now().month) & (df["Monto"] < 0)]["Monto"].sum())
+    promedio = abs(df[df["Monto"] < 0].groupby(df["Fecha"].dt.to_period("M"))["Monto"].sum()).mean()
+    if gastos_mes > promedio * 1.2:
+        return "🚨 ¡Alerta! Este mes has gastado más de lo habitual. Revisa tus gastos."
+    return "Tus gastos van dentro de lo normal."
+
+
+def legado_sugerencia_ahorro(username):
+    df = _sesion(username)
+    top_gusto = df[df["Categoria"] == "Gustos 🎁"]["Monto"].sum()
+    if top_gusto < 0:
+        return f"Si reduces tus gastos en 'Gustos 🎁' un 20%, podrías ahorrar ${abs(top_gusto)*0.2:,.2f} este mes."
+    return "No hay gastos suficientes para sugerencias."
+
+
+def legado_buscar(keyword, username):
+    df = _sesion(username)
+    matches = df[df["Descripcion"].str.contains(keyword, case=False, na=False)]
+    return matches[["Fecha", "Descripcion", "Categoria", "Cuenta", "Monto"]].to_string(index=False)
+
+
+def legado_evolucion_balance(username):
+    df = _sesion(username)
+    df["Fecha"] = pd.to_datetime(df["Fecha"], errors="coerce")
+    df = df.sort_values("Fecha")
+    df["Balance"] = df["Monto"].cumsum()
+    return df[["Fecha", "Balance"]]
+
+
+def legado_comparativa():
+    df = _sesion()
+    df["Fecha"] = pd.to_datetime(df["Fecha"], errors="coerce")
+    return df[df["Monto"] < 0].groupby(df["Fecha"].dt.to_period("M"))["Monto"].sum().abs().round(2).to_string()
+
+
+def legado_gastos_recurrentes(username):
+    df = _sesion(username)
+    recurrentes = df[df["Monto"] < 0]["Descripcion"].value_counts()
+    return recurrentes[recurrentes > 2].to_string()
+
+
+def legado_sugerencia_presupuesto():
+    df = _sesion()
+    df["Fecha"] = pd.to_datetime(df["Fecha"], errors="coerce")
+    promedio = abs(df[df["Monto"] < 0].groupby(df["Fecha"].dt.to_period("M"))["Monto"].sum()).mean()
+    return f"Te sugerimos establecer un presupuesto mensual máximo de ${promedio * 0.9:,.2f}."
+
+
+def legado_simulador(categoria, username):
+    df = _sesion(username)
+    total_categoria = df[(df["Categoria"] == categoria) & (df["Monto"] < 0)]["Monto"].sum()
+    return f"Si dejas de gastar en {categoria}, tu balance aumentaría a ${df['Monto'].sum() - total_categoria:,.2f}."
+
+
+# (nombre, versión original, vista sobre AnalyticsFrame)
+U = USUARIO
+METRICAS = [
+    ("total_gastado", lambda: legado_total_spent(U), lambda: utils.get_total_spent(U)),
+    ("total_ingresado", lambda: legado_total_earned(U), lambda: utils.get_total_earned(U)),
+    ("gastos_por_categoria", lambda: legado_gastos_por_categoria("Gustos 🎁", U),
+     lambda: utils.get_gastos_por_categoria("gustos", U)),
+    ("gastos_por_mes", lambda: legado_gastos_por_mes(6, 2024), lambda: utils.get_gastos_por_mes(6, 2024)),
+    ("resumen_mensual", legado_resumen_mensual, lambda: utils.resumen_mensual()),
+    ("balance_actual", legado_balance_actual, utils.get_balance_actual),
+    ("ultimas_transacciones", legado_ultimas_transacciones, utils.get_ultimas_transacciones),
+    ("promedio_mensual", lambda: legado_promedio_gastos("mensual", U), lambda: utils.get_promedio_gastos("mensual", U)),
+    ("promedio_semanal", lambda: legado_promedio_gastos("semanal", U), lambda: utils.get_promedio_gastos("semanal", U)),
+    ("proyeccion_saldo", lambda: legado_proyeccion_saldo(U), lambda: utils.proyeccion_saldo_fin_mes(U)),
+    ("ranking_gastos", lambda: legado_ranking_gastos(U), lambda: utils.ranking_gastos_categorias(U)),
+    ("ranking_ingresos", lambda: legado_ranking_ingresos(U), lambda: utils.ranking_ingresos_categorias(U)),
+    ("porcentaje_gastos", lambda: legado_porcentaje_gastos(U), lambda: utils.porcentaje_gastos_por_categoria(U)),
+    ("alerta_gasto", legado_alerta_gasto, lambda: utils.alerta_gasto_excesivo()),
+    ("sugerencia_ahorro", lambda: legado_sugerencia_ahorro(U), lambda: utils.sugerencia_ahorro(U)),
+    ("buscar", lambda: legado_buscar("netflix", U), lambda: utils.buscar_transacciones("netflix", U)),
+    ("evolucion_balance", lambda: legado_evolucion_balance(U), lambda: utils.evolucion_balance(U)),
+    ("comparativa_mensual", legado_comparativa, lambda: utils.comparativa_gastos_mensual()),
+    ("gastos_recurrentes", lambda: legado_gastos_recurrentes(U), lambda: utils.gastos_recurrentes(U)),
+    ("sugerencia_presupuesto", legado_sugerencia_presupuesto, lambda: utils.sugerencia_presupuesto()),
+    ("simulador_sin_gasto", lambda: legado_simulador("Gustos 🎁", U), lambda: utils.simulador_sin_gasto_en("Gustos 🎁", U)),
+]
+
+
+def correr(historico, version, recargar=True):
+    """Ejecuta todas las métricas y devuelve tiempos y salidas.
+
+    Con `recargar` la sesión se carga de nuevo (como tras un alta o baja); sin él
+    se reutiliza el marco analítico ya construido (un rerun normal de la página).
+    """
+    if recargar:
+        # Copia nueva por corrida: la versión original convierte Fecha en su sitio.
+        st.session_state["transacciones"] = historico.copy()
+        st.session_state.pop("_analitica", None)
+    tiempos, salidas = {}, {}
+    for nombre, legado, vista in METRICAS:
+        funcion = legado if version == "legado" else vista
+        inicio = time.perf_counter()
+        salidas[nombre] = funcion()
+        tiempos[nombre] = (time.perf_counter() - inicio) * 1000
+    return tiempos, salidas
+
+
+def _iguales(a, b):
+    if isinstance(a, pd.DataFrame):
+        return a.reset_index(drop=True).equals(b.reset_index(drop=True))
+    return a == b
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--filas", type=int, default=1_000_000)
+    parser.add_argument("--repeticiones", type=int, default=3)
+    args = parser.parse_args()
+
+    historico = generar_historico(args.filas)
+
+    _, salidas_legado = correr(historico, "legado")
+    _, salidas_nuevas = correr(historico, "analitica")
+    distintas = [n for n in salidas_legado if not _iguales(salidas_legado[n], salidas_nuevas[n])]
+    if distintas:
+        raise SystemExit(f"Las salidas no coinciden en: {', '.join(distintas)}")
+    print(f"{len(METRICAS)} métricas verificadas: salidas idénticas.\n")
+
+    medidas = {"legado": [], "analitica": [], "cache": []}
+    for _ in range(args.repeticiones):
+        medidas["legado"].append(correr(historico, "legado")[0])
+        medidas["analitica"].append(correr(historico, "analitica")[0])
+        medidas["cache"].append(correr(historico, "analitica", recargar=False)[0])
+
+    print(f"{args.filas:,} filas · mediana de {args.repeticiones} corridas")
+    print(f"{'métrica':<24} {'original (ms)':>14} {'analítica (ms)':>15} {'rerun (ms)':>11}")
+    totales = dict.fromkeys(medidas, 0.0)
+    for nombre, _, _ in METRICAS:
+        fila = {v: statistics.median(t[nombre] for t in medidas[v]) for v in medidas}
+        for v, valor in fila.items():
+            totales[v] += valor
+        print(f"{nombre:<24} {fila['legado']:>14.1f} {fila['analitica']:>15.1f} {fila['cache']:>11.2f}")
+    mejora = totales["legado"] / totales["analitica"] if totales["analitica"] else float("inf")
+    print(f"{'TOTAL':<24} {totales['legado']:>14.1f} {totales['analitica']:>15.1f} {totales['cache']:>11.2f}"
+          f"   ({mejora:.1f}x con sesión recién cargada)")
+
+
+if __name__ == "__main__":
+    main()
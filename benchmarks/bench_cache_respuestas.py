@@ -0,0 +1,109 @@
+"""
+Benchmark de la caché de respuestas de Billie.
+
+Simula sesiones de varios usuarios que repiten preguntas del tablero (con
+variaciones de acentos, signos y relleno) sobre una base SQLite temporal. Un
+agente falso tarda `--latencia` segundos por respuesta y contesta con la
+versión de datos que vio, de modo que se detecta cualquier respuesta vieja. De
+vez en cuando un usuario registra un gasto, lo que debe invalidar sus entradas.
+Antes de simular verifica que las preguntas de `DISTINTAS` nunca se respondan
+con la de su pareja.
+
+$ python -m benchmarks.bench_cache_respuestas
+$ python -m benchmarks.bench_cache_respuestas --preguntas 5000 --latencia 0
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+from datetime import date
+
+from cache_respuestas import CacheRespuestas
+from db import get_engine
+from utils import guardar_transaccion_usuario
+from versiones import version_datos
+
+PREGUNTAS = [
+    ["¿Cuánto he gastado en total?", "cuanto he gastado en total", "Cuánto he gastado en total por favor"],
+    ["¿Cuál es mi balance actual?", "cual es mi balance actual?", "oye billie, ¿cuál es mi balance actual?"],
+    ["¿Cuánto he gastado en gustos?", "cuanto he gastado en los gustos"],
+    ["¿Cuánto he gastado en necesidades?", "Cuánto he gastado en necesidades"],
+    ["¿Cómo voy con mis metas?", "como voy con mis metas"],
+    ["¿Me puedes sugerir una meta de ahorro?", "me puedes sugerir una meta de ahorro"],
+    ["¿Qué gastos he tenido por mes?", "que gastos he tenido por mes"],
+    ["¿Cuánto gasté en mayo?"], ["¿Cuánto gasté en marzo?"],
+    ["¿Puedo gastar 500 en cine?"], ["¿Puedo gastar 900 en cine?"],
+]
+
+# Parecidas pero no iguales: ninguna debe tomar la respuesta de la otra
+DISTINTAS = [
+    ("busca transacciones de uber eats", "busca transacciones de uber"),
+    ("cuanto gaste en cines", "cuanto gaste en cine"),
+    ("Muéstrame las últimas transacciones de gustos", "Muéstrame las últimas transacciones"),
+    ("cuánto gasté en comida rápida", "cuánto gasté en comida"),
+    ("¿Puedo gastar 500 en cine?", "¿Puedo gastar 900 en cine?"),
+]
+
+
+def verificar_distintas():
+    cache = CacheRespuestas()
+    for guardada, otra in DISTINTAS:
+        cache.guardar("u", 1, guardada, guardada)
+        assert cache.buscar("u", 1, otra) is None, f"'{otra}' se respondió con '{guardada}'"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--preguntas", type=int, default=2000)
+    parser.add_argument("--usuarios", type=int, default=5)
+    parser.add_argument("--latencia", type=float, default=0.02, help="Segundos por respuesta del agente falso")
+    parser.add_argument("--prob-cambio", type=float, default=0.02, help="Probabilidad de registrar un gasto")
+    args = parser.parse_args()
+    rnd = random.Random(3)
+    verificar_distintas()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = get_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        cache = CacheRespuestas(engine=engine)
+        usuarios = [f"usuario{i + 1}" for i in range(args.usuarios)]
+        llamadas_agente = viejas = cambios = 0
+
+        def agente(usuario, grupo):
+            nonlocal llamadas_agente
+            llamadas_agente += 1
+            time.sleep(args.latencia)
+            with engine.connect() as conn:
+                return f"{grupo}|{version_datos(conn, usuario)}"
+
+        inicio = time.perf_counter()
+        for i in range(args.preguntas):
+            usuario = rnd.choice(usuarios)
+            if rnd.random() < args.prob_cambio:
+                guardar_transaccion_usuario(engine, date(2025, 1, 1), "Gustos 🎁", "Tarjeta", -(i + 1.0), usuario, "Cine")
+                cambios += 1
+            # Las primeras preguntas se repiten más (como los botones del tablero)
+            grupo = min(int(rnd.expovariate(0.35)), len(PREGUNTAS) - 1)
+            pregunta = rnd.choice(PREGUNTAS[grupo])
+            respuesta = cache.obtener_o_calcular(usuario, pregunta, lambda: agente(usuario, grupo))
+            with engine.connect() as conn:
+                if respuesta != f"{grupo}|{version_datos(conn, usuario)}":
+                    viejas += 1
+        total = time.perf_counter() - inicio
+        engine.dispose()
+
+    e = cache.estadisticas()
+    sin_cache = args.preguntas * args.latencia
+    print(f"{args.preguntas:,} preguntas, {args.usuarios} usuarios, {cambios} cambios de datos")
+    print(f"aciertos: {e['tasa_aciertos']:.1%} (exactos {e['aciertos_exactos']:,}, equivalentes {e['aciertos_equivalentes']:,}), "
+          f"fallos {e['fallos']:,}")
+    print(f"llamadas al agente: {llamadas_agente:,} de {args.preguntas:,}; "
+          f"latencia ahorrada {e['segundos_ahorrados']:.1f} s")
+    print(f"tiempo total: {total:.1f} s con caché vs ~{sin_cache:.1f} s de agente sin caché")
+    print(f"respuestas viejas o de otra pregunta: {viejas}")
+    if viejas:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+Benchmark del enrutador de intenciones frente al agente ReAct.
+
+1. Precisión del clasificador: las 12 frases de los botones y un conjunto de
+   preguntas libres etiquetadas (las que no deben enrutarse esperan None).
+2. Costo por tipo de pregunta: la ruta local (clasificar + herramienta) contra
+   el agente con un LLM falso que elige la herramienta correcta a la primera,
+   es decir, el mejor caso del agente (2 llamadas al LLM). La latencia del
+   agente se estima como llamadas × `--latencia-llm` más su sobrecosto local.
+
+$ python -m benchmarks.bench_enrutador
+$ python -m benchmarks.bench_enrutador --usuario usuario2 --latencia-llm 4
+"""
+import argparse
+import contextlib
+import io
+import os
+import time
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-bench")
+
+import streamlit as st  # noqa: E402
+from langchain_core.callbacks import BaseCallbackHandler  # noqa: E402
+from langchain_core.language_models import FakeListLLM  # noqa: E402
+
+from agente import crear_agente  # noqa: E402
+from db import get_engine  # noqa: E402
+from enrutador import INTENCIONES, EnrutadorIntenciones  # noqa: E402
+from utils import cargar_transacciones_usuario  # noqa: E402
+
+BOTONES = [(ejemplos[0], nombre) for nombre, _, _, ejemplos in INTENCIONES[:12]]
+PREGUNTAS_LIBRES = [
+    ("¿Cuánto he gastado?", "gasto_total"),
+    ("cuanto he gastado en gustos", "gasto_en_categoria"),
+    ("cual es mi saldo", "balance"),
+    ("ultimas transacciones por favor", "ultimas_transacciones"),
+    ("promedio semanal de gastos", "promedio_gastos"),
+    ("cual fue mi gasto mas grande", "mayor_gasto"),
+    ("que porcentaje de mis gastos es de necesidades", "porcentaje_por_categoria"),
+    ("como van mis metas", "resumen_metas"),
+    ("en que categoria gasto mas", "gasto_por_categoria"),
+    ("mis ingresos por categoria", "ranking_ingresos"),
+    ("tengo suscripciones?", "gastos_recurrentes"),
+    ("gastos por mes", "gastos_por_mes"),
+    # Deben ir al agente: piden algo que ninguna herramienta resuelve tal cual
+    ("Cuánto gasté en comida este mes", None),
+    ("cuánto ingresé este año", None),
+    ("gastos del mes pasado", None),
+    ("registra un gasto de 200 en cine", None),
+    ("dame ideas para invertir en cetes", None),
+    ("hola billie", None),
+    ("cuanto he gastado en gustos este mes", None),
+    # "este mes" no es "mes a mes": sin "este" las dos se reducían a {gast, mes}
+    ("cuanto gaste este mes", None),
+    ("¿cuánto gasté esta semana?", None),
+]
+# Preguntas por el periodo actual que nunca deben contestarse con la comparativa mes a mes
+PERIODO_ACTUAL = ["cuanto gaste este mes", "¿cuánto gasté esta semana?", "mis gastos de este mes"]
+
+
+class ContadorLLM(BaseCallbackHandler):
+    def __init__(self):
+        self.llamadas = 0
+
+    def on_llm_start(self, *args, **kwargs):
+        self.llamadas += 1
+
+
+def precision(enrutador):
+    correctas = incorrectas = al_agente = 0
+    for pregunta, esperada in BOTONES + PREGUNTAS_LIBRES:
+        ruta = enrutador.clasificar(pregunta)
+        obtenida = ruta["intencion"] if ruta else None
+        if obtenida == esperada:
+            correctas += 1
+        elif obtenida is None:
+            al_agente += 1
+            print(f"  al agente (esperada {esperada}): {pregunta!r}")
+        else:
+            incorrectas += 1
+            print(f"  ✗ {pregunta!r}: {obtenida} (esperada {esperada})")
+    total = len(BOTONES) + len(PREGUNTAS_LIBRES)
+    print(f"Clasificador: {correctas}/{total} correctas, {incorrectas} mal enrutadas, "
+          f"{al_agente} enviadas al agente sin necesidad")
+    for pregunta in PERIODO_ACTUAL:
+        ruta = enrutador.clasificar(pregunta)
+        assert not ruta or ruta["intencion"] != "gastos_por_mes", f"{pregunta!r} se enrutó a la comparativa mensual"
+
+
+def costo_por_pregunta(enrutador, username, repeticiones, latencia_llm):
+    print(f"\n{'intención':<26}{'local ms':>10}{'agente ms':>11}{'LLM':>5}{'agente estimado s':>19}")
+    ahorradas = 0
+    for pregunta, _ in BOTONES:
+        ruta = enrutador.clasificar(pregunta)
+        inicio = time.perf_counter()
+        for _ in range(repeticiones):
+            enrutador.responder(pregunta, username)
+        t_local = (time.perf_counter() - inicio) / repeticiones
+
+        llm = FakeListLLM(responses=[
+            f"Necesito la herramienta.\nAction: {ruta['herramienta']}\nAction Input: {ruta['entrada']}",
+            "Ya tengo la respuesta.\nFinal Answer: listo",
+        ])
+        agente = crear_agente(username, llm=llm)
+        contador = ContadorLLM()
+        inicio = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            agente.run(pregunta, callbacks=[contador])
+        t_agente = time.perf_counter() - inicio
+        ahorradas += contador.llamadas
+        print(f"{ruta['intencion']:<26}{t_local * 1000:>10.2f}{t_agente * 1000:>11.1f}{contador.llamadas:>5}"
+              f"{t_agente + contador.llamadas * latencia_llm:>19.2f}")
+    print(f"\nLos {len(BOTONES)} botones evitan al menos {ahorradas} llamadas al LLM "
+          f"(~{ahorradas * latencia_llm:.0f} s con {latencia_llm:g} s por llamada).")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--usuario", default="usuario1")
+    parser.add_argument("--repeticiones", type=int, default=50)
+    parser.add_argument("--latencia-llm", type=float, default=2.5,
+                        help="Segundos supuestos por llamada a GPT-4 (no se llama al modelo)")
+    args = parser.parse_args()
+
+    st.session_state.transacciones = cargar_transacciones_usuario(get_engine(), args.usuario)
+    enrutador = EnrutadorIntenciones()
+    precision(enrutador)
+    costo_por_pregunta(enrutador, args.usuario, args.repeticiones, args.latencia_llm)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Benchmark de latencia por usuario antes y después de la migración de esquema.
+
+Genera una base SQLite temporal con el esquema original de `transacciones`
+(sin llave primaria ni índices), mide las consultas que usa la app, aplica
+`migraciones.aplicar_migraciones` y vuelve a medir.
+
+$ python -m benchmarks.bench_esquema                       # 10k, 1M y 10M filas
+$ python -m benchmarks.bench_esquema --filas 10000 100000
+"""
+import argparse
+import os
+import random
+import sqlite3
+import statistics
+import tempfile
+import time
+
+from sqlalchemy import create_engine
+
+from migraciones import aplicar_migraciones
+
+CATEGORIAS = ["Necesidades 🍎", "Gustos 🎁", "Metas financieras 💰", "Ingresos 💵"]
+FILAS_POR_USUARIO = 1000
+
+CONSULTAS_ANTES = {
+    "cargar_transacciones": ("SELECT * FROM transacciones WHERE Usuario = ?", lambda u: (u,)),
+    "total_ahorrado": (
+        "SELECT ABS(SUM(Monto)) FROM transacciones WHERE Usuario = ? AND Categoria = 'Metas financieras 💰'",
+        lambda u: (u,),
+    ),
+    "gasto_mes_por_categoria": (
+        """SELECT Categoria, ABS(SUM(Monto)) FROM transacciones
+           WHERE Usuario = ? AND strftime('%m', Fecha) = '06' AND strftime('%Y', Fecha) = '2024'
+           GROUP BY Categoria""",
+        lambda u: (u,),
+    ),
+}
+
+CONSULTAS_DESPUES = dict(CONSULTAS_ANTES)
+CONSULTAS_DESPUES["gasto_mes_por_categoria"] = (
+    """SELECT Categoria, ABS(SUM(Monto)) FROM transacciones
+       WHERE Usuario = ? AND Fecha >= '2024-06-01' AND Fecha < '2024-07-01'
+       GROUP BY Categoria""",
+    lambda u: (u,),
+)
+
+
+def poblar_legado(path, filas):
+    conn = sqlite3.connect(path)
+    conn.execute("""
+        CREATE TABLE transacciones (
+            "ID" BIGINT, "Usuario" TEXT, "Fecha" TEXT, "Categoria" TEXT,
+            "Cuenta" TEXT, "Monto" FLOAT, "Descripcion" TEXT
+        )
+    """)
+    usuarios = max(1, filas // FILAS_POR_USUARIO)
+    rnd = random.Random(42)
+
+    def generar():
+        for i in range(filas):
+            categoria = rnd.choice(CATEGORIAS)
+            monto = rnd.uniform(100, 5000) * (1 if categoria == "Ingresos 💵" else -1)
+            fecha = f"{rnd.randint(2020, 2025)}-{rnd.randint(1, 12):02d}-{rnd.randint(1, 28):02d}"
+            yield (i + 1, f"usuario{rnd.randrange(usuarios)}", fecha, categoria, "General", monto, "bench")
+
+    conn.executemany("INSERT INTO transacciones VALUES (?, ?, ?, ?, ?, ?, ?)", generar())
+    conn.commit()
+    conn.close()
+    return usuarios
+
+
+def medir(path, consultas, usuarios, repeticiones=30):
+    conn = sqlite3.connect(path)
+    rnd = random.Random(7)
+    resultados = {}
+    for nombre, (sql, params) in consultas.items():
+        tiempos = []
+        for _ in range(repeticiones):
+            usuario = f"usuario{rnd.randrange(usuarios)}"
+            inicio = time.perf_counter()
+            conn.execute(sql, params(usuario)).fetchall()
+            tiempos.append((time.perf_counter() - inicio) * 1000)
+        resultados[nombre] = statistics.median(tiempos)
+    conn.close()
+    return resultados
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--filas", type=int, nargs="+", default=[10_000, 1_000_000, 10_000_000])
+    parser.add_argument("--repeticiones", type=int, default=30)
+    args = parser.parse_args()
+
+    print(f"{'filas':>12} {'consulta':<26} {'antes (ms)':>12} {'después (ms)':>14} {'mejora':>8}")
+    for filas in args.filas:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "bench.db")
+            usuarios = poblar_legado(path, filas)
+            antes = medir(path, CONSULTAS_ANTES, usuarios, args.repeticiones)
+
+            inicio = time.perf_counter()
+            engine = create_engine(f"sqlite:///{path}")
+            aplicar_migraciones(engine)
+            engine.dispose()
+            duracion_migracion = time.perf_counter() - inicio
+
+            despues = medir(path, CONSULTAS_DESPUES, usuarios, args.repeticiones)
+            for nombre in antes:
+                mejora = antes[nombre] / despues[nombre] if despues[nombre] else float("inf")
+                print(f"{filas:>12,} {nombre:<26} {antes[nombre]:>12.3f} {despues[nombre]:>14.3f} {mejora:>7.1f}x")
+            print(f"{filas:>12,} {'(migración)':<26} {duracion_migracion * 1000:>12.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
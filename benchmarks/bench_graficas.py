@@ -0,0 +1,113 @@
+"""
+Benchmark y prueba de memoria de las donas de presupuesto a lo largo de `--reruns` reruns.
+
+Cada rerun dibuja las tres donas de la sección "registro"; los montos cambian
+cada `--cada` reruns (como cuando se registra un gasto). Modos:
+
+* legado: `plt.subplots` + PNG como `st.pyplot` (dpi 200, bbox "tight") sin
+  cerrar la figura, como estaba en page_tu_dinero.py;
+* legado + close: lo mismo, cerrando la figura;
+* svg: `graficas.donut_html`.
+
+Reporta ms por rerun, bytes enviados por rerun, figuras abiertas y cuánto creció
+la memoria residente del proceso (/proc/self/statm) entre el primer décimo de
+los reruns y el final. Falla si el modo svg deja figuras abiertas o crece más
+de `--limite` KiB. Los modos corren del más ligero al más pesado para que la
+memoria de uno no oculte el crecimiento del siguiente.
+
+$ python -m benchmarks.bench_graficas
+$ python -m benchmarks.bench_graficas --reruns 200 --modos svg
+"""
+import argparse
+import gc
+import io
+import os
+import time
+import warnings
+
+import matplotlib
+
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt  # noqa: E402
+
+from graficas import donut_html  # noqa: E402
+
+CATEGORIAS = [("#8ECA62", "#4c8bf5"), ("#56A163", "#4c8bf5"), ("#61ACAB", "#4c8bf5")]
+
+
+def dona_legado(presupuesto, gasto, color_fondo, color_donut, cerrar):
+    restante = max(presupuesto - gasto, 0)
+    fig, ax = plt.subplots(figsize=(1.7, 1.7))
+    fig.patch.set_facecolor(color_fondo)
+    ax.pie([gasto, restante], startangle=90, colors=[color_donut, "#e0e0e0"],
+           wedgeprops={"width": 0.25, "edgecolor": "white"})
+    ax.set(aspect="equal")
+    plt.axis("off")
+    imagen = io.BytesIO()
+    fig.savefig(imagen, format="png", dpi=200, bbox_inches="tight")
+    if cerrar:
+        plt.close(fig)
+    return imagen.getvalue()
+
+
+MODOS = {
+    "svg": lambda *a: donut_html(*a).encode(),
+    "legado + close": lambda *a: dona_legado(*a, cerrar=True),
+    "legado": lambda *a: dona_legado(*a, cerrar=False),
+}
+
+
+def memoria_kib():
+    # Memoria residente en Linux; en otros sistemas no se reporta
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1024
+    except OSError:
+        return float("nan")
+
+
+def correr(modo, reruns, cada):
+    dibujar = MODOS[modo]
+    gc.collect()
+    base = None
+    enviados = 0
+    inicio = time.perf_counter()
+    for rerun in range(reruns):
+        gasto = 500.0 * (rerun // cada)
+        for i, (fondo, dona) in enumerate(CATEGORIAS):
+            enviados += len(dibujar(10_000.0 * (i + 1), gasto, fondo, dona))
+        if rerun + 1 == max(reruns // 10, 1):
+            gc.collect()
+            base = memoria_kib()
+    ms = (time.perf_counter() - inicio) * 1000 / reruns
+    gc.collect()
+    crecimiento = memoria_kib() - base
+    return {"ms": ms, "bytes": enviados / reruns, "figuras": len(plt.get_fignums()), "kib": crecimiento}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--reruns", type=int, default=1000)
+    parser.add_argument("--cada", type=int, default=10, help="Reruns entre cambios de montos")
+    parser.add_argument("--modos", nargs="+", default=list(MODOS), choices=list(MODOS))
+    parser.add_argument("--limite", type=float, default=1024, help="KiB de crecimiento permitidos al modo svg")
+    args = parser.parse_args()
+    warnings.filterwarnings("ignore", message="More than 20 figures")
+
+    print(f"{args.reruns:,} reruns, 3 donas por rerun, montos nuevos cada {args.cada}\n")
+    print(f"{'modo':<16}{'ms/rerun':>10}{'KiB/rerun':>11}{'figuras abiertas':>18}{'crecimiento KiB':>17}")
+    resultados = {}
+    for modo in args.modos:
+        resultados[modo] = r = correr(modo, args.reruns, args.cada)
+        print(f"{modo:<16}{r['ms']:>10.2f}{r['bytes'] / 1024:>11.1f}{r['figuras']:>18}{r['kib']:>17.0f}")
+        plt.close("all")
+
+    if "svg" in resultados:
+        svg = resultados["svg"]
+        assert svg["figuras"] == 0, "El modo svg dejó figuras abiertas"
+        assert svg["kib"] <= args.limite, f"La memoria creció {svg['kib']:.0f} KiB (límite {args.limite:.0f})"
+        print(f"\nsvg: sin figuras abiertas y {svg['kib']:.0f} KiB de crecimiento (límite {args.limite:.0f})")
+
+
+if __name__ == "__main__":
+    main()
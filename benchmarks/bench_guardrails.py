@@ -0,0 +1,92 @@
+"""
+Microbenchmark del guardrail de temas: latencia por prompt (p50/p99).
+
+Mide la carga + calentamiento del clasificador (lo que antes pagaba la primera
+importación de `guardrails.py`), el clasificador solo sobre cada prompt (lo que
+hacía la versión original después del regex) y el pipeline por etapas
+prompt por prompt y por lotes, con prompts financieros y no financieros
+mezclados y repetidos como en un chat real. Al final, las métricas por etapa y
+una comprobación de que las palabras ambiguas ("cuenta un chiste") no se
+aceptan en la etapa de finanzas sino que llegan al clasificador.
+Sin fasttext o sin el archivo del modelo se mide `ClasificadorLocal`.
+
+$ python -m benchmarks.bench_guardrails
+$ python -m benchmarks.bench_guardrails --prompts 20000 --lote 256
+"""
+import argparse
+import random
+import statistics
+import time
+
+from guardrails import EJEMPLOS, FINANZAS, ServicioGuardrail, cargar_clasificador, normalizar_prompt
+
+PLANTILLAS = ["{}", "¿{}?", "oye billie, {}", "{} por favor", "una pregunta: {}"]
+# Usan una palabra financiera en otro sentido: no deben aceptarse sin pasar por el clasificador
+AMBIGUAS = ["cuenta un chiste", "fondo de pantalla bonito", "tengo mucho interés en la astronomía",
+            "fotos de stock gratis", "¿cuándo es el examen SAT?", "me senté en un banco del parque",
+            "los créditos de la película", "una tarjeta de cumpleaños", "el rendimiento de mi laptop"]
+
+
+def percentil(valores, p):
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(len(ordenados) * p / 100))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--prompts", type=int, default=5000)
+    parser.add_argument("--lote", type=int, default=64, help="Prompts por llamada a validate_many")
+    args = parser.parse_args()
+    rnd = random.Random(42)
+    frases = [f for lista in EJEMPLOS.values() for f in lista] + ["hablemos de política", "violencia en la tele"]
+    prompts = [rnd.choice(PLANTILLAS).format(rnd.choice(frases)) for _ in range(args.prompts)]
+
+    inicio = time.perf_counter()
+    servicio = ServicioGuardrail(cargar_clasificador())
+    servicio.calentar()
+    carga_ms = (time.perf_counter() - inicio) * 1000
+    tipo = "ClasificadorLocal (respaldo)" if servicio.respaldo else "fasttext"
+    print(f"clasificador: {tipo}; carga + calentamiento {carga_ms:.1f} ms (una vez por proceso)")
+
+    solo_modelo = []
+    for prompt in prompts:
+        inicio = time.perf_counter()
+        servicio.es_finanzas([prompt])
+        solo_modelo.append((time.perf_counter() - inicio) * 1e6)
+
+    individuales = []
+    for prompt in prompts:
+        inicio = time.perf_counter()
+        servicio.validate(prompt)
+        individuales.append((time.perf_counter() - inicio) * 1e6)
+
+    metricas = servicio.metricas()
+    servicio = ServicioGuardrail(servicio.clasificador)  # caché vacía para el modo por lotes
+    por_prompt_lote = []
+    for i in range(0, len(prompts), args.lote):
+        lote = prompts[i:i + args.lote]
+        inicio = time.perf_counter()
+        servicio.validate_many(lote)
+        por_prompt_lote.extend([(time.perf_counter() - inicio) * 1e6 / len(lote)] * len(lote))
+
+    print(f"\n{'modo':<22}{'p50 µs':>10}{'p99 µs':>10}{'media µs':>10}")
+    modos = (("sólo clasificador", solo_modelo), ("validate_prompt", individuales),
+             (f"validate_many ({args.lote})", por_prompt_lote))
+    for nombre, tiempos in modos:
+        print(f"{nombre:<22}{percentil(tiempos, 50):>10.1f}{percentil(tiempos, 99):>10.1f}"
+              f"{statistics.mean(tiempos):>10.1f}")
+    print(f"\n{'etapa (validate_prompt)':<24}{'entradas':>10}{'resueltos':>11}{'tasa':>8}{'µs/prompt':>11}")
+    for nombre, etapa in metricas["etapas"].items():
+        print(f"{nombre:<24}{etapa['entradas']:>10,}{etapa['resueltos']:>11,}{etapa['tasa']:>8.1%}"
+              f"{etapa['us_por_prompt']:>11.1f}")
+    rechazados = sum(not valido for valido, _ in servicio.validate_many(prompts))
+    print(f"\nrechazados: {rechazados:,} de {len(prompts):,}")
+
+    atajos = [p for p in AMBIGUAS if FINANZAS.search(normalizar_prompt(p))]
+    assert not atajos, f"Aceptadas sin clasificador: {atajos}"
+    veredictos = ServicioGuardrail(servicio.clasificador).validate_many(AMBIGUAS)
+    print(f"ambiguas: {len(AMBIGUAS)} al clasificador, {sum(not v for v, _ in veredictos)} rechazadas")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""
+Benchmark de cada herramienta del agente, de punta a punta y sin red.
+
+Crea una copia temporal de `transacciones.db` con usuarios sintéticos de
+distinto tamaño de histórico (importados con `importador.py`) y, para cada
+herramienta de `agente.HERRAMIENTAS`, corre el agente ReAct con el modelo
+guionizado `llm_local.ChatGuion`: el guion pide la herramienta y luego da la
+respuesta final. Por pregunta reporta el tiempo de la herramienta, el del
+agente completo, los tokens de la salida completa y de la que entra al prompt
+(compactada por `formato_salidas.py`) y los tokens de prompt del agente (la
+salida de la herramienta viaja en el prompt de la segunda llamada).
+
+Con --grabar-trazas se escribe el guion usado, que se puede reproducir en la
+app con BILLIE_LLM_PROVEEDOR=guion BILLIE_LLM_TRAZAS=<archivo>.
+
+$ python -m benchmarks.bench_herramientas                      # 100, 1k y 10k movimientos
+$ python -m benchmarks.bench_herramientas --filas 50000 --herramienta "Evolución de balance"
+$ BILLIE_TOKENS_HERRAMIENTA=1000000 python -m benchmarks.bench_herramientas   # sin compactar
+"""
+import argparse
+import contextlib
+import io
+import os
+import shutil
+import tempfile
+import time
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-bench")
+
+# Entradas de ejemplo para las herramientas que las usan
+ENTRADAS = {
+    "Gastos por categoria": "gustos",
+    "Registrar transacción": "gasté 200 en comida con tarjeta",
+    "Promedio de gastos": "mensual",
+    "Buscar transacciones": "Netflix",
+    "Simulador: sin gasto en categoría": "Gustos 🎁",
+}
+# Dibuja widgets de Streamlit y espera al usuario: no tiene sentido fuera de la página
+OMITIR = {"Asistente de presupuesto"}
+
+
+def pregunta(herramienta):
+    return f"Usa la herramienta {herramienta}"
+
+
+def guion(herramienta):
+    return [
+        f"Necesito consultar {herramienta}.\nAction: {herramienta}\nAction Input: {ENTRADAS.get(herramienta, '')}",
+        "Ya tengo el dato.\nFinal Answer: Listo.",
+    ]
+
+
+def poblar(engine, usuario, filas, semilla):
+    from benchmarks.bench_analitica import generar_historico
+    from importador import importar_estado_cuenta
+
+    historico = generar_historico(filas, semilla)
+    archivo = io.StringIO(historico[["Fecha", "Descripcion", "Categoria", "Cuenta", "Monto"]].to_csv(index=False))
+    return importar_estado_cuenta(engine, archivo, usuario, formato="csv")["insertadas"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--filas", type=int, nargs="+", default=[100, 1_000, 10_000],
+                        help="Movimientos por usuario sintético")
+    parser.add_argument("--herramienta", action="append", default=None, help="Sólo estas herramientas (repetible)")
+    parser.add_argument("--repeticiones", type=int, default=3)
+    parser.add_argument("--grabar-trazas", default=None, metavar="JSONL")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # db.py lee BILLIE_DB_URL al importarse: nada que importe utils/db puede ir antes
+        shutil.copy("transacciones.db", os.path.join(tmp, "bench.db"))
+        os.environ["BILLIE_DB_URL"] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+
+        import streamlit as st
+
+        from agente import HERRAMIENTAS, crear_agente
+        from db import get_engine
+        from llm_local import ChatGuion
+        from formato_salidas import estadisticas
+        from proveedores_llm import ContadorTokens, guardar_trazas
+        from utils import cargar_transacciones_usuario
+
+        engine = get_engine()
+        nombres = [n for n, _, _ in HERRAMIENTAS if n not in OMITIR and (not args.herramienta or n in args.herramienta)]
+        trazas = {pregunta(n): guion(n) for n in nombres}
+        if args.grabar_trazas:
+            guardar_trazas(args.grabar_trazas, trazas)
+
+        tiempos = {}
+
+        def medida(nombre, funcion):
+            # Tiempo de la última llamada (sin el formato, que se cuenta en el agente)
+            def medir(entrada, usuario):
+                inicio = time.perf_counter()
+                try:
+                    return funcion(entrada, usuario)
+                finally:
+                    tiempos[nombre] = time.perf_counter() - inicio
+            return medir
+
+        herramientas = [(n, d, medida(n, f)) for n, d, f in HERRAMIENTAS]
+
+        print(f"{'filas':>7} {'herramienta':<36}{'herr. ms':>10}{'agente ms':>11}"
+              f"{'salida completa':>17}{'salida prompt':>15}{'tokens prompt':>15}")
+        for i, filas in enumerate(args.filas):
+            usuario = f"sintetico_{filas}"
+            insertadas = poblar(engine, usuario, filas, semilla=i)
+            st.session_state.transacciones = cargar_transacciones_usuario(engine, usuario)
+            agente = crear_agente(usuario, llm=ChatGuion(trazas=trazas), herramientas=herramientas)
+
+            total_prompt = total_completa = total_salida = 0
+            for nombre in nombres:
+                herramienta, agente_ms = [], []
+                for _ in range(args.repeticiones):
+                    contador = ContadorTokens()
+                    inicio = time.perf_counter()
+                    with contextlib.redirect_stdout(io.StringIO()):
+                        agente.run(pregunta(nombre), callbacks=[contador])
+                    agente_ms.append((time.perf_counter() - inicio) * 1000)
+                    herramienta.append(tiempos[nombre] * 1000)
+                completa, salida = estadisticas()["por_herramienta"][nombre]
+                total_prompt += contador.tokens_prompt
+                total_completa += completa
+                total_salida += salida
+                print(f"{insertadas:>7,} {nombre:<36}{min(herramienta):>10.1f}{min(agente_ms):>11.1f}"
+                      f"{completa:>17,}{salida:>15,}{contador.tokens_prompt:>15,}")
+            print(f"{insertadas:>7,} {'(total)':<36}{'':>21}{total_completa:>17,}{total_salida:>15,}"
+                  f"{total_prompt:>15,}\n")
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
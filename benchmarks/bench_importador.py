@@ -0,0 +1,61 @@
+"""
+Benchmark del importador masivo de estados de cuenta.
+
+Genera un CSV sintético con encabezados de banco (Fecha Operación, Concepto,
+Cargo, Abono), lo importa a una base SQLite temporal recién migrada y lo vuelve
+a importar para medir el camino de duplicados (todas las filas chocan con el
+índice UNIQUE de Huella).
+
+$ python -m benchmarks.bench_importador                 # 1M filas
+$ python -m benchmarks.bench_importador --filas 100000 --tamano-lote 20000
+"""
+import argparse
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from db import get_engine
+from importador import TAMANO_LOTE, importar_estado_cuenta
+
+CONCEPTOS = [
+    "PAGO SUPER WALMART", "DEPOSITO NOMINA", "CINE CINEPOLIS", "RENTA DEPTO", "UBER TRANSPORTE",
+    "RESTAURANTE LA CASA", "TRANSFERENCIA AHORRO", "OXXO", "AMAZON MX", "FARMACIA MEDICO",
+] + [f"COMERCIO {i}" for i in range(500)]
+
+
+def generar_csv(path, filas, semilla=42):
+    rng = np.random.default_rng(semilla)
+    fechas = np.datetime64("2018-01-01") + rng.integers(0, 365 * 8, filas)
+    montos = np.round(rng.uniform(10, 20_000, filas), 2)
+    es_abono = rng.random(filas) < 0.2
+    pd.DataFrame({
+        "Fecha Operación": pd.to_datetime(fechas).strftime("%d/%m/%Y"),
+        "Concepto": rng.choice(CONCEPTOS, filas),
+        "Cargo": np.where(es_abono, "", pd.Series(montos).map("{:,.2f}".format)),
+        "Abono": np.where(es_abono, pd.Series(montos).map("{:,.2f}".format), ""),
+    }).to_csv(path, index=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--filas", type=int, default=1_000_000)
+    parser.add_argument("--tamano-lote", type=int, default=TAMANO_LOTE)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv = os.path.join(tmp, "estado.csv")
+        generar_csv(csv, args.filas)
+        engine = get_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+
+        for corrida in ("primera importación", "reimportación (duplicados)"):
+            r = importar_estado_cuenta(engine, csv, "usuario_bench", tamano_lote=args.tamano_lote)
+            velocidad = r["leidas"] / r["segundos"] if r["segundos"] else float("inf")
+            print(f"{corrida:<28} {r['segundos']:>7.1f} s  {velocidad:>10,.0f} filas/s  "
+                  f"nuevas={r['insertadas']:,} duplicadas={r['duplicadas']:,} inválidas={r['invalidas']:,}")
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Velocidad y precisión de los modelos de `pronosticos.MODELOS` sobre el catálogo de fondos.
+
+Para cada ticker de `fondos_inversion_v2` se corta la historia `--horizonte`
+años antes del último cierre, se ajusta cada modelo con lo anterior y se
+compara su yhat a ese horizonte contra el cierre real. Reporta por modelo el
+tiempo de ajuste + predicción, el error porcentual absoluto (medio y mediano),
+el error del CAGR en puntos porcentuales y qué tanto cae el cierre real dentro
+de la banda del 80 %.
+
+Sin red, las historias son sintéticas: caminatas con deriva y volatilidad según
+el riesgo del fondo y un cambio de régimen a mitad de la historia. Con
+--fixtures se usan historias reales grabadas con
+`python precios.py grabar <tickers> --directorio <dir>`.
+
+$ python -m benchmarks.bench_modelos_pronostico
+$ python -m benchmarks.bench_modelos_pronostico --modelos deriva --horizonte 5
+$ python -m benchmarks.bench_modelos_pronostico --fixtures fixtures_precios
+"""
+import argparse
+import contextlib
+import io
+import logging
+import time
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import create_engine, text
+
+from precios import DescargadorFixtures
+from pronosticos import MODELOS, pronosticar_historial
+
+# (deriva anual, volatilidad anual) por riesgo del catálogo
+PARAMETROS_RIESGO = {"conservador": (0.07, 0.02), "moderado": (0.08, 0.06), "arriesgado": (0.10, 0.18)}
+
+
+def historia_sintetica(riesgo, anios, semilla, fin):
+    rng = np.random.default_rng(semilla)
+    deriva, volatilidad = PARAMETROS_RIESGO.get(str(riesgo).lower(), (0.08, 0.10))
+    dias = anios * 252
+    # Cambio de régimen: la deriva se mueve hasta ±4 puntos a mitad de la historia
+    derivas = np.where(np.arange(dias) < dias // 2, deriva, deriva + rng.uniform(-0.04, 0.04))
+    rendimientos = rng.normal(derivas / 252, volatilidad / np.sqrt(252))
+    cierre = 100 * np.exp(np.cumsum(rendimientos))
+    return pd.DataFrame({"Close": cierre}, index=pd.bdate_range(end=fin, periods=dias, name="Date"))
+
+
+def evaluar(modelo, hist, horizonte):
+    corte = hist.index.max() - pd.Timedelta(days=horizonte * 365)
+    real = hist["Close"].iloc[-1]
+    inicio = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+        crecimiento, cagr, _, df, forecast = pronosticar_historial(hist[hist.index <= corte], 1, horizonte, modelo)
+    segundos = time.perf_counter() - inicio
+    punto = forecast.iloc[-1]
+    cagr_real = (real / df["y"].iloc[-1]) ** (1 / horizonte) - 1
+    return {
+        "ms": segundos * 1000,
+        "ape": abs(punto["yhat"] - real) / real,
+        "error_cagr": abs(cagr - cagr_real) * 100,
+        "en_banda": punto["yhat_lower"] <= real <= punto["yhat_upper"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--modelos", nargs="+", default=sorted(MODELOS), choices=sorted(MODELOS))
+    parser.add_argument("--horizonte", type=int, default=3, help="Años que se dejan fuera para evaluar")
+    parser.add_argument("--anios", type=int, default=12, help="Años de historia sintética")
+    parser.add_argument("--tickers", type=int, default=None, help="Sólo los primeros N del catálogo")
+    parser.add_argument("--fixtures", default=None, help="Directorio con historias grabadas")
+    parser.add_argument("--db", default="sqlite:///transacciones.db", help="Base con fondos_inversion_v2")
+    args = parser.parse_args()
+    logging.getLogger("cmdstanpy").disabled = True
+
+    engine = create_engine(args.db)
+    with engine.connect() as conn:
+        catalogo = pd.read_sql_query(
+            text("SELECT DISTINCT Ticker AS ticker, Riesgo AS riesgo FROM fondos_inversion_v2 WHERE Ticker IS NOT NULL ORDER BY Ticker"), conn
+        ).drop_duplicates("ticker").head(args.tickers)
+    engine.dispose()
+
+    fin = pd.Timestamp.today().normalize()
+    if args.fixtures:
+        descargador = DescargadorFixtures(args.fixtures)
+        historias = descargador.historiales(list(catalogo["ticker"]))
+    else:
+        historias = {t: historia_sintetica(r, args.anios, i, fin) for i, (t, r) in enumerate(catalogo.itertuples(index=False))}
+    historias = {t: h for t, h in historias.items() if len(h) > (args.horizonte + 2) * 252}
+
+    resultados = {modelo: [] for modelo in args.modelos}
+    for ticker, hist in historias.items():
+        for modelo in args.modelos:
+            resultados[modelo].append(evaluar(modelo, hist, args.horizonte))
+
+    origen = args.fixtures or "sintéticas"
+    print(f"{len(historias)} fondos ({origen}), horizonte de {args.horizonte} años\n")
+    print(f"{'modelo':<10}{'ms mediana':>12}{'ms total':>11}{'MAPE':>8}{'APE mediana':>13}"
+          f"{'error CAGR pp':>15}{'en banda 80%':>14}")
+    for modelo, filas in resultados.items():
+        tabla = pd.DataFrame(filas)
+        print(f"{modelo:<10}{tabla['ms'].median():>12.1f}{tabla['ms'].sum():>11.0f}{tabla['ape'].mean():>8.1%}"
+              f"{tabla['ape'].median():>13.1%}{tabla['error_cagr'].mean():>15.2f}{tabla['en_banda'].mean():>14.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Benchmark de `montecarlo.simular_ahorro`: tiempo, memoria y precisión de los pasos anuales.
+
+Por horizonte corre la simulación con pasos anuales (default de la app) y mes
+por mes, reporta la mediana de `--repeticiones` corridas, el pico de memoria
+(tracemalloc) y cuánto difieren P5/P50/P95 finales y la probabilidad de la
+meta entre ambos modos. La meta es el saldo sin volatilidad al final, así que
+la probabilidad ronda 40-50 %.
+
+$ python -m benchmarks.bench_montecarlo
+$ python -m benchmarks.bench_montecarlo --caminos 1000000 --bloque 50000 --horizontes 20
+"""
+import argparse
+import statistics
+import tracemalloc
+
+from montecarlo import BLOQUE, CAMINOS, simular_ahorro
+
+
+def correr(args, anios, mensual):
+    parametros = dict(saldo_inicial=args.inicial, aportacion_mensual=args.aportacion, meses=anios * 12,
+                      rendimiento_anual=args.rendimiento, volatilidad_anual=args.volatilidad,
+                      caminos=args.caminos, bloque=args.bloque, mensual=mensual)
+    referencia = simular_ahorro(**{**parametros, "caminos": 1})["bandas"]["Sin volatilidad"].iloc[-1]
+    tiempos = [simular_ahorro(**parametros, objetivo=referencia)["ms"] for _ in range(args.repeticiones)]
+    tracemalloc.start()
+    resultado = simular_ahorro(**parametros, objetivo=referencia)
+    pico = tracemalloc.get_traced_memory()[1] / 2 ** 20
+    tracemalloc.stop()
+    return statistics.median(tiempos), pico, resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--horizontes", type=int, nargs="+", default=[1, 5, 10, 20, 30], help="Años")
+    parser.add_argument("--caminos", type=int, default=CAMINOS)
+    parser.add_argument("--bloque", type=int, default=BLOQUE)
+    parser.add_argument("--repeticiones", type=int, default=5)
+    parser.add_argument("--inicial", type=float, default=10_000)
+    parser.add_argument("--aportacion", type=float, default=1_000)
+    parser.add_argument("--rendimiento", type=float, default=0.08)
+    parser.add_argument("--volatilidad", type=float, default=0.15)
+    args = parser.parse_args()
+
+    print(f"{args.caminos:,} caminos en bloques de {args.bloque:,}\n")
+    print(f"{'años':>5}{'anual ms':>10}{'MiB':>7}{'mensual ms':>12}{'MiB':>7}"
+          f"{'dif P5':>9}{'dif P50':>9}{'dif P95':>9}{'prob. anual':>13}{'mensual':>9}")
+    for anios in args.horizontes:
+        ms_anual, mem_anual, anual = correr(args, anios, mensual=False)
+        ms_mensual, mem_mensual, mensual = correr(args, anios, mensual=True)
+        final_anual, final_mensual = anual["bandas"].iloc[-1], mensual["bandas"].iloc[-1]
+        diferencias = [final_anual[p] / final_mensual[p] - 1 for p in ("P5", "P50", "P95")]
+        print(f"{anios:>5}{ms_anual:>10.1f}{mem_anual:>7.1f}{ms_mensual:>12.1f}{mem_mensual:>7.1f}"
+              + "".join(f"{d:>9.2%}" for d in diferencias)
+              + f"{anual['probabilidad']:>13.1%}{mensual['probabilidad']:>9.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Benchmark de la tabla de eliminar transacciones: historial completo vs OFFSET vs cursor.
+
+Genera una base SQLite temporal con un usuario de `--filas` transacciones
+(más otros usuarios de relleno), aplica las migraciones y mide:
+
+* historial: lo que hacía la página antes de pintar nada, traer todo el
+  historial del usuario y recorrerlo con `iterrows` (sin contar los widgets);
+* la misma página de `--tamano` filas al principio, a la mitad y al final del
+  historial con LIMIT/OFFSET y con `paginacion.pagina_transacciones` (cursor),
+  sin filtro y filtrando por categoría;
+* borrar `--tamano` transacciones una por una vs con un solo DELETE ... IN.
+
+$ python -m benchmarks.bench_paginacion
+$ python -m benchmarks.bench_paginacion --filas 1000000 --repeticiones 10
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+import pandas as pd
+from sqlalchemy import create_engine, text
+
+from benchmarks.bench_esquema import CATEGORIAS, poblar_legado
+from migraciones import aplicar_migraciones
+from paginacion import COLUMNAS, pagina_transacciones
+from utils import eliminar_transaccion_usuario, eliminar_transacciones_usuario
+
+USUARIO = "usuario0"
+
+
+def medir(funcion, repeticiones):
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append(time.perf_counter() - inicio)
+    return statistics.median(tiempos) * 1000
+
+
+def pagina_offset(engine, offset, tamano, categoria=None):
+    filtro = " AND Categoria = :cat" if categoria else ""
+    with engine.connect() as conn:
+        return pd.read_sql_query(
+            text(f"""
+                SELECT {', '.join(COLUMNAS)} FROM transacciones WHERE Usuario = :u{filtro}
+                ORDER BY Fecha DESC, ID DESC LIMIT :n OFFSET :o
+            """),
+            conn,
+            params={"u": USUARIO, "cat": categoria, "n": tamano, "o": offset}
+        )
+
+
+def historial(engine):
+    with engine.connect() as conn:
+        df = pd.read_sql_query(text("SELECT * FROM transacciones WHERE Usuario = :u"), conn, params={"u": USUARIO})
+    for _ in df.iterrows():
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--filas", type=int, default=100_000, help="Transacciones del usuario medido")
+    parser.add_argument("--tamano", type=int, default=50, help="Filas por página")
+    parser.add_argument("--repeticiones", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        # Un solo usuario con todas las filas (FILAS_POR_USUARIO de bench_esquema lo haría 1000 por usuario)
+        poblar_legado(path, args.filas)
+        engine = create_engine(f"sqlite:///{path}")
+        with engine.begin() as conn:
+            conn.execute(text("UPDATE transacciones SET Usuario = :u"), {"u": USUARIO})
+        aplicar_migraciones(engine)
+        categoria = CATEGORIAS[0]
+        with engine.connect() as conn:
+            total_categoria = conn.execute(
+                text("SELECT COUNT(*) FROM transacciones WHERE Usuario = :u AND Categoria = :c"),
+                {"u": USUARIO, "c": categoria}).scalar()
+
+        print(f"{args.filas:,} transacciones, páginas de {args.tamano}\n")
+        print(f"{'historial completo + iterrows':<42}{medir(lambda: historial(engine), 3):>10.1f} ms\n")
+        print(f"{'página':<14}{'filtro':<18}{'OFFSET ms':>12}{'cursor ms':>12}")
+        for filtro, total in ((None, args.filas), (categoria, total_categoria)):
+            for nombre, offset in (("primera", 0), ("mitad", total // 2), ("última", total - args.tamano)):
+                offset = max(offset, 0)
+                anterior = pagina_offset(engine, offset - 1, 1, filtro) if offset else None
+                cursor = (anterior["Fecha"].iloc[0], int(anterior["ID"].iloc[0])) if offset else None
+                esperada = pagina_offset(engine, offset, args.tamano, filtro)
+                obtenida, _ = pagina_transacciones(engine, USUARIO, cursor, categoria=filtro, tamano=args.tamano)
+                assert esperada["ID"].tolist() == obtenida["ID"].tolist(), "El cursor no devuelve la misma página"
+                ms_offset = medir(lambda: pagina_offset(engine, offset, args.tamano, filtro), args.repeticiones)
+                ms_cursor = medir(lambda: pagina_transacciones(engine, USUARIO, cursor, categoria=filtro,
+                                                               tamano=args.tamano), args.repeticiones)
+                print(f"{nombre:<14}{filtro or 'sin filtro':<18}{ms_offset:>12.2f}{ms_cursor:>12.2f}")
+
+        with engine.connect() as conn:
+            ids = conn.execute(
+                text("SELECT ID FROM transacciones WHERE Usuario = :u ORDER BY ID LIMIT :n"),
+                {"u": USUARIO, "n": 2 * args.tamano}).scalars().all()
+        inicio = time.perf_counter()
+        for id_transaccion in ids[:args.tamano]:
+            eliminar_transaccion_usuario(engine, id_transaccion, USUARIO)
+        ms_uno = (time.perf_counter() - inicio) * 1000
+        inicio = time.perf_counter()
+        eliminadas = eliminar_transacciones_usuario(engine, ids[args.tamano:], USUARIO)
+        ms_lote = (time.perf_counter() - inicio) * 1000
+        assert eliminadas == len(ids[args.tamano:])
+        print(f"\nborrar {args.tamano}: una por una {ms_uno:.1f} ms, un solo DELETE {ms_lote:.1f} ms")
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
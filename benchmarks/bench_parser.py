@@ -0,0 +1,164 @@
+"""
+Benchmark y corpus de referencia del intérprete de textos de transacciones.
+
+Compara `TransactionTextParser.parse_many` contra la implementación original
+de `registrar_transaccion_desde_texto` (copiada abajo sin la parte de base de
+datos) sobre frases sintéticas, y verifica el corpus de referencia
+`benchmarks/corpus_parser.jsonl`, que fija el comportamiento actual.
+
+$ python -m benchmarks.bench_parser                  # 100k frases
+$ python -m benchmarks.bench_parser --verificar      # sólo el corpus
+"""
+import argparse
+import json
+import os
+import random
+import re
+import time
+import unicodedata
+from datetime import date, datetime
+
+from parser_transacciones import TransactionTextParser
+
+CORPUS = os.path.join(os.path.dirname(__file__), "corpus_parser.jsonl")
+HOY_CORPUS = date(2025, 7, 15)
+
+
+# ─── Implementación original (referencia) ────────────────────────────────
+def parse_legado(texto, hoy):
+    def normalizar(text):
+        return unicodedata.normalize("NFKD", text).encode("ASCII", "ignore").decode("utf-8").lower()
+
+    MESES_ESPANOL = {
+        "enero": "01", "febrero": "02", "marzo": "03", "abril": "04",
+        "mayo": "05", "junio": "06", "julio": "07", "agosto": "08",
+        "septiembre": "09", "octubre": "10", "noviembre": "11", "diciembre": "12"
+    }
+    texto_norm = normalizar(texto)
+    palabras_texto = set(texto_norm.split())
+    categorias = {
+        "necesidades": "Necesidades 🍎", "super": "Necesidades 🍎", "comida": "Necesidades 🍎",
+        "renta": "Necesidades 🍎", "medico": "Necesidades 🍎", "transporte": "Necesidades 🍎", "escuela": "Necesidades 🍎",
+        "gustos": "Gustos 🎁", "cine": "Gustos 🎁", "restaurante": "Gustos 🎁", "ropa": "Gustos 🎁", "viaje": "Gustos 🎁",
+        "metas financieras": "Metas financieras 💰", "ahorro": "Metas financieras 💰",
+        "nomina": "Ingresos 💵", "ingreso": "Ingresos 💵", "quincena": "Ingresos 💵", "salario": "Ingresos 💵"
+    }
+    categoria = None
+    for k, v in categorias.items():
+        if k in palabras_texto:
+            categoria = v
+            break
+    if not categoria:
+        categoria = "Gustos 🎁"
+    descripcion = categoria
+    match_desc = re.search(r"en ([a-zA-Záéíóúñ]+)", texto_norm)
+    if match_desc:
+        descripcion = match_desc.group(1).capitalize()
+    monto_match = re.search(r"(-?\$?\d+(?:[\.,]\d{1,2})?)", texto_norm)
+    monto = float(monto_match.group().replace("$", "").replace(",", "")) if monto_match else 0.0
+    palabras_egreso = ["gasto", "egreso", "pague", "pago", "compra", "retiro", "salida"]
+    palabras_ingreso = ["ingreso", "abono", "deposito", "bonificacion", "reembolso", "reintegro"]
+    if any(p in texto_norm for p in palabras_egreso):
+        monto = -abs(monto)
+    elif any(p in texto_norm for p in palabras_ingreso):
+        monto = abs(monto)
+    categorias_negativas = ["Necesidades 🍎", "Gustos 🎁", "Metas financieras 💰"]
+    if categoria in categorias_negativas and monto > 0:
+        monto = -abs(monto)
+    cuenta_match = re.search(r"(tarjeta|banorte|bbva|hsbc|efectivo|cash|card)", texto_norm)
+    cuenta = cuenta_match.group().capitalize() if cuenta_match else "General"
+    fecha = hoy
+    fecha_match = re.search(r"(\d{1,2}) de ([a-zA-Z]+)", texto_norm)
+    if fecha_match:
+        dia = int(fecha_match.group(1))
+        mes_num = MESES_ESPANOL.get(fecha_match.group(2))
+        if mes_num:
+            fecha = datetime.strptime(f"{hoy.year}-{mes_num}-{dia:02d}", "%Y-%m-%d").date()
+    return {"Fecha": fecha, "Descripcion": descripcion, "Categoria": categoria, "Cuenta": cuenta, "Monto": monto}
+
+
+# ─── Frases sintéticas ───────────────────────────────────────────────────
+VERBOS = ["gasté", "pagué", "compré", "compra de", "retiro", "recibí", "depósito de", "abono", "me llegó",
+          "reembolso", "ingreso", "gasto", ""]
+LUGARES = ["comida", "super", "cine", "restaurante", "ropa", "viaje", "renta", "médico", "transporte",
+           "escuela", "ahorro", "nómina", "quincena", "salario", "tacos", "gasolina", "netflix", "metas financieras"]
+CUENTAS = ["con tarjeta", "en efectivo", "con Banorte", "BBVA", "hsbc", "cash", "con card", ""]
+MESES = ["enero", "febrero", "marzo", "abril", "mayo", "junio", "julio", "agosto", "septiembre",
+         "octubre", "noviembre", "diciembre", "jul", "Sept"]
+
+
+def frases_sinteticas(n, semilla=7):
+    rnd = random.Random(semilla)
+    frases = []
+    for _ in range(n):
+        monto = rnd.choice([f"{rnd.randint(1, 20000)}", f"${rnd.randint(1, 999)}.{rnd.randint(0, 99):02d}",
+                            f"{rnd.randint(1, 99)},{rnd.randint(0, 99):02d}", f"-{rnd.randint(1, 500)}"])
+        fecha = rnd.choice(["", "", f"el {rnd.randint(1, 28)} de {rnd.choice(MESES)}", "ayer"])
+        partes = [rnd.choice(VERBOS), monto, "en", rnd.choice(LUGARES), rnd.choice(CUENTAS), fecha]
+        frases.append(" ".join(p for p in partes if p))
+    return frases
+
+
+# ─── Corpus de referencia ────────────────────────────────────────────────
+def _serializar(registro):
+    return {**registro, "Fecha": registro["Fecha"].isoformat()}
+
+
+def _resultado(funcion, texto):
+    try:
+        return _serializar(funcion(texto))
+    except ValueError as e:
+        return {"error": str(e)}
+
+
+def verificar_corpus(parser):
+    fallas = 0
+    with open(CORPUS, encoding="utf-8") as f:
+        casos = [json.loads(linea) for linea in f if linea.strip()]
+    for caso in casos:
+        hoy = date.fromisoformat(caso["hoy"])
+        obtenido = _resultado(lambda t: parser.parse(t, hoy), caso["texto"])
+        if obtenido != caso["esperado"]:
+            fallas += 1
+            print(f"✗ {caso['texto']!r}\n    esperado {caso['esperado']}\n    obtenido {obtenido}")
+    print(f"Corpus: {len(casos) - fallas}/{len(casos)} casos idénticos.")
+    return fallas == 0
+
+
+def main():
+    parser_args = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser_args.add_argument("--frases", type=int, default=100_000)
+    parser_args.add_argument("--verificar", action="store_true", help="Sólo verifica el corpus de referencia")
+    args = parser_args.parse_args()
+
+    parser = TransactionTextParser()
+    if not verificar_corpus(parser):
+        raise SystemExit(1)
+    if args.verificar:
+        return
+
+    frases = frases_sinteticas(args.frases)
+    hoy = HOY_CORPUS
+
+    inicio = time.perf_counter()
+    legado = [_resultado(lambda t: parse_legado(t, hoy), t) for t in frases]
+    t_legado = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    nuevos = parser.parse_many(frases, hoy, omitir_errores=True)
+    t_nuevo = time.perf_counter() - inicio
+
+    distintas = sum(
+        1 for a, b in zip(legado, nuevos)
+        if ("error" in a) != (b is None) or (b is not None and a != _serializar(b))
+    )
+    if distintas:
+        raise SystemExit(f"{distintas} frases sintéticas difieren de la implementación original")
+
+    print(f"{len(frases):,} frases sintéticas, resultados idénticos a la implementación original")
+    print(f"original:   {t_legado:6.2f} s  ({len(frases) / t_legado:>9,.0f} frases/s)")
+    print(f"parse_many: {t_nuevo:6.2f} s  ({len(frases) / t_nuevo:>9,.0f} frases/s)   {t_legado / t_nuevo:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Benchmark de `planeacion_metas.planear_metas` contra el reparto original con `iterrows`.
+
+Genera `--usuarios` usuarios sintéticos con 1 a `--metas` metas cada uno y un
+ahorro acumulado y una tasa mensual al azar, y mide:
+
+* legado: el ciclo de `get_recomendacion_asignacion` (copiado abajo), un
+  usuario a la vez, que sólo reparte el disponible;
+* vectorizado: `planear_metas` para todos los usuarios en una pasada, que
+  además calcula la aportación mensual y la fecha estimada de cada meta.
+
+Antes de medir verifica que el disponible asignado por meta sea el mismo.
+
+$ python -m benchmarks.bench_planeacion_metas
+$ python -m benchmarks.bench_planeacion_metas --usuarios 100000 --repeticiones 3
+"""
+import argparse
+import statistics
+import time
+
+import numpy as np
+import pandas as pd
+
+from planeacion_metas import planear_metas
+
+HOY = pd.Timestamp("2025-06-15")
+
+
+def generar(usuarios, max_metas, semilla=42):
+    rng = np.random.default_rng(semilla)
+    por_usuario = rng.integers(1, max_metas + 1, usuarios)
+    usuario = np.repeat([f"u{i}" for i in range(usuarios)], por_usuario)
+    n = len(usuario)
+    objetivo = np.round(rng.uniform(5_000, 200_000, n), -2)
+    metas = pd.DataFrame({
+        "id": np.arange(1, n + 1),
+        "usuario": usuario,
+        "nombre_meta": [f"Meta {i}" for i in range(n)],
+        "monto_objetivo": objetivo,
+        "monto_actual": np.round(objetivo * rng.uniform(0, 0.8, n), -2),
+        "plazo_meses": rng.integers(6, 120, n),
+        "fecha_creacion": (HOY.to_datetime64().astype("datetime64[D]") - rng.integers(0, 365, n)).astype(str),
+    })
+    asignado = metas.groupby("usuario")["monto_actual"].sum()
+    tasas = pd.DataFrame({
+        "tasa_mensual": np.round(rng.uniform(0, 8_000, usuarios), -1),
+        "ahorrado": asignado * rng.uniform(0.8, 1.5, usuarios),
+    }, index=asignado.index)
+    return metas, tasas
+
+
+# ─── Implementación original (referencia) ────────────────────────────────
+def legado_asignacion(df, total_ahorrado):
+    asignaciones = {}
+    disponible = total_ahorrado - df["monto_actual"].sum()
+    if disponible <= 0:
+        return asignaciones
+    for _, row in df.iterrows():
+        restante = row["monto_objetivo"] - row["monto_actual"]
+        sugerido = min(disponible, restante)
+        if sugerido > 0:
+            asignaciones[row["id"]] = sugerido
+            disponible -= sugerido
+        if disponible <= 0:
+            break
+    return asignaciones
+
+
+def legado(metas, tasas):
+    # El original ordenaba por plazo_meses; aquí por meses restantes para comparar lo mismo
+    resultado = {}
+    for usuario, df in metas.groupby("usuario", sort=False):
+        resultado.update(legado_asignacion(df.sort_values(["meses_restantes", "id"]), tasas.at[usuario, "ahorrado"]))
+    return resultado
+
+
+def medir(funcion, repeticiones):
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append(time.perf_counter() - inicio)
+    return statistics.median(tiempos) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--usuarios", type=int, default=10_000)
+    parser.add_argument("--metas", type=int, default=5, help="Máximo de metas por usuario")
+    parser.add_argument("--repeticiones", type=int, default=5)
+    args = parser.parse_args()
+
+    metas, tasas = generar(args.usuarios, args.metas)
+    plan = planear_metas(metas, tasas, HOY)
+    referencia = legado(plan[metas.columns.tolist() + ["meses_restantes"]], tasas)
+    vectorizado = plan.set_index("id")["asignar_ahora"]
+    vectorizado = vectorizado[vectorizado > 0]
+    assert set(referencia) == set(vectorizado.index), "Las metas con asignación no coinciden"
+    assert np.allclose([referencia[i] for i in vectorizado.index], vectorizado.to_numpy()), "Los montos no coinciden"
+
+    base = plan[metas.columns.tolist() + ["meses_restantes"]]
+    ms_legado = medir(lambda: legado(base, tasas), args.repeticiones)
+    ms_vectorizado = medir(lambda: planear_metas(metas, tasas, HOY), args.repeticiones)
+    print(f"{args.usuarios:,} usuarios, {len(metas):,} metas, {int(plan['a_tiempo'].sum()):,} a tiempo\n")
+    print(f"{'versión':<14}{'ms':>10}{'µs/usuario':>12}")
+    for nombre, ms in (("legado", ms_legado), ("vectorizado", ms_vectorizado)):
+        print(f"{nombre:<14}{ms:>10.1f}{ms * 1000 / args.usuarios:>12.2f}")
+    print(f"\n{ms_legado / ms_vectorizado:.0f}x más rápido")
+
+
+if __name__ == "__main__":
+    main()
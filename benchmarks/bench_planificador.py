@@ -0,0 +1,90 @@
+"""
+Benchmark del agente planificador/ejecutor frente al agente ReAct.
+
+Pregunta de varias partes ("¿Cómo voy este mes?") que necesita cuatro
+herramientas. El agente ReAct las pide una por una (4 + 1 llamadas al LLM); el
+planificador pide el plan, corre las cuatro en paralelo y resume (2 llamadas).
+El LLM es el modelo falso de `llm_local.py` con `--latencia-llm` segundos por
+llamada, y cada herramienta espera `--latencia-herramienta` segundos extra
+para simular una base remota. Ambas respuestas usan los mismos datos.
+
+$ python -m benchmarks.bench_planificador
+$ python -m benchmarks.bench_planificador --latencia-llm 2 --latencia-herramienta 0.5
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import time
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-bench")
+
+import streamlit as st  # noqa: E402
+from langchain_core.callbacks import BaseCallbackHandler  # noqa: E402
+
+from agente import HERRAMIENTAS, crear_agente  # noqa: E402
+from db import get_engine  # noqa: E402
+from llm_local import ChatLocalStreaming  # noqa: E402
+from planificador import AgentePlanificador  # noqa: E402
+from utils import cargar_transacciones_usuario  # noqa: E402
+
+PREGUNTA = "¿Cómo voy este mes?"
+CONSULTAS = ["Gasto total", "Ingreso total", "Ranking gastos por categoría", "Proyección de saldo fin de mes"]
+FINAL = "Final Answer: Vas bien: tus ingresos cubren tus gastos y el saldo proyectado es positivo."
+
+
+class ContadorLLM(BaseCallbackHandler):
+    def __init__(self):
+        self.llamadas = 0
+
+    def on_chat_model_start(self, *args, **kwargs):
+        self.llamadas += 1
+
+
+def herramientas_lentas(segundos):
+    def lenta(funcion):
+        def envolver(entrada, usuario):
+            time.sleep(segundos)
+            return funcion(entrada, usuario)
+        return envolver
+    return [(nombre, descripcion, lenta(funcion)) for nombre, descripcion, funcion in HERRAMIENTAS]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--usuario", default="usuario1")
+    parser.add_argument("--latencia-llm", type=float, default=1.0, help="Segundos por llamada al LLM")
+    parser.add_argument("--latencia-herramienta", type=float, default=0.3, help="Segundos extra por herramienta")
+    args = parser.parse_args()
+    st.session_state.transacciones = cargar_transacciones_usuario(get_engine(), args.usuario)
+    herramientas = herramientas_lentas(args.latencia_herramienta)
+
+    guion_react = [f"Consulto {h}.\nAction: {h}\nAction Input: " for h in CONSULTAS] + [f"Ya tengo todo.\n{FINAL}"]
+    react = crear_agente(args.usuario, herramientas=herramientas,
+                         llm=ChatLocalStreaming(respuestas=guion_react, latencia_inicial=args.latencia_llm))
+    plan = json.dumps([{"herramienta": h, "entrada": ""} for h in CONSULTAS], ensure_ascii=False)
+    planificador = AgentePlanificador(
+        args.usuario, ChatLocalStreaming(respuestas=[plan, FINAL], latencia_inicial=args.latencia_llm),
+        herramientas=herramientas)
+
+    print(f"{'agente':<14}{'llamadas LLM':>14}{'segundos':>10}")
+    resultados = {}
+    for nombre, agente in (("ReAct", react), ("planificador", planificador)):
+        contador = ContadorLLM()
+        inicio = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            resultados[nombre] = agente.run(PREGUNTA, callbacks=[contador])
+        print(f"{nombre:<14}{contador.llamadas:>14}{time.perf_counter() - inicio:>10.2f}")
+
+    inicio = time.perf_counter()
+    planificador.ejecutar([(h, "") for h in CONSULTAS])
+    paralelo = time.perf_counter() - inicio
+    print(f"\nherramientas: {len(CONSULTAS) * args.latencia_herramienta:.2f} s en serie (ReAct) vs "
+          f"{paralelo:.2f} s en paralelo")
+    if len(set(resultados.values())) != 1:
+        raise SystemExit(f"Las respuestas difieren: {resultados}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""
+Benchmark del almacén local de precios contra la descarga completa en cada uso.
+
+Sin red: graba fixtures sintéticos (caminata aleatoria de `--anios` años por
+ticker) y los sirve con `precios.DescargadorFixtures`, con `--latencia`
+segundos por descarga para simular a Yahoo. Escenario: `--usos` consultas por
+ticker (simulaciones y teclas en la página de acciones). Entre la mitad y el
+final se agregan barras nuevas al fixture y vence el TTL, para medir la
+descarga incremental. Al final lee todo en modo offline y comprueba que un
+split 2:1 en las barras nuevas reemplaza la historia guardada por la ajustada.
+
+$ python -m benchmarks.bench_precios
+$ python -m benchmarks.bench_precios --tickers 8 --usos 50 --latencia 1.0
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import create_engine
+
+from migraciones import aplicar_migraciones
+from precios import COLUMNAS, AlmacenPrecios, DescargadorFixtures
+
+
+def historia_sintetica(dias, semilla, fin):
+    rng = np.random.default_rng(semilla)
+    cierre = 100 * np.exp(np.cumsum(rng.normal(0.0003, 0.01, dias)))
+    fechas = pd.bdate_range(end=fin, periods=dias, name="Date")
+    return pd.DataFrame({"Open": cierre, "High": cierre * 1.01, "Low": cierre * 0.99, "Close": cierre,
+                         "Volume": rng.integers(1e5, 1e6, dias).astype(float)}, index=fechas)[COLUMNAS]
+
+
+class DescargadorLento(DescargadorFixtures):
+    """Fixtures con latencia de red simulada (una por petición); cuenta descargas y barras."""
+
+    def __init__(self, directorio, latencia):
+        super().__init__(directorio)
+        self.latencia = latencia
+        self.descargas = 0
+        self.barras = 0
+
+    def historial(self, ticker, inicio=None):
+        time.sleep(self.latencia)
+        hist = super().historial(ticker, inicio)
+        self.descargas += 1
+        self.barras += len(hist)
+        return hist
+
+    def historiales(self, tickers, inicio=None):
+        # Una sola petición masiva para todos, como yf.download
+        time.sleep(self.latencia)
+        historias = {t: DescargadorFixtures.historial(self, t, inicio) for t in tickers}
+        self.descargas += 1
+        self.barras += sum(map(len, historias.values()))
+        return historias
+
+
+def verificar_split(tmp, anios):
+    """Un split en el incremento debe dejar guardada la historia reajustada, sin escalón."""
+    directorio = os.path.join(tmp, "split")
+    os.makedirs(directorio)
+    hist = historia_sintetica(anios * 252, 99, pd.Timestamp.today().normalize())
+    hist.iloc[:-5].to_csv(os.path.join(directorio, "SPLIT.csv"))
+    engine = create_engine(f"sqlite:///{os.path.join(tmp, 'split.db')}")
+    aplicar_migraciones(engine)
+    almacen = AlmacenPrecios(engine, DescargadorFixtures(directorio), ttl=0)
+    almacen.historial("SPLIT")
+    # Split 2:1 en la penúltima barra: Yahoo divide entre 2 todos los precios anteriores
+    ajustada = hist.copy()
+    ajustada[["Open", "High", "Low", "Close"]] = ajustada[["Open", "High", "Low", "Close"]].to_numpy() / 2
+    ajustada.iloc[-2:, :4] *= 2
+    ajustada["Stock Splits"] = 0.0
+    ajustada.iloc[-2, ajustada.columns.get_loc("Stock Splits")] = 2.0
+    ajustada.to_csv(os.path.join(directorio, "SPLIT.csv"))
+    guardada = almacen.historial("SPLIT")
+    engine.dispose()
+    assert almacen.estadisticas["reajustes"] == 1, "El split no provocó la descarga completa"
+    assert np.allclose(guardada["Close"].to_numpy(), ajustada["Close"].to_numpy()), "Quedó un escalón en la historia"
+    return len(guardada)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--tickers", type=int, default=4)
+    parser.add_argument("--usos", type=int, default=20, help="Consultas por ticker")
+    parser.add_argument("--anios", type=int, default=15)
+    parser.add_argument("--latencia", type=float, default=0.3, help="Segundos por descarga simulada")
+    args = parser.parse_args()
+    tickers = [f"FONDO{i}" for i in range(args.tickers)]
+    hoy = pd.Timestamp.today().normalize()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        fixtures = os.path.join(tmp, "fixtures")
+        os.makedirs(fixtures)
+        # La historia completa tiene 10 barras más que el fixture inicial
+        historias = {t: historia_sintetica(args.anios * 252 + 10, i, hoy) for i, t in enumerate(tickers)}
+        for t, hist in historias.items():
+            hist.iloc[:-10].to_csv(os.path.join(fixtures, f"{t}.csv"))
+
+        # Antes: cada uso descarga la historia completa
+        legado = DescargadorLento(fixtures, args.latencia)
+        inicio = time.perf_counter()
+        for _ in range(args.usos):
+            for t in tickers:
+                legado.historial(t)
+        t_legado = time.perf_counter() - inicio
+
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'precios.db')}")
+        aplicar_migraciones(engine)
+        descargador = DescargadorLento(fixtures, args.latencia)
+        almacen = AlmacenPrecios(engine, descargador, ttl=3600)
+        inicio = time.perf_counter()
+        for uso in range(args.usos):
+            if uso == args.usos // 2:
+                # Llegan 10 barras nuevas y vence el TTL: sólo se descargan las nuevas
+                for t, hist in historias.items():
+                    hist.to_csv(os.path.join(fixtures, f"{t}.csv"))
+                almacen.ttl = 0
+            for t in tickers:
+                hist = almacen.historial(t)
+            almacen.ttl = 3600
+        t_almacen = time.perf_counter() - inicio
+
+        offline = AlmacenPrecios(engine, DescargadorLento(fixtures, args.latencia), offline=True)
+        inicio = time.perf_counter()
+        completas = all(len(offline.historial(t)) == args.anios * 252 + 10 for t in tickers)
+        t_offline = time.perf_counter() - inicio
+        engine.dispose()
+        barras_split = verificar_split(tmp, args.anios)
+
+    consultas = args.usos * len(tickers)
+    print(f"{'modo':<26}{'descargas':>10}{'barras':>12}{'segundos':>10}{'ms/consulta':>13}")
+    print(f"{'descarga completa':<26}{legado.descargas:>10,}{legado.barras:>12,}{t_legado:>10.2f}"
+          f"{t_legado * 1000 / consultas:>13.1f}")
+    print(f"{'almacén incremental':<26}{descargador.descargas:>10,}{descargador.barras:>12,}{t_almacen:>10.2f}"
+          f"{t_almacen * 1000 / consultas:>13.1f}")
+    print(f"{'offline (sin descargas)':<26}{0:>10}{0:>12}{t_offline:>10.2f}{t_offline * 1000 / len(tickers):>13.1f}")
+    print(f"\núltima lectura: {len(hist):,} barras; offline completo: {'sí' if completas else 'NO'}")
+    print(f"split en el incremento: historia completa reajustada ({barras_split:,} barras)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Benchmark de la simulación de fondos: uno por uno, en lote y precalculada.
+
+Sin red: los precios salen de fixtures sintéticos (`bench_precios`) con
+`--latencia` segundos por petición a "Yahoo", sobre un almacén vacío en una
+base temporal. Compara:
+
+* uno por uno: `forecast_yf_ticker` por ticker, como hacía la página
+  (una descarga y un ajuste de Prophet detrás de otro);
+* lote: `pronosticar_tickers` sin pronósticos guardados: una descarga masiva
+  y los ajustes en el pool de procesos (sólo Prophet); se mide también
+  cuándo llega el primer resultado (la primera tarjeta);
+* precalculado: `pronosticar_tickers` con lo que dejó el lote en la tabla
+  `pronosticos`, como después del trabajo nocturno.
+
+El lote corre dos veces: la primera incluye arrancar el pool (cada proceso
+importa Prophet); la segunda lo encuentra caliente, como en la app.
+
+$ python -m benchmarks.bench_pronosticos                      # modelo "deriva"
+$ python -m benchmarks.bench_pronosticos --modelo prophet --tickers 6 --procesos 4
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import pandas as pd
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--tickers", type=int, default=4)
+    parser.add_argument("--anios", type=int, default=10, help="Años de historia por ticker")
+    parser.add_argument("--horizonte", type=int, default=10, help="Años a proyectar")
+    parser.add_argument("--latencia", type=float, default=0.5, help="Segundos por petición simulada")
+    parser.add_argument("--procesos", type=int, default=None, help="Tamaño del pool (default: núcleos)")
+    parser.add_argument("--modelo", default="deriva", help="Modelo de pronosticos.MODELOS")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # pronosticos lee BILLIE_PRONOSTICO_* y db.py BILLIE_DB_URL al importarse
+        os.environ["BILLIE_DB_URL"] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        os.environ["BILLIE_PRONOSTICO_MODELO"] = args.modelo
+        if args.procesos:
+            os.environ["BILLIE_PRONOSTICO_PROCESOS"] = str(args.procesos)
+
+        from sqlalchemy import text
+
+        from benchmarks.bench_precios import DescargadorLento, historia_sintetica
+        from db import get_engine
+        from migraciones import aplicar_migraciones
+        from precios import obtener_almacen
+        from pronosticos import MODELOS_EN_POOL, PROCESOS, pronosticar_tickers
+        from utils import forecast_yf_ticker
+
+        fixtures = os.path.join(tmp, "fixtures")
+        os.makedirs(fixtures)
+        tickers = [f"FONDO{i}" for i in range(args.tickers)]
+        for i, ticker in enumerate(tickers):
+            historia_sintetica(args.anios * 252, i, pd.Timestamp.today().normalize()).to_csv(
+                os.path.join(fixtures, f"{ticker}.csv"))
+
+        engine = get_engine()
+        aplicar_migraciones(engine)
+        almacen = obtener_almacen()
+
+        def vaciar(pronosticos=True):
+            with engine.begin() as conn:
+                conn.execute(text("DELETE FROM precios"))
+                conn.execute(text("DELETE FROM precios_tickers"))
+                if pronosticos:
+                    conn.execute(text("DELETE FROM pronosticos"))
+            almacen.descargador = DescargadorLento(fixtures, args.latencia)
+
+        vaciar()
+        inicio = time.perf_counter()
+        primero = None
+        uno_a_uno = []
+        for ticker in tickers:
+            uno_a_uno.append(forecast_yf_ticker(ticker, 10_000, args.horizonte)[1])
+            primero = primero or time.perf_counter() - inicio
+        filas = [("uno por uno", almacen.descargador.descargas, primero, time.perf_counter() - inicio)]
+
+        modos = ["lote (pool frío)", "lote (pool caliente)"] if args.modelo in MODELOS_EN_POOL else ["lote"]
+        for nombre in modos + ["precalculado"]:
+            if nombre == "precalculado":
+                almacen.descargador = DescargadorLento(fixtures, args.latencia)
+            else:
+                vaciar()
+            inicio = time.perf_counter()
+            primero = None
+            lote = [None] * len(tickers)
+            for i, resultado in pronosticar_tickers(tickers, 10_000, args.horizonte):
+                lote[i] = resultado[1]
+                primero = primero or time.perf_counter() - inicio
+            filas.append((nombre, almacen.descargador.descargas, primero, time.perf_counter() - inicio))
+        engine.dispose()
+
+    print(f"{len(tickers)} tickers, {args.anios} años de historia, modelo {args.modelo}, "
+          f"pool de {PROCESOS} procesos ({os.cpu_count()} núcleos)\n")
+    print(f"{'modo':<24}{'descargas':>10}{'1er resultado ms':>18}{'total ms':>11}")
+    for nombre, descargas, primero, total in filas:
+        print(f"{nombre:<24}{descargas:>10}{primero * 1000:>18.1f}{total * 1000:>11.1f}")
+    iguales = all(abs(a - b) < 1e-9 for a, b in zip(uno_a_uno, lote))
+    print(f"\nmismos CAGR en ambos modos: {'sí' if iguales else 'NO'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+Benchmark de la caché de transacciones de la sesión: recarga completa vs escritura directa.
+
+Genera una base SQLite temporal con un usuario de `--filas` transacciones,
+carga la sesión y construye las métricas del dashboard (totales, por mes,
+por categoría, por día). Luego mide `--repeticiones` altas y bajas:
+
+* recarga: escribir y volver a leer todo el historial (lo que hacía
+  page_tu_dinero.py), reconstruyendo las métricas;
+* directa: `guardar_en_sesion` / `eliminar_en_sesion`, que ajustan la sesión y
+  las métricas en memoria;
+* delta: una alta hecha por fuera (como el agente) y `sincronizar_sesion`;
+* rerun sin cambios: `sincronizar_sesion` cuando la versión no cambió.
+
+Al final compara las métricas de la sesión con las de una recarga completa.
+
+$ python -m benchmarks.bench_sesion_transacciones
+$ python -m benchmarks.bench_sesion_transacciones --filas 1000000
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+from datetime import date
+
+import numpy as np
+import streamlit as st
+from sqlalchemy import create_engine, text
+
+from analitica import AnalyticsFrame, obtener_analitica
+from benchmarks.bench_esquema import poblar_legado
+from migraciones import aplicar_migraciones
+from sesion_transacciones import eliminar_en_sesion, guardar_en_sesion, sincronizar_sesion
+from utils import (cargar_transacciones_usuario, eliminar_transaccion_usuario,
+                   guardar_transaccion_usuario)
+
+USUARIO = "usuario0"
+METRICAS = ("balance", "total_gastos", "total_ingresos", "por_mes", "por_categoria", "por_dia", "gastos_por_categoria")
+
+
+def metricas():
+    af = obtener_analitica(USUARIO)
+    return [getattr(af, nombre) for nombre in METRICAS]
+
+
+def alta(engine, funcion, i):
+    return funcion(engine, date(2025, 1, 1 + i % 28), "Gustos 🎁", "Tarjeta", -(i + 0.5), USUARIO, f"Bench {i}")
+
+
+def medir(pasos):
+    tiempos = []
+    for paso in pasos:
+        inicio = time.perf_counter()
+        paso()
+        tiempos.append(time.perf_counter() - inicio)
+    return statistics.median(tiempos) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--filas", type=int, default=100_000)
+    parser.add_argument("--repeticiones", type=int, default=10)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        poblar_legado(path, args.filas)
+        engine = create_engine(f"sqlite:///{path}")
+        with engine.begin() as conn:
+            conn.execute(text("UPDATE transacciones SET Usuario = :u"), {"u": USUARIO})
+        aplicar_migraciones(engine)
+
+        sincronizar_sesion(engine, USUARIO)
+        metricas()
+        n = args.repeticiones
+        ids_recarga = []
+
+        def recarga_alta(i):
+            fila = alta(engine, guardar_transaccion_usuario, i)
+            ids_recarga.append(fila.ID)
+            st.session_state.transacciones = cargar_transacciones_usuario(engine, USUARIO)
+            metricas()
+
+        def recarga_baja(i):
+            eliminar_transaccion_usuario(engine, ids_recarga[i], USUARIO)
+            st.session_state.transacciones = cargar_transacciones_usuario(engine, USUARIO)
+            metricas()
+
+        ms = {"recarga alta": medir(lambda i=i: recarga_alta(i) for i in range(n))}
+        ms["recarga baja"] = medir(lambda i=i: recarga_baja(i) for i in range(n))
+        sincronizar_sesion(engine, USUARIO)
+        metricas()
+
+        ids_directa = []
+
+        def directa_alta(i):
+            ids_directa.append(alta(engine, guardar_en_sesion, n + i).ID)
+            metricas()
+
+        def directa_baja(i):
+            eliminar_en_sesion(engine, [ids_directa[i]], USUARIO)
+            metricas()
+
+        def delta(i):
+            alta(engine, guardar_transaccion_usuario, 2 * n + i)
+            sincronizar_sesion(engine, USUARIO)
+            metricas()
+
+        ms["directa alta"] = medir(lambda i=i: directa_alta(i) for i in range(n))
+        ms["directa baja"] = medir(lambda i=i: directa_baja(i) for i in range(n))
+        ms["delta externo"] = medir(lambda i=i: delta(i) for i in range(n))
+        ms["rerun sin cambios"] = medir(lambda: (sincronizar_sesion(engine, USUARIO), metricas()) for _ in range(n))
+
+        # Las métricas ajustadas en memoria deben coincidir con las de una recarga completa
+        sesion = metricas()
+        fresco = AnalyticsFrame(cargar_transacciones_usuario(engine, USUARIO), USUARIO)
+        for nombre, valor in zip(METRICAS, sesion):
+            esperado = getattr(fresco, nombre)
+            if np.isscalar(esperado):
+                assert np.isclose(valor, esperado), nombre
+            else:
+                assert list(valor.index) == list(esperado.index), nombre
+                assert np.allclose(valor.to_numpy(dtype=float), esperado.to_numpy(dtype=float)), nombre
+        assert len(st.session_state.transacciones) == len(fresco.df)
+        engine.dispose()
+
+    print(f"{args.filas:,} transacciones, mediana de {n} operaciones (escritura + métricas)\n")
+    for nombre, valor in ms.items():
+        print(f"{nombre:<20}{valor:>10.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
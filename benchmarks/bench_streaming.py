@@ -0,0 +1,76 @@
+"""
+Benchmark de latencia percibida: respuesta bloqueante contra transmisión.
+
+Corre el agente de `agente.py` con el modelo falso de `llm_local.py`
+(latencia hasta el primer token y retardo entre tokens configurables) en tres
+guiones: respuesta directa, una herramienta y dos herramientas. Con
+`agent.run` bloqueante el usuario no ve nada hasta el final; con
+`flujo_tokens.transmitir` ve el primer paso y después la respuesta token por
+token.
+
+$ python -m benchmarks.bench_streaming
+$ python -m benchmarks.bench_streaming --latencia-inicial 1.5 --retardo-token 0.05
+"""
+import argparse
+import contextlib
+import io
+import os
+import time
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-bench")
+
+import streamlit as st  # noqa: E402
+
+from agente import crear_agente  # noqa: E402
+from db import get_engine  # noqa: E402
+from flujo_tokens import transmitir  # noqa: E402
+from llm_local import ChatLocalStreaming  # noqa: E402
+from utils import cargar_transacciones_usuario  # noqa: E402
+
+RESPUESTA = ("Final Answer: Este mes llevas un gasto moderado. Tus necesidades están cubiertas, "
+             "pero los gustos crecieron; si los reduces un 20% podrías ahorrar más para tus metas.")
+GUIONES = {
+    "directa": [f"Puedo responder sin herramientas.\n{RESPUESTA}"],
+    "1 herramienta": ["Necesito el gasto.\nAction: Gasto total\nAction Input: ", f"Ya lo tengo.\n{RESPUESTA}"],
+    "2 herramientas": ["Necesito el gasto.\nAction: Gasto total\nAction Input: ",
+                       "Ahora el ingreso.\nAction: Ingreso total\nAction Input: ", f"Ya lo tengo.\n{RESPUESTA}"],
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--usuario", default="usuario1")
+    parser.add_argument("--latencia-inicial", type=float, default=0.8, help="Segundos hasta el primer token")
+    parser.add_argument("--retardo-token", type=float, default=0.03, help="Segundos entre tokens")
+    args = parser.parse_args()
+    st.session_state.transacciones = cargar_transacciones_usuario(get_engine(), args.usuario)
+
+    def agente(guion):
+        llm = ChatLocalStreaming(respuestas=guion, latencia_inicial=args.latencia_inicial,
+                                 retardo_token=args.retardo_token)
+        return crear_agente(args.usuario, llm=llm)
+
+    print(f"{'guion':<16}{'bloqueante s':>14}{'primer paso s':>15}{'primer token s':>16}{'total s':>9}")
+    for nombre, guion in GUIONES.items():
+        with contextlib.redirect_stdout(io.StringIO()):
+            inicio = time.perf_counter()
+            bloqueante = agente(guion).run("¿Cómo voy este mes?")
+            t_bloqueante = time.perf_counter() - inicio
+
+            marcas = {}
+            ag = agente(guion)
+            inicio = time.perf_counter()
+            tokens = []
+            for token in transmitir(lambda cb: ag.run("¿Cómo voy este mes?", callbacks=cb),
+                                    al_paso=lambda _: marcas.setdefault("paso", time.perf_counter() - inicio)):
+                marcas.setdefault("token", time.perf_counter() - inicio)
+                tokens.append(token)
+            t_total = time.perf_counter() - inicio
+        if "".join(tokens) != bloqueante:
+            raise SystemExit(f"{nombre}: la respuesta transmitida difiere de la bloqueante")
+        paso = f"{marcas['paso']:.2f}" if "paso" in marcas else "-"
+        print(f"{nombre:<16}{t_bloqueante:>14.2f}{paso:>15}{marcas['token']:>16.2f}{t_total:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
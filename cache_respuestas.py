@@ -0,0 +1,182 @@
+"""
+cache_respuestas.py – Caché de respuestas de Billie
+==================================================
+Los usuarios repiten las mismas preguntas y cada `agent.run` es una cadena
+completa de llamadas a GPT-4. `CacheRespuestas` guarda la respuesta por
+(usuario, versión de sus datos, pregunta normalizada) en dos niveles:
+
+* exacto: la misma pregunta tras quitar acentos, signos y mayúsculas;
+* equivalente: otra pregunta del mismo usuario y versión con exactamente las
+  mismas palabras una vez quitadas las de relleno ("oye billie, ¿cuál es mi
+  balance actual?" = "cual es mi balance actual"). Una palabra de más o de
+  menos ya es otra pregunta: "uber" no reutiliza "uber eats" ni "cine" a
+  "cines", y "gasté 200" nunca reutiliza "gasté 300".
+
+La versión sale de `versiones.version_datos`, que sube con cada alta, baja o
+importación de transacciones y con cada cambio en metas, así que una respuesta
+nunca sobrevive a un cambio en los datos del usuario. `obtener_o_calcular`
+agrega la fecha del día a la versión: las respuestas que dependen de hoy
+("Proyección de saldo fin de mes", "Alerta gasto excesivo", "este mes") no
+pasan de un día al siguiente. Además las entradas caducan tras `ttl` segundos y,
+al llenarse, se descarta la usada hace más tiempo.
+Si la propia respuesta modificó los datos (p. ej. registró un gasto) no se guarda.
+
+$ python -m benchmarks.bench_cache_respuestas
+"""
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from datetime import date
+
+from db import get_engine
+from parser_transacciones import normalizar
+from versiones import version_datos
+
+CAPACIDAD = int(os.getenv("BILLIE_CACHE_CAPACIDAD", "512"))
+TTL = float(os.getenv("BILLIE_CACHE_TTL", "3600"))
+
+# Palabras de relleno que no cambian la pregunta; sólo se ignoran en el nivel equivalente
+RELLENO = {"a", "al", "de", "del", "el", "la", "las", "lo", "los", "un", "una", "mi", "mis",
+           "me", "por", "favor", "porfa", "oye", "billie", "y"}
+
+
+def normalizar_pregunta(pregunta):
+    return " ".join(re.findall(r"[a-z0-9]+", normalizar(pregunta)))
+
+
+def _palabras(pregunta_norm):
+    # Conjunto de palabras sin relleno: el orden y las repeticiones no cambian la pregunta
+    return frozenset(p for p in pregunta_norm.split() if p not in RELLENO)
+
+
+class CacheRespuestas:
+    def __init__(self, capacidad=CAPACIDAD, ttl=TTL, engine=None):
+        self.capacidad = capacidad
+        self.ttl = ttl
+        self.engine = engine
+        # (usuario, versión, pregunta normalizada) -> entrada; el orden es el de uso (LRU)
+        self._entradas = OrderedDict()
+        # usuario -> (versión, {preguntas}) para el nivel equivalente y la invalidación
+        self._por_usuario = {}
+        self._lock = threading.Lock()
+        self.contadores = {
+            "consultas": 0, "aciertos_exactos": 0, "aciertos_equivalentes": 0,
+            "fallos": 0, "segundos_ahorrados": 0.0,
+        }
+
+    # ─── Niveles ─────────────────────────────────────────────────────────
+    def buscar(self, usuario, version, pregunta):
+        """Respuesta guardada para la pregunta (o una con las mismas palabras) o None."""
+        pregunta_norm = normalizar_pregunta(pregunta)
+        ahora = time.monotonic()
+        with self._lock:
+            self.contadores["consultas"] += 1
+            if self._por_usuario.get(usuario, (version,))[0] != version:
+                self._invalidar(usuario)
+            llave = (usuario, version, pregunta_norm)
+            entrada = self._vigente(llave, ahora)
+            nivel = "aciertos_exactos"
+            if entrada is None:
+                llave = self._equivalente(usuario, version, pregunta_norm, ahora)
+                entrada = self._entradas[llave] if llave else None
+                nivel = "aciertos_equivalentes"
+            if entrada is None:
+                self.contadores["fallos"] += 1
+                return None
+            self._entradas.move_to_end(llave)
+            self.contadores[nivel] += 1
+            self.contadores["segundos_ahorrados"] += entrada["segundos"]
+            return entrada["respuesta"]
+
+    def _vigente(self, llave, ahora):
+        entrada = self._entradas.get(llave)
+        if entrada is not None and ahora - entrada["creada"] > self.ttl:
+            self._quitar(llave)
+            return None
+        return entrada
+
+    def _equivalente(self, usuario, version, pregunta_norm, ahora):
+        version_guardada, preguntas = self._por_usuario.get(usuario, (None, ()))
+        if version_guardada != version:
+            return None
+        palabras = _palabras(pregunta_norm)
+        if not palabras:
+            return None
+        for otra in list(preguntas):
+            llave = (usuario, version, otra)
+            entrada = self._vigente(llave, ahora)
+            if entrada is not None and entrada["palabras"] == palabras:
+                return llave
+        return None
+
+    def guardar(self, usuario, version, pregunta, respuesta, segundos=0.0):
+        pregunta_norm = normalizar_pregunta(pregunta)
+        with self._lock:
+            version_guardada, preguntas = self._por_usuario.get(usuario, (None, set()))
+            if version_guardada != version:
+                # Los datos del usuario cambiaron: todo lo anterior ya no vale
+                self._invalidar(usuario)
+                preguntas = set()
+                self._por_usuario[usuario] = (version, preguntas)
+            llave = (usuario, version, pregunta_norm)
+            self._entradas[llave] = {
+                "respuesta": respuesta, "creada": time.monotonic(), "segundos": segundos,
+                "palabras": _palabras(pregunta_norm),
+            }
+            self._entradas.move_to_end(llave)
+            preguntas.add(pregunta_norm)
+            while len(self._entradas) > self.capacidad:
+                self._quitar(next(iter(self._entradas)))
+
+    def _quitar(self, llave):
+        del self._entradas[llave]
+        usuario, version, pregunta_norm = llave
+        version_guardada, preguntas = self._por_usuario.get(usuario, (None, set()))
+        if version_guardada == version:
+            preguntas.discard(pregunta_norm)
+
+    def _invalidar(self, usuario):
+        version, preguntas = self._por_usuario.pop(usuario, (None, set()))
+        for pregunta_norm in preguntas:
+            self._entradas.pop((usuario, version, pregunta_norm), None)
+
+    def invalidar(self, usuario):
+        with self._lock:
+            self._invalidar(usuario)
+
+    # ─── Uso desde las páginas ───────────────────────────────────────────
+    def _version(self, usuario):
+        if not usuario:
+            return 0  # preguntas generales, sin datos de usuario
+        with (self.engine or get_engine()).connect() as conn:
+            return version_datos(conn, usuario)
+
+    def obtener_o_calcular(self, usuario, pregunta, calcular):
+        """Respuesta en caché o `calcular()`, que se guarda si no cambió los datos."""
+        # Con la fecha, lo calculado ayer no responde las preguntas de hoy
+        version = (self._version(usuario), date.today().isoformat())
+        respuesta = self.buscar(usuario, version, pregunta)
+        if respuesta is not None:
+            return respuesta
+        inicio = time.perf_counter()
+        respuesta = calcular()
+        segundos = time.perf_counter() - inicio
+        if respuesta and self._version(usuario) == version[0]:
+            self.guardar(usuario, version, pregunta, respuesta, segundos)
+        return respuesta
+
+    def estadisticas(self):
+        with self._lock:
+            datos = dict(self.contadores, entradas=len(self._entradas))
+        aciertos = datos["aciertos_exactos"] + datos["aciertos_equivalentes"]
+        datos["tasa_aciertos"] = aciertos / datos["consultas"] if datos["consultas"] else 0.0
+        return datos
+
+
+CACHE = CacheRespuestas()
+
+
+def responder_con_cache(usuario, pregunta, calcular):
+    return CACHE.obtener_o_calcular(usuario, pregunta, calcular)
@@ -0,0 +1,226 @@
+"""
+enrutador.py – Respuestas directas a las preguntas frecuentes de Billie
+======================================================================
+Los botones del tablero mandan siempre la misma frase al agente, que gasta
+varias vueltas de GPT-4 (elegir herramienta, leer el resultado, redactar) para
+terminar llamando una sola función de `utils.py`. `EnrutadorIntenciones`
+reconoce esas frases por coincidencia exacta y las preguntas libres parecidas
+con un clasificador local (vecino más cercano sobre raíces de palabras con
+peso IDF), y llama directamente la herramienta de `agente.HERRAMIENTAS`. Si la
+confianza es baja, o falta un dato (p. ej. la categoría), la pregunta va al
+agente como siempre.
+
+Sólo se enrutan herramientas de consulta: registrar movimientos sigue pasando
+por el agente.
+
+$ python -m benchmarks.bench_enrutador
+"""
+import math
+import re
+import threading
+import time
+
+from agente import HERRAMIENTAS, ejecutar_herramienta, obtener_asistente
+from parser_transacciones import normalizar
+
+# Confianza mínima (similitud coseno) y ventaja mínima sobre la segunda intención
+UMBRAL_CONFIANZA = 0.7
+MARGEN_CONFIANZA = 0.1
+
+CATEGORIAS_GASTO = {
+    "necesidad": "necesidades", "necesidades": "necesidades",
+    "gusto": "gustos", "gustos": "gustos",
+    "meta": "metas financieras", "metas": "metas financieras", "financieras": "metas financieras",
+}
+PERIODOS = {
+    "dia": "diario", "dias": "diario", "diario": "diario", "diaria": "diario",
+    "semana": "semanal", "semanas": "semanal", "semanal": "semanal",
+    "mes": "mensual", "meses": "mensual", "mensual": "mensual",
+}
+
+
+def _categoria(tokens):
+    for token in tokens:
+        if token in CATEGORIAS_GASTO:
+            return CATEGORIAS_GASTO[token]
+    return None
+
+
+def _periodo(tokens):
+    for token in tokens:
+        if token in PERIODOS:
+            return PERIODOS[token]
+    return "mensual"
+
+
+# (intención, herramienta, entrada, ejemplos). La entrada es un texto fijo o una
+# función de los tokens de la pregunta; si devuelve None la pregunta va al agente.
+# El primer ejemplo de las 12 primeras es la frase exacta de su botón.
+INTENCIONES = [
+    ("gasto_total", "Gasto total", "", [
+        "¿Cuánto he gastado en total?", "cuánto llevo gastado", "gasto total", "total de gastos",
+        "cuánto dinero he gastado"]),
+    ("gasto_en_categoria", "Gastos por categoria", _categoria, [
+        "¿Cuánto he gastado en Metas financieras?", "cuánto he gastado en necesidades",
+        "cuánto gasté en gustos", "gasto en necesidades", "gastos de gustos"]),
+    ("ingreso_total", "Ingreso total", "", [
+        "¿Cuánto dinero he ingresado?", "cuánto he ganado", "ingreso total", "total de ingresos",
+        "cuánto me ha entrado"]),
+    ("ultimas_transacciones", "Ver últimas transacciones", "", [
+        "Muéstrame las últimas transacciones", "últimos movimientos", "mis transacciones recientes",
+        "qué movimientos tuve últimamente"]),
+    ("balance", "Balance actual", "", [
+        "¿Cuál es mi balance actual?", "cuál es mi saldo", "saldo actual", "cuánto dinero tengo"]),
+    ("gastos_por_mes", "Comparativa de gastos mensual", "", [
+        "¿Qué gastos he tenido por mes?", "gastos mes a mes", "compara mis gastos por mes",
+        "gastos mensuales"]),
+    ("mayor_gasto", "Mayor gasto", "", [
+        "¿Cuál ha sido mi mayor gasto?", "mi gasto más grande", "en qué gasté más dinero de una vez",
+        "gasto más alto"]),
+    ("porcentaje_por_categoria", "Porcentaje gastos por categoría", "", [
+        "¿Cuál es el porcentaje de mis gastos que corresponde a metas financieras?",
+        "porcentaje de gastos por categoría", "qué porcentaje gasto en cada categoría",
+        "proporción de mis gastos"]),
+    ("promedio_gastos", "Promedio de gastos", _periodo, [
+        "¿Cuál es mi gasto promedio mensual?", "promedio de gastos", "cuánto gasto en promedio al mes",
+        "gasto promedio semanal", "promedio diario de gastos"]),
+    ("sugerencia_ahorro", "Sugerencia de ahorro", "", [
+        "¿Me puedes sugerir una meta de ahorro?", "cómo puedo ahorrar", "sugerencia de ahorro",
+        "dame un consejo para ahorrar"]),
+    ("proyeccion_saldo", "Proyección de saldo fin de mes", "", [
+        "¿Cuál será mi saldo al final del mes si sigo con este ritmo?", "proyecta mi saldo",
+        "con cuánto terminaré el mes", "saldo proyectado a fin de mes"]),
+    ("gasto_por_categoria", "Ranking gastos por categoría", "", [
+        "¿Cuánto he gastado por categoría?", "gastos por categoría", "en qué categorías gasto más",
+        "ranking de gastos"]),
+    ("ranking_ingresos", "Ranking ingresos por categoría", "", [
+        "ingresos por categoría", "de dónde vienen mis ingresos", "ranking de ingresos"]),
+    ("gastos_recurrentes", "Gastos recurrentes", "", [
+        "gastos recurrentes", "qué suscripciones tengo", "gastos que se repiten"]),
+    ("alerta_gasto", "Alerta gasto excesivo", "", [
+        "estoy gastando de más", "gasto excesivo este mes", "he gastado más de lo normal"]),
+    ("sugerencia_presupuesto", "Sugerencia presupuesto mensual", "", [
+        "sugiere un presupuesto", "cuánto debería gastar al mes", "presupuesto mensual recomendado"]),
+    ("resumen_metas", "Ver resumen de metas", "", [
+        "resumen de mis metas", "cómo van mis metas", "progreso de metas"]),
+]
+
+_PALABRAS_VACIAS = {
+    "a", "al", "cual", "cuales", "cuanto", "cuanta", "cuantos", "como", "con", "de", "del", "dinero",
+    "el", "en", "es", "esto", "ha", "han", "he", "la", "las", "lo", "los", "me", "mi",
+    "mis", "muestrame", "dime", "o", "para", "por", "puedes", "que", "se", "si", "sido", "un", "una",
+    "y", "ver", "quiero", "saber", "tengo", "tenido", "tuve", "sera",
+}
+_SUFIJOS = ("aciones", "acion", "mente", "ados", "adas", "idos", "idas", "ado", "ada", "ido", "ida",
+            "es", "os", "as", "s")
+_MARCA_CATEGORIA = "#categoria"
+
+
+def tokens(texto):
+    return re.findall(r"[a-z0-9]+", normalizar(texto))
+
+
+def _raiz(palabra):
+    if palabra in CATEGORIAS_GASTO:
+        return _MARCA_CATEGORIA
+    for sufijo in _SUFIJOS:
+        if palabra.endswith(sufijo) and len(palabra) - len(sufijo) >= 4:
+            palabra = palabra[:-len(sufijo)]
+            break
+    if len(palabra) > 4 and palabra[-1] in "aeiou":
+        palabra = palabra[:-1]
+    return palabra[:6]
+
+
+def raices(lista_tokens):
+    return {_raiz(t) for t in lista_tokens if t not in _PALABRAS_VACIAS}
+
+
+class EnrutadorIntenciones:
+    def __init__(self, intenciones=INTENCIONES, umbral=UMBRAL_CONFIANZA, margen=MARGEN_CONFIANZA):
+        self.umbral = umbral
+        self.margen = margen
+        self._intenciones = {nombre: (herramienta, entrada) for nombre, herramienta, entrada, _ in intenciones}
+        self._herramientas = {nombre: funcion for nombre, _, funcion in HERRAMIENTAS}
+        self._exactas = {" ".join(tokens(ejemplos[0])): nombre for nombre, _, _, ejemplos in intenciones}
+
+        ejemplos = [(nombre, raices(tokens(e))) for nombre, _, _, lista in intenciones for e in lista]
+        # IDF por intención: una raíz que aparece en muchas intenciones pesa poco
+        intenciones_por_raiz = {}
+        for nombre, conjunto in ejemplos:
+            for raiz in conjunto:
+                intenciones_por_raiz.setdefault(raiz, set()).add(nombre)
+        n = len(self._intenciones)
+        self._peso = {r: 1 + math.log(n / len(i)) for r, i in intenciones_por_raiz.items()}
+        self._peso_desconocida = 1 + math.log(n)
+        self._ejemplos = [(nombre, conjunto, self._norma(conjunto)) for nombre, conjunto in ejemplos]
+
+        self._lock = threading.Lock()
+        self.estadisticas = {}
+
+    def _norma(self, conjunto):
+        return math.sqrt(sum(self._peso.get(r, self._peso_desconocida) ** 2 for r in conjunto))
+
+    def _ruta(self, nombre, lista_tokens, confianza):
+        herramienta, entrada = self._intenciones[nombre]
+        if callable(entrada):
+            entrada = entrada(lista_tokens)
+            if entrada is None:
+                return None
+        return {"intencion": nombre, "herramienta": herramienta, "entrada": entrada, "confianza": confianza}
+
+    def clasificar(self, pregunta):
+        """Ruta {intencion, herramienta, entrada, confianza} o None si debe responder el agente."""
+        lista_tokens = tokens(pregunta)
+        exacta = self._exactas.get(" ".join(lista_tokens))
+        if exacta:
+            return self._ruta(exacta, lista_tokens, 1.0)
+
+        consulta = raices(lista_tokens)
+        norma = self._norma(consulta)
+        if not norma:
+            return None
+        mejores = {}
+        for nombre, conjunto, norma_ejemplo in self._ejemplos:
+            comunes = consulta & conjunto
+            if comunes:
+                similitud = sum(self._peso[r] ** 2 for r in comunes) / (norma * norma_ejemplo)
+                mejores[nombre] = max(similitud, mejores.get(nombre, 0.0))
+        if not mejores:
+            return None
+        orden = sorted(mejores.items(), key=lambda x: x[1], reverse=True)
+        nombre, confianza = orden[0]
+        segunda = orden[1][1] if len(orden) > 1 else 0.0
+        if confianza < self.umbral or confianza - segunda < self.margen:
+            return None
+        return self._ruta(nombre, lista_tokens, round(confianza, 3))
+
+    def responder(self, pregunta, username, agente=None, callbacks=None):
+        """Responde localmente si la pregunta tiene ruta; si no, con el agente (creado sólo entonces)."""
+        inicio = time.perf_counter()
+        ruta = self.clasificar(pregunta)
+        if ruta:
+            herramienta = ruta["herramienta"]
+            respuesta = ejecutar_herramienta(herramienta, self._herramientas[herramienta], ruta["entrada"], username)
+            if "\n" in respuesta:
+                # Las tablas de pandas sólo se leen bien en bloque de código
+                respuesta = f"```\n{respuesta}\n```"
+            llave = ruta["intencion"]
+        else:
+            respuesta = (agente or obtener_asistente(username)).run(pregunta, callbacks=callbacks)
+            llave = "agente"
+        self._registrar(llave, time.perf_counter() - inicio)
+        return respuesta
+
+    def _registrar(self, llave, segundos):
+        with self._lock:
+            conteo = self.estadisticas.setdefault(llave, {"preguntas": 0, "segundos": 0.0})
+            conteo["preguntas"] += 1
+            conteo["segundos"] += segundos
+
+
+ENRUTADOR = EnrutadorIntenciones()
+
+
+def responder(pregunta, username, callbacks=None):
+    return ENRUTADOR.responder(pregunta, username, callbacks=callbacks)
@@ -0,0 +1,138 @@
+"""
+flujo_tokens.py – Respuestas de Billie en vivo
+=============================================
+Antes cada respuesta esperaba detrás de `st.spinner` a que el agente terminara
+todas sus vueltas. `transmitir` corre la llamada bloqueante en otro hilo con un
+callback que pone en una cola los tokens de la respuesta final (lo que sigue a
+"Final Answer:" en un agente ReAct) y los pasos intermedios (cada herramienta
+que consulta). El generador resultante se le pasa a `st.write_stream`, así que
+la latencia percibida pasa a ser la del primer token.
+
+Todo lo que toca la interfaz ocurre en el hilo de la página: el hilo de trabajo
+sólo escribe en la cola (y hereda el contexto de Streamlit para que las
+herramientas puedan leer `st.session_state`).
+
+$ python -m benchmarks.bench_streaming
+"""
+import queue
+import threading
+
+import streamlit as st
+from langchain_core.callbacks import BaseCallbackHandler
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+
+from cache_respuestas import responder_con_cache
+
+MARCA_FINAL = "Final Answer:"
+_FIN = object()
+
+
+class ManejadorTokens(BaseCallbackHandler):
+    """Pone en `cola` los tokens ("token", texto) y los pasos ("paso", texto) del agente."""
+
+    def __init__(self, cola, solo_respuesta_final=True):
+        self.cola = cola
+        self.solo_respuesta_final = solo_respuesta_final
+        self._reiniciar()
+
+    def _reiniciar(self):
+        self._texto = ""
+        self._en_final = not self.solo_respuesta_final
+        self._recortar = self.solo_respuesta_final
+
+    def on_llm_start(self, *args, **kwargs):
+        self._reiniciar()
+
+    def on_chat_model_start(self, *args, **kwargs):
+        self._reiniciar()
+
+    def on_llm_new_token(self, token, **kwargs):
+        if not self._en_final:
+            # La marca puede llegar partida entre tokens: se busca en lo acumulado
+            self._texto += token
+            posicion = self._texto.find(MARCA_FINAL)
+            if posicion < 0:
+                return
+            self._en_final = True
+            token = self._texto[posicion + len(MARCA_FINAL):]
+        if self._recortar:
+            token = token.lstrip()
+            self._recortar = not token
+        if token:
+            self.cola.put(("token", token))
+
+    def on_agent_action(self, action, **kwargs):
+        entrada = f": {action.tool_input}" if action.tool_input else ""
+        self.cola.put(("paso", f"🔧 {action.tool}{entrada}"))
+
+
+def transmitir(ejecutar, al_paso=None, solo_respuesta_final=True):
+    """Generador de tokens para `st.write_stream`.
+
+    `ejecutar(callbacks)` hace la llamada bloqueante (p. ej.
+    `lambda cb: agente.run(pregunta, callbacks=cb)`) y devuelve el texto final;
+    si el modelo no transmitió nada (respuesta local, modelo sin streaming) ese
+    texto se entrega completo al final. Los pasos intermedios se pasan a `al_paso`.
+    """
+    cola = queue.Queue()
+    manejador = ManejadorTokens(cola, solo_respuesta_final)
+    resultado = {}
+
+    def trabajar():
+        try:
+            resultado["texto"] = ejecutar([manejador])
+        except Exception as e:
+            resultado["error"] = e
+        finally:
+            cola.put((_FIN, None))
+
+    hilo = threading.Thread(target=trabajar, daemon=True)
+    add_script_run_ctx(hilo, get_script_run_ctx(suppress_warning=True))
+    hilo.start()
+    transmitido = False
+    while True:
+        tipo, valor = cola.get()
+        if tipo is _FIN:
+            break
+        if tipo == "paso":
+            if al_paso:
+                al_paso(valor)
+        else:
+            transmitido = True
+            yield valor
+    hilo.join()
+    if "error" in resultado:
+        raise resultado["error"]
+    if not transmitido and resultado.get("texto"):
+        yield str(resultado["texto"])
+
+
+def responder_en_vivo(usuario, pregunta, ejecutar, usar_cache=True, solo_respuesta_final=True):
+    """Muestra la respuesta conforme se genera y la devuelve.
+
+    Pasa por la caché de respuestas: un acierto se muestra completo de inmediato.
+    Con `solo_respuesta_final=False` se transmite todo lo que genere el modelo
+    (llamadas directas al chat, sin agente).
+    """
+    transmitida = False
+    pasos = []
+
+    def al_paso(texto):
+        # El recuadro de pasos sólo aparece si el agente consulta alguna herramienta
+        if not pasos:
+            pasos.append(st.status("BILLIE está consultando tus datos...", expanded=False))
+        pasos[0].write(texto)
+
+    def calcular():
+        nonlocal transmitida
+        with st.spinner("BILLIE está pensando..."):
+            texto = st.write_stream(transmitir(ejecutar, al_paso, solo_respuesta_final))
+        if pasos:
+            pasos[0].update(label="BILLIE consultó tus datos", state="complete")
+        transmitida = True
+        return texto
+
+    respuesta = responder_con_cache(usuario, pregunta, calcular) if usar_cache else calcular()
+    if not transmitida:
+        st.markdown(respuesta)
+    return respuesta
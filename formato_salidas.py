@@ -0,0 +1,168 @@
+"""
+formato_salidas.py – Salidas de herramientas dentro de un presupuesto de tokens
+==============================================================================
+Lo que devuelve una herramienta entra completo al scratchpad del agente y se
+reenvía en cada llamada siguiente al modelo. "Evolución de balance" de un
+usuario con años de historia son decenas de miles de tokens; "Buscar
+transacciones" o "Gastos recurrentes" crecen con cada movimiento.
+
+`formatear(herramienta, salida)` convierte la salida en texto que nunca pasa de
+`PRESUPUESTO_TOKENS`:
+
+* series de tiempo: un renglón por mes con mínimo, máximo y último valor; si
+  aún no cabe, por trimestre y luego por año;
+* series mensuales: los últimos `MAX_FILAS` meses + un renglón con el resto;
+* tablas de movimientos y conteos: los `MAX_FILAS` más grandes + resumen;
+* cualquier otro texto: se corta por renglones al llegar al presupuesto.
+
+Las salidas que ya caben se dejan tal cual. `estadisticas()` reporta los tokens
+ahorrados (sobre la salida completa, estimada para tablas grandes).
+
+Configuración: BILLIE_TOKENS_HERRAMIENTA (default 400) y BILLIE_FILAS_HERRAMIENTA
+(default 10).
+
+$ python -m benchmarks.bench_herramientas
+"""
+import os
+import threading
+
+import pandas as pd
+
+from proveedores_llm import contar_tokens
+
+PRESUPUESTO_TOKENS = int(os.getenv("BILLIE_TOKENS_HERRAMIENTA", "400"))
+MAX_FILAS = int(os.getenv("BILLIE_FILAS_HERRAMIENTA", "10"))
+# Para tablas más grandes los tokens de la salida completa se extrapolan de una muestra
+FILAS_MUESTRA = 200
+
+
+def _dinero(valor):
+    return f"${valor:,.2f}"
+
+
+def _tabla(df):
+    return df.to_string(index=False)
+
+
+# ─── Formatos ─────────────────────────────────────────────────────────────
+def serie_tiempo(df, fecha="Fecha", valor="Balance", presupuesto=PRESUPUESTO_TOKENS):
+    """Serie diaria -> mínimo, máximo y último valor por mes (o trimestre, o año)."""
+    if len(df) <= MAX_FILAS:
+        return _tabla(df)
+    fechas = pd.to_datetime(df[fecha])
+    for frecuencia, nombre in (("M", "Mes"), ("Q", "Trimestre"), ("Y", "Año")):
+        grupos = df[valor].groupby(fechas.dt.to_period(frecuencia).rename(nombre), sort=True)
+        tabla = grupos.agg(["min", "max", "last"]).rename(columns={"min": "Mínimo", "max": "Máximo", "last": "Último"})
+        texto = tabla.apply(lambda col: col.map(_dinero)).reset_index().to_string(index=False)
+        if contar_tokens(texto) <= presupuesto:
+            break
+    return f"{valor} por {nombre.lower()} ({len(df):,} movimientos):\n{texto}"
+
+
+def ultimos_meses(datos, columna="Monto"):
+    """Serie mensual -> últimos MAX_FILAS meses + total y promedio de los anteriores."""
+    tabla = datos.reset_index() if isinstance(datos, pd.Series) else datos
+    if len(tabla) <= MAX_FILAS:
+        tabla = tabla.copy()
+        tabla[columna] = tabla[columna].map(_dinero)
+        return _tabla(tabla)
+    anteriores, recientes = tabla.iloc[:-MAX_FILAS], tabla.iloc[-MAX_FILAS:].copy()
+    periodo = tabla.columns[0]
+    recientes[columna] = recientes[columna].map(_dinero)
+    return (f"{_tabla(recientes)}\n"
+            f"{len(anteriores)} meses anteriores ({anteriores[periodo].iloc[0]} a {anteriores[periodo].iloc[-1]}): "
+            f"total {_dinero(anteriores[columna].sum())}, promedio {_dinero(anteriores[columna].mean())}")
+
+
+def mayores_movimientos(df, columna="Monto"):
+    """Movimientos -> los MAX_FILAS de mayor monto absoluto (por fecha) + resumen."""
+    if len(df) <= MAX_FILAS:
+        return _tabla(df)
+    mayores = df.loc[df[columna].abs().nlargest(MAX_FILAS).index].sort_values("Fecha", ascending=False)
+    fechas = pd.to_datetime(df["Fecha"])
+    return (f"{_tabla(mayores)}\n"
+            f"Se muestran los {MAX_FILAS} de mayor monto de {len(df):,} movimientos "
+            f"({fechas.min():%Y-%m-%d} a {fechas.max():%Y-%m-%d}); total {_dinero(df[columna].sum())}")
+
+
+def mas_frecuentes(conteos):
+    """Conteos (de mayor a menor) -> los MAX_FILAS primeros + cuántos más hay."""
+    if len(conteos) <= MAX_FILAS:
+        return conteos.to_string()
+    resto = conteos.iloc[MAX_FILAS:]
+    return (f"{conteos.iloc[:MAX_FILAS].to_string()}\n"
+            f"... y {len(resto):,} más que se repiten entre {resto.min()} y {resto.max()} veces")
+
+
+def recortar_texto(texto, presupuesto=PRESUPUESTO_TOKENS):
+    """Corta por renglones para no pasar de `presupuesto` tokens."""
+    renglones = texto.splitlines()
+    conservados, usados = [], 0
+    for renglon in renglones:
+        costo = contar_tokens(renglon) + 1
+        if usados + costo > presupuesto - 20:  # reserva para el aviso
+            break
+        conservados.append(renglon)
+        usados += costo
+    omitidos = len(renglones) - len(conservados)
+    if not conservados:
+        # Un solo renglón gigante: se corta por caracteres
+        return texto[:presupuesto * 3] + " ... (recortado)"
+    return "\n".join(conservados) + f"\n... ({omitidos:,} renglones omitidos)"
+
+
+# (formato, mensaje si la salida viene vacía) por herramienta de agente.HERRAMIENTAS
+FORMATOS = {
+    "Evolución de balance": (serie_tiempo, "No hay transacciones."),
+    "Resumen mensual": (ultimos_meses, "No hay transacciones."),
+    "Comparativa de gastos mensual": (ultimos_meses, "No hay transacciones."),
+    "Buscar transacciones": (mayores_movimientos, "No se encontraron transacciones."),
+    "Gastos recurrentes": (mas_frecuentes, "No se detectaron gastos recurrentes."),
+}
+
+
+# ─── Entrada ──────────────────────────────────────────────────────────────
+_lock = threading.Lock()
+_estadisticas = {"salidas": 0, "compactadas": 0, "tokens_originales": 0, "tokens_finales": 0}
+_por_herramienta = {}
+
+
+def _tokens_originales(salida):
+    if not isinstance(salida, (pd.DataFrame, pd.Series)):
+        return contar_tokens(str(salida))
+    if len(salida) <= FILAS_MUESTRA:
+        return contar_tokens(salida.to_string())
+    return contar_tokens(salida.iloc[:FILAS_MUESTRA].to_string()) * len(salida) // FILAS_MUESTRA
+
+
+def formatear(herramienta, salida, presupuesto=PRESUPUESTO_TOKENS):
+    """Texto de la salida de `herramienta` con a lo más `presupuesto` tokens."""
+    formato, vacio = FORMATOS.get(herramienta, (None, None))
+    if isinstance(salida, (pd.DataFrame, pd.Series)):
+        if salida.empty:
+            texto = vacio or "Sin resultados."
+        elif formato:
+            texto = formato(salida)
+        else:
+            texto = salida.to_string()
+    else:
+        texto = str(salida)
+    if contar_tokens(texto) > presupuesto:
+        texto = recortar_texto(texto, presupuesto)
+
+    originales, finales = _tokens_originales(salida), contar_tokens(texto)
+    with _lock:
+        _estadisticas["salidas"] += 1
+        _estadisticas["compactadas"] += finales < originales
+        _estadisticas["tokens_originales"] += originales
+        _estadisticas["tokens_finales"] += finales
+        _por_herramienta[herramienta] = (originales, finales)
+    return texto
+
+
+def estadisticas():
+    with _lock:
+        datos = dict(_estadisticas)
+        datos["por_herramienta"] = dict(_por_herramienta)
+    datos["tokens_ahorrados"] = datos["tokens_originales"] - datos["tokens_finales"]
+    return datos
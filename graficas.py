@@ -0,0 +1,58 @@
+"""
+graficas.py – Gráficas ligeras para las páginas
+===============================================
+Las donas de presupuesto de la sección "registro" se dibujaban con
+`plt.subplots` en cada rerun, se rasterizaban a PNG con `st.pyplot` y nunca se
+cerraban: las figuras se acumulaban en pyplot y la rasterización dominaba el
+tiempo de la página.
+
+`donut_html` arma la dona como un SVG de unas cuantas líneas (en un <img> con
+data URI, igual que la imagen de Billie) y lo memoriza por (presupuesto, gasto,
+colores), así que un rerun sin cambios no dibuja nada y el navegador escala el
+vector sin pérdida. Donde Matplotlib se queda (el abanico
+de `page_simulador.py`), la figura se cierra después de `st.pyplot`.
+
+$ python -m benchmarks.bench_graficas
+"""
+import base64
+import math
+from functools import lru_cache
+
+TAMANO_DONA = 170          # px; la figura original medía 1.7 pulgadas a 100 dpi
+COLOR_RESTANTE = "#e0e0e0"
+
+
+def _donut_svg(presupuesto, gasto, color_fondo, color_donut, tamano):
+    restante = max(presupuesto - gasto, 0)
+    fraccion = gasto / (gasto + restante) if gasto + restante > 0 else 0.0
+    centro = tamano / 2
+    grosor = 0.25 * 0.38 * tamano                  # ancho de la dona: 25 % del radio, como wedgeprops
+    radio = 0.38 * tamano - grosor / 2             # el trazo va centrado en el radio
+    anillo = f'cx="{centro}" cy="{centro}" r="{radio:.2f}" fill="none" stroke-width="{grosor:.2f}"'
+    if fraccion >= 1:
+        arco = f'<circle {anillo} stroke="{color_donut}"/>'
+    elif fraccion <= 0:
+        arco = ""
+    else:
+        # Desde las 12 en sentido contrario a las manecillas, como pie(startangle=90)
+        angulo = math.pi / 2 + 2 * math.pi * fraccion
+        x, y = centro + radio * math.cos(angulo), centro - radio * math.sin(angulo)
+        arco = (f'<path d="M {centro} {centro - radio:.2f} A {radio:.2f} {radio:.2f} 0 {int(fraccion > 0.5)} 0 '
+                f'{x:.2f} {y:.2f}" fill="none" stroke="{color_donut}" stroke-width="{grosor:.2f}"/>')
+    return (
+        f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 {tamano} {tamano}" width="{tamano}" height="{tamano}">'
+        f'<rect width="{tamano}" height="{tamano}" fill="{color_fondo}"/>'
+        f'<circle {anillo} stroke="{COLOR_RESTANTE}"/>{arco}</svg>'
+    )
+
+
+@lru_cache(maxsize=256)
+def _donut_html(presupuesto, gasto, color_fondo, color_donut, tamano):
+    svg = base64.b64encode(_donut_svg(presupuesto, gasto, color_fondo, color_donut, tamano).encode()).decode()
+    return f'<img src="data:image/svg+xml;base64,{svg}" style="width:100%;max-width:{tamano}px;display:block;margin:auto"/>'
+
+
+def donut_html(presupuesto, gasto, color_fondo, color_donut, tamano=TAMANO_DONA):
+    """<img> con la dona gastado/restante del presupuesto, para `st.markdown(..., unsafe_allow_html=True)`."""
+    # Centavos: montos que sólo difieren en redondeo comparten la misma entrada de la caché
+    return _donut_html(round(float(presupuesto), 2), round(float(gasto), 2), color_fondo, color_donut, tamano)
@@ -1,21 +1,315 @@
-import re, fasttext, pathlib
+"""
+guardrails.py – Filtro de temas para las preguntas a Billie
+===========================================================
+Billie sólo contesta temas financieros y bancarios. `ServicioGuardrail` junta
+el filtro de palabras prohibidas y el clasificador de temas (fasttext,
+`modelos/topic_classifier.ftz`). Antes el modelo se cargaba al importar este
+módulo; ahora `obtener_guardrail()` lo carga una sola vez por proceso, lo
+calienta con una predicción y lo comparten todas las sesiones.
+`streamlit_app.py` lo precarga al arrancar.
 
-ALLOWED_TOPICS = {...}
-MODEL_PATH = pathlib.Path("Modelos/topic_classifier.ftz")
-clf = fasttext.load_model(str(MODEL_PATH))
+Si fasttext no está instalado o falta el archivo del modelo se usa
+`ClasificadorLocal`, un Naive Bayes pequeño entrenado al vuelo con frases de
+ejemplo, con la misma interfaz `predict(textos, k=1)`.
+
+Cada prompt pasa por etapas, de la más barata a la más cara:
+
+1. prohibidas: un solo patrón compilado con los términos vetados en español,
+   inglés y portugués, sobre el texto sin acentos ni mayúsculas ("POLÍTICA",
+   "politica" y "política" son lo mismo);
+2. caché: veredictos anteriores por hash del prompt normalizado (LRU);
+3. finanzas: si menciona un término financiero sin otro sentido común ("cetes",
+   "hipoteca") o una frase financiera ("tarjeta de credito", "fondo de
+   inversion") se acepta sin modelo; palabras sueltas como "cuenta", "fondo" o
+   "interes" ("cuenta un chiste", "fondo de pantalla") van al clasificador;
+4. clasificador: sólo para lo que no resolvieron las etapas anteriores, en
+   una sola llamada por lote (`validate_many`).
+
+Las etapas 3 y 4 guardan su veredicto en la caché. `metricas()` exporta por
+etapa cuántos prompts entraron, cuántos resolvió y el tiempo acumulado.
+
+Configuración: BILLIE_GUARDRAIL_MODELO (ruta del modelo fasttext) y
+BILLIE_GUARDRAIL_CACHE (veredictos en caché, default 4096).
+
+$ python -m benchmarks.bench_guardrails
+"""
+import hashlib
+import math
+import os
+import pathlib
+import re
+import threading
+import time
+from collections import Counter, OrderedDict
+from functools import lru_cache
+
+from parser_transacciones import normalizar
+
+MODEL_PATH = pathlib.Path(os.getenv("BILLIE_GUARDRAIL_MODELO", "modelos/topic_classifier.ftz"))
+ETIQUETA_FINANZAS = "__label__finance"
+ETIQUETA_OTRO = "__label__other"
+UMBRAL = 0.6
+CAPACIDAD_CACHE = int(os.getenv("BILLIE_GUARDRAIL_CACHE", "4096"))
 
 REFUSAL = "Lo siento, solo puedo ayudar con temas financieros y bancarios. I’m sorry, I can only help with financial & banking topics."
 
+# Sin acentos: se buscan sobre el texto normalizado
+TERMINOS_PROHIBIDOS = [
+    # español
+    "sexo", "sexual", "porno", "pornografia", "politica", "politico", "politicos", "religion", "religiones",
+    "violencia", "violento", "terrorismo", "terrorista", "terroristas",
+    # inglés
+    "sex", "porn", "pornography", "politics", "political", "religion", "violence", "violent",
+    "terrorism", "terrorist",
+    # portugués
+    "religiao", "pornografia",
+]
+# Términos y frases que por sí solos dejan claro que la pregunta es de finanzas. Las palabras con
+# otros sentidos comunes ("cuenta", "fondo", "interes", "tarjeta", "credito", "banco", "stock", "sat",
+# "rendimiento", "comision") sólo cuentan dentro de una frase; sueltas las decide el clasificador.
+TERMINOS_FINANZAS = [
+    "ahorro", "ahorrar", "ahorros", "gasto", "gastos", "gaste", "gastar", "ingreso", "ingresos", "presupuesto",
+    "inversion", "inversiones", "invertir", "invierto", "bancario", "bancaria", "bancarios", "bancarias",
+    "saldo", "deuda", "deudas", "prestamo", "prestamos", "hipoteca", "afore", "cetes", "pagare", "dinero",
+    "finanzas", "financiero", "financiera", "portafolio", "inflacion", "nomina", "impuestos", "dolares",
+    "savings", "budget", "investment", "invest", "loan", "mortgage", "debt", "finance", "money", "retirement",
+    # frases
+    "cuenta de ahorro", "cuenta de ahorros", "cuenta de cheques", "cuenta de banco", "estado de cuenta",
+    "fondo de inversion", "fondos de inversion", "fondo de emergencia", "fondo de retiro", "fondo indexado",
+    "tasa de interes", "tasas de interes", "interes compuesto", "tarjeta de credito", "tarjeta de debito",
+    "credito hipotecario", "credito automotriz", "historial crediticio", "rendimiento anual",
+    "comision bancaria", "comisiones bancarias", "comisiones del banco", "declaracion anual", "mercado de valores",
+    "bolsa de valores", "stock market", "credit card", "credit score", "interest rate", "bank account",
+]
+
+
+def _patron(terminos):
+    # Una sola expresión compilada; las alternativas más largas primero
+    return re.compile(r"\b(?:" + "|".join(re.escape(t) for t in sorted(set(terminos), key=len, reverse=True)) + r")\b")
+
+
+PROHIBIDAS = _patron(TERMINOS_PROHIBIDOS)
+FINANZAS = _patron(TERMINOS_FINANZAS)
+
+
+# ─── Clasificador de respaldo ─────────────────────────────────────────────
+EJEMPLOS = {
+    ETIQUETA_FINANZAS: [
+        "cuanto gaste este mes", "como puedo ahorrar mas dinero", "que fondo de inversion me recomiendas",
+        "cual es mi saldo en la cuenta", "quiero abrir una cuenta de ahorro en el banco",
+        "cuanto pago de interes en mi tarjeta de credito", "como pago mi deuda mas rapido",
+        "que es una afore y cuanto debo aportar", "me conviene invertir en cetes o en acciones",
+        "como hago un presupuesto mensual", "cuanto rinde un pagare bancario", "que es el cat de un credito",
+        "como funciona una hipoteca", "vale la pena comprar dolares", "que seguro de vida me conviene",
+        "cuales son las comisiones del banco", "como mejoro mi historial crediticio", "cuanto gano al año",
+        "rendimiento de mi portafolio", "riesgo de las criptomonedas", "precio de la accion de una empresa",
+        "how can i save money", "what is my account balance", "best investment fund for me",
+        "credit card interest rate", "how to pay off debt", "monthly budget", "bank fees and loans",
+        "stock market returns", "retirement savings plan", "mortgage rates", "inflation and my savings",
+    ],
+    ETIQUETA_OTRO: [
+        "cual es la capital de francia", "recomiendame una pelicula", "como cocino una pizza",
+        "quien gano el partido de futbol", "cuentame un chiste", "que tiempo hara manana",
+        "escribe un poema de amor", "como arreglo mi computadora", "dame una receta de pastel",
+        "quien es el mejor cantante", "como entreno para un maraton", "que serie veo esta noche",
+        "traduce esta frase al frances", "como se juega ajedrez", "hablame de dinosaurios",
+        "que videojuego me recomiendas", "como cuido a mi perro", "resuelve esta ecuacion de fisica",
+        "what is the capital of italy", "tell me a joke", "write a song about the sea",
+        "who won the world cup", "how do i cook pasta", "recommend a good movie", "fix my wifi",
+        "explain photosynthesis", "best hiking trails", "how to learn guitar",
+        "cuenta una historia de terror", "pon un fondo de pantalla bonito", "tengo interes en la pintura",
+        "imagenes de stock gratis", "como estudio para el examen sat", "el banco del parque esta roto",
+    ],
+}
+
+
+def _palabras(texto):
+    return re.findall(r"[a-z0-9]+", normalizar(texto))
+
+
+def normalizar_prompt(texto):
+    """Minúsculas, sin acentos ni signos: la forma que usan el filtro y la caché."""
+    return " ".join(_palabras(texto))
+
+
+class ClasificadorLocal:
+    """Naive Bayes multinomial sobre palabras sin acentos, con la interfaz de fasttext.
+
+    Sin ninguna palabra conocida decide la probabilidad a priori, que favorece
+    finanzas: preguntas cortas como "¿y ahora qué hago?" no se rechazan (el
+    filtro de palabras prohibidas sigue aplicando).
+    """
+
+    def __init__(self, ejemplos=EJEMPLOS, prior_finanzas=0.7):
+        self.etiquetas = list(ejemplos)
+        self.conteos = {e: Counter(p for frase in frases for p in _palabras(frase)) for e, frases in ejemplos.items()}
+        self.totales = {e: sum(c.values()) for e, c in self.conteos.items()}
+        self.vocabulario = set().union(*self.conteos.values())
+        self.prior = {e: math.log(prior_finanzas if e == ETIQUETA_FINANZAS else 1 - prior_finanzas)
+                      for e in self.etiquetas}
+
+    def _probabilidades(self, texto):
+        palabras = [p for p in _palabras(texto) if p in self.vocabulario]
+        log = {
+            e: self.prior[e] + sum(
+                math.log((self.conteos[e][p] + 1) / (self.totales[e] + len(self.vocabulario))) for p in palabras)
+            for e in self.etiquetas
+        }
+        maximo = max(log.values())
+        suma = sum(math.exp(v - maximo) for v in log.values())
+        return {e: math.exp(v - maximo) / suma for e, v in log.items()}
+
+    def predict(self, textos, k=1):
+        unico = isinstance(textos, str)
+        etiquetas, probabilidades = [], []
+        for texto in [textos] if unico else textos:
+            mejores = sorted(self._probabilidades(texto).items(), key=lambda x: -x[1])[:k]
+            etiquetas.append(tuple(e for e, _ in mejores))
+            probabilidades.append([p for _, p in mejores])
+        return (etiquetas[0], probabilidades[0]) if unico else (etiquetas, probabilidades)
+
+
+def cargar_clasificador(ruta=MODEL_PATH):
+    """Modelo fasttext de `ruta`, o `ClasificadorLocal` si no hay fasttext o archivo."""
+    try:
+        import fasttext
+    except ImportError:
+        return ClasificadorLocal()
+    if not pathlib.Path(ruta).exists():
+        return ClasificadorLocal()
+    return fasttext.load_model(str(ruta))
+
+
+# ─── Servicio ─────────────────────────────────────────────────────────────
+ETAPAS = ("prohibidas", "cache", "finanzas", "clasificador")
+ACEPTADO = (True, "")
+RECHAZADO = (False, REFUSAL)
+
+
+class ServicioGuardrail:
+    def __init__(self, clasificador=None, capacidad=CAPACIDAD_CACHE):
+        self.clasificador = clasificador or cargar_clasificador()
+        self.capacidad = capacidad
+        self._veredictos = OrderedDict()  # hash del prompt normalizado -> veredicto; orden LRU
+        self._lock = threading.Lock()
+        self._metricas = {etapa: {"entradas": 0, "resueltos": 0, "segundos": 0.0} for etapa in ETAPAS}
+
+    @property
+    def respaldo(self):
+        return isinstance(self.clasificador, ClasificadorLocal)
+
+    def calentar(self):
+        # La primera predicción de fasttext reserva buffers; mejor al arrancar que en la primera pregunta
+        self.clasificador.predict(["¿cuánto gasté este mes?"], k=1)
+
+    def es_finanzas(self, textos):
+        etiquetas, probabilidades = self.clasificador.predict([t.replace("\n", " ") for t in textos], k=1)
+        return [e[0] == ETIQUETA_FINANZAS and p[0] > UMBRAL for e, p in zip(etiquetas, probabilidades)]
+
+    # ─── Caché de veredictos ─────────────────────────────────────────────
+    @staticmethod
+    def _llave(normalizado):
+        return hashlib.blake2b(normalizado.encode(), digest_size=16).digest()
+
+    def _leer(self, llave):
+        with self._lock:
+            veredicto = self._veredictos.get(llave)
+            if veredicto is not None:
+                self._veredictos.move_to_end(llave)
+            return veredicto
+
+    def _guardar(self, llave, veredicto):
+        with self._lock:
+            self._veredictos[llave] = veredicto
+            self._veredictos.move_to_end(llave)
+            while len(self._veredictos) > self.capacidad:
+                self._veredictos.popitem(last=False)
+
+    # ─── Etapas ──────────────────────────────────────────────────────────
+    def _etapa(self, nombre, pendientes, decidir, resultados):
+        """Corre `decidir(pendientes)` -> {índice: veredicto} y devuelve los que siguen pendientes."""
+        if not pendientes:
+            return pendientes
+        inicio = time.perf_counter()
+        decididos = decidir(pendientes)
+        segundos = time.perf_counter() - inicio
+        for i, veredicto in decididos.items():
+            resultados[i] = veredicto
+        with self._lock:
+            metrica = self._metricas[nombre]
+            metrica["entradas"] += len(pendientes)
+            metrica["resueltos"] += len(decididos)
+            metrica["segundos"] += segundos
+        return [i for i in pendientes if i not in decididos]
+
+    def validate_many(self, prompts):
+        """[(válido, mensaje de rechazo)] para cada prompt; el modelo se llama una vez por lote."""
+        resultados = [None] * len(prompts)
+        normalizados = [normalizar_prompt(p) for p in prompts]
+        llaves = [self._llave(n) for n in normalizados]
+
+        def prohibidas(pendientes):
+            return {i: RECHAZADO for i in pendientes if PROHIBIDAS.search(normalizados[i])}
+
+        def cache(pendientes):
+            return {i: v for i in pendientes if (v := self._leer(llaves[i])) is not None}
+
+        def finanzas(pendientes):
+            return {i: ACEPTADO for i in pendientes if FINANZAS.search(normalizados[i])}
+
+        def clasificador(pendientes):
+            permitidos = self.es_finanzas([prompts[i] for i in pendientes])
+            return {i: ACEPTADO if permitido else RECHAZADO for i, permitido in zip(pendientes, permitidos)}
+
+        pendientes = list(range(len(prompts)))
+        pendientes = self._etapa("prohibidas", pendientes, prohibidas, resultados)
+        pendientes = self._etapa("cache", pendientes, cache, resultados)
+        nuevos = pendientes
+        pendientes = self._etapa("finanzas", pendientes, finanzas, resultados)
+        self._etapa("clasificador", pendientes, clasificador, resultados)
+        for i in nuevos:
+            self._guardar(llaves[i], resultados[i])
+        return resultados
+
+    def metricas(self):
+        """Por etapa: prompts que entraron, cuántos resolvió y milisegundos acumulados."""
+        with self._lock:
+            etapas = {
+                nombre: {
+                    "entradas": m["entradas"],
+                    "resueltos": m["resueltos"],
+                    "tasa": m["resueltos"] / m["entradas"] if m["entradas"] else 0.0,
+                    "ms_total": m["segundos"] * 1000,
+                    "us_por_prompt": m["segundos"] * 1e6 / m["entradas"] if m["entradas"] else 0.0,
+                }
+                for nombre, m in self._metricas.items()
+            }
+            return {"etapas": etapas, "cache_tamano": len(self._veredictos), "cache_capacidad": self.capacidad,
+                    "clasificador": "local" if self.respaldo else "fasttext"}
+
+    def validate(self, prompt):
+        return self.validate_many([prompt])[0]
+
+
+@lru_cache(maxsize=None)
+def obtener_guardrail():
+    """Servicio único por proceso, ya calentado (lo comparten todas las sesiones)."""
+    servicio = ServicioGuardrail()
+    servicio.calentar()
+    return servicio
+
+
 def is_allowed_semantically(text: str) -> bool:
-    label, prob = clf.predict(text.replace("\n", " "), k=1)
-    return label[0] == "__label__finance" and prob[0] > 0.6
+    return obtener_guardrail().es_finanzas([text])[0]
 
 def contains_forbidden_keywords(text: str) -> bool:
-    return bool(re.search(r"\b(sexo|política|religión|violencia|terrorismo)\b", text, re.I))
+    return bool(PROHIBIDAS.search(normalizar_prompt(text)))
 
 def validate_prompt(user_prompt: str):
-    if contains_forbidden_keywords(user_prompt):
-        return False, REFUSAL
-    if not is_allowed_semantically(user_prompt):
-        return False, REFUSAL
-    return True, ""
\ No newline at end of file
+    return obtener_guardrail().validate(user_prompt)
+
+def validate_many(prompts):
+    return obtener_guardrail().validate_many(prompts)
+
+def metricas_guardrail():
+    return obtener_guardrail().metricas()
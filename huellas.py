@@ -0,0 +1,42 @@
+"""
+huellas.py – Huella de contenido de una transacción
+==================================================
+La huella identifica una transacción por su contenido (Usuario, Fecha,
+Categoria, Monto, Cuenta): los mismos cinco campos con los que la app ya
+consideraba duplicado un registro. Se guarda en `transacciones.Huella` con un
+índice UNIQUE (ver migración 4), así que detectar un duplicado es una sola
+búsqueda en el índice dentro del mismo INSERT ... ON CONFLICT DO NOTHING.
+"""
+import hashlib
+from datetime import date, datetime
+
+
+def _fecha_iso(fecha):
+    if isinstance(fecha, datetime):
+        return fecha.date().isoformat()
+    if isinstance(fecha, date):
+        return fecha.isoformat()
+    return str(fecha)[:10]
+
+
+_SEPARADOR = "\x1f"
+
+
+def huella_transaccion(usuario, fecha, categoria, monto, cuenta):
+    """Hash determinista (hex de 32 caracteres) del contenido de la transacción."""
+    return huellas_lote(usuario, [_fecha_iso(fecha)], [categoria], [monto], [cuenta])[0]
+
+
+def huellas_lote(usuario, fechas_iso, categorias, montos, cuentas):
+    """Huellas de muchas transacciones de un mismo usuario (Fecha ya en texto ISO)."""
+    blake2b = hashlib.blake2b
+    prefijo = (usuario or "") + _SEPARADOR
+    return [
+        # + 0.0 evita que un monto redondeado a -0.0 se escriba "-0.00"
+        blake2b(
+            f"{prefijo}{f}{_SEPARADOR}{c or ''}{_SEPARADOR}{round(float(m or 0), 2) + 0.0:.2f}{_SEPARADOR}{cu or ''}"
+            .encode("utf-8"),
+            digest_size=16,
+        ).hexdigest()
+        for f, c, m, cu in zip(fechas_iso, categorias, montos, cuentas)
+    ]
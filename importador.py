@@ -0,0 +1,310 @@
+"""
+importador.py – Importación masiva de estados de cuenta (CSV / OFX)
+==================================================================
+Lee el archivo por lotes (nunca completo en memoria), mapea sus columnas al
+esquema de `transacciones`, categoriza cada movimiento con las mismas palabras
+clave que `registrar_transaccion_desde_texto` y lo inserta con `executemany`
+dentro de una transacción por lote. Los duplicados (mismo contenido, ver
+`huellas.py`) los descarta el índice UNIQUE de Huella con ON CONFLICT DO NOTHING,
+así que volver a importar el mismo archivo no crea registros repetidos.
+
+Uso rápido
+----------
+$ python importador.py estado_cuenta.csv --usuario usuario1
+$ python importador.py movimientos.ofx --usuario usuario1 --cuenta Banorte
+$ python importador.py banco.csv --usuario usuario1 --separador ";" --encoding latin-1 \
+      --columna Fecha="Fecha Operación" --columna Monto=Importe
+"""
+import io
+import os
+import re
+import time
+
+import numpy as np
+import pandas as pd
+
+from huellas import huellas_lote
+from parser_transacciones import CATEGORIA_DEFAULT, CATEGORIA_INGRESOS, categorizar, normalizar
+from resumenes import recalcular_resumen
+from secuencias import reservar_ids
+from versiones import incrementar_version
+
+TAMANO_LOTE = 50_000
+
+# Encabezados (normalizados: sin acentos, minúsculas) que se reconocen por columna destino
+ALIAS_COLUMNAS = {
+    "Fecha": ["fecha", "fecha operacion", "fecha de operacion", "fecha movimiento", "date", "dtposted"],
+    "Descripcion": ["descripcion", "concepto", "detalle", "description", "memo", "name", "referencia"],
+    "Monto": ["monto", "importe", "cantidad", "amount", "trnamt"],
+    "Cargo": ["cargo", "cargos", "retiro", "retiros", "debito", "debit"],
+    "Abono": ["abono", "abonos", "deposito", "depositos", "credito", "credit"],
+    "Cuenta": ["cuenta", "account", "acctid"],
+    "Categoria": ["categoria", "category"],
+}
+
+FORMATOS_FECHA = ["%Y-%m-%d", "%d/%m/%Y", "%d-%m-%Y", "%Y/%m/%d", "%d/%m/%y", "%Y%m%d", "%m/%d/%Y"]
+
+COLUMNAS_INSERTAR = ["ID", "Usuario", "Fecha", "Categoria", "Cuenta", "Monto", "Descripcion", "Huella"]
+INSERTAR = """
+    INSERT INTO transacciones ({columnas})
+    VALUES ({marcas})
+    ON CONFLICT (Huella) DO NOTHING
+"""
+# Marcador de parámetro posicional según el paramstyle del driver DBAPI
+_MARCADORES = {"qmark": "?", "format": "%s", "pyformat": "%s"}
+
+
+# ─── Lectura por lotes ───────────────────────────────────────────────────
+def _leer_csv(archivo, tamano_lote, separador, encoding):
+    yield from pd.read_csv(
+        archivo, sep=separador, encoding=encoding, dtype=str, chunksize=tamano_lote, skipinitialspace=True
+    )
+
+
+_ETIQUETA_OFX = re.compile(r"<(/?)([A-Za-z0-9.]+)>([^<]*)")
+
+
+def _bloques_texto(archivo, encoding, tamano=1 << 20):
+    # Bloques que terminan justo antes de una etiqueta, para no partirla a la mitad
+    propio = isinstance(archivo, (str, os.PathLike))
+    envuelto = not propio and not isinstance(archivo, io.TextIOBase)
+    if propio:
+        archivo = open(archivo, encoding=encoding, errors="replace")
+    elif envuelto:
+        archivo = io.TextIOWrapper(archivo, encoding=encoding, errors="replace")
+    try:
+        resto = ""
+        while True:
+            bloque = archivo.read(tamano)
+            if not bloque:
+                break
+            bloque = resto + bloque
+            corte = bloque.rfind("<")
+            resto, bloque = (bloque[corte:], bloque[:corte]) if corte > 0 else ("", bloque)
+            yield bloque
+        if resto:
+            yield resto
+    finally:
+        # Los archivos recibidos abiertos (p. ej. de st.file_uploader) no se cierran
+        if propio:
+            archivo.close()
+        elif envuelto:
+            archivo.detach()
+
+
+def _leer_ofx(archivo, tamano_lote, encoding):
+    """Recorre los <STMTTRN> de un OFX (SGML o XML) y los entrega en DataFrames."""
+    cuenta = None
+    actual = None
+    filas = []
+    for bloque in _bloques_texto(archivo, encoding):
+        for cierre, etiqueta, valor in _ETIQUETA_OFX.findall(bloque):
+            etiqueta = etiqueta.upper()
+            valor = valor.strip()
+            if etiqueta == "STMTTRN":
+                if not cierre:
+                    actual = {"acctid": cuenta}
+                elif actual is not None:
+                    filas.append(actual)
+                    actual = None
+                    if len(filas) >= tamano_lote:
+                        yield pd.DataFrame(filas)
+                        filas = []
+            elif etiqueta == "ACCTID" and valor:
+                cuenta = valor
+            elif actual is not None and not cierre and valor:
+                # NAME tiene prioridad sobre MEMO como descripción
+                if etiqueta == "DTPOSTED":
+                    actual["dtposted"] = valor[:8]
+                elif etiqueta in ("TRNAMT", "NAME"):
+                    actual[etiqueta.lower()] = valor
+                elif etiqueta == "MEMO":
+                    actual.setdefault("name", valor)
+    if filas:
+        yield pd.DataFrame(filas)
+
+
+# ─── Normalización de lotes ──────────────────────────────────────────────
+def mapear_columnas(columnas, mapa=None):
+    """Devuelve {columna destino: columna del archivo} usando ALIAS_COLUMNAS y `mapa`."""
+    por_clave = {" ".join(normalizar(str(c)).split()): c for c in columnas}
+    resultado = {}
+    for destino, alias in ALIAS_COLUMNAS.items():
+        for a in alias:
+            if a in por_clave:
+                resultado[destino] = por_clave[a]
+                break
+    resultado.update(mapa or {})
+    if "Fecha" not in resultado or not ({"Monto", "Cargo", "Abono"} & resultado.keys()):
+        raise ValueError(
+            f"No se reconocieron las columnas de fecha y monto en {list(columnas)}; "
+            "indícalas con --columna Fecha=... --columna Monto=..."
+        )
+    return resultado
+
+
+# "$1,234.50" -> "1234.50" y "(150.00)" (negativo contable) -> "-150.00" en una sola pasada
+_LIMPIAR_MONTO = str.maketrans("(", "-", "$ ,)")
+
+
+def _a_numero(serie):
+    return pd.to_numeric(serie.astype(str).str.translate(_LIMPIAR_MONTO), errors="coerce")
+
+
+def _detectar_formato_fecha(serie):
+    muestra = serie.dropna().astype(str).str.strip().head(200)
+    for formato in FORMATOS_FECHA:
+        if pd.to_datetime(muestra, format=formato, errors="coerce").notna().all():
+            return formato
+    return "mixed"
+
+
+class _Categorizador:
+    """Categoriza por descripción; los estados de cuenta repiten mucho sus conceptos."""
+
+    def __init__(self):
+        self._cache = {}
+
+    def __call__(self, descripciones, montos):
+        categorias = np.empty(len(descripciones), dtype=object)
+        for i, descripcion in enumerate(descripciones):
+            if descripcion not in self._cache:
+                self._cache[descripcion] = categorizar(normalizar(descripcion), default=None)
+            categorias[i] = self._cache[descripcion]
+        # Sin palabra clave, el signo del movimiento decide
+        sin_categoria = pd.isna(categorias)
+        categorias[sin_categoria] = np.where(montos[sin_categoria] > 0, CATEGORIA_INGRESOS, CATEGORIA_DEFAULT)
+        return categorias
+
+
+def normalizar_lote(lote, columnas, usuario, cuenta, estado):
+    """Convierte un lote del archivo en registros de `transacciones` (con Huella)."""
+    if "formato_fecha" not in estado:
+        estado["formato_fecha"] = _detectar_formato_fecha(lote[columnas["Fecha"]])
+    formato = estado["formato_fecha"]
+    fechas = pd.to_datetime(
+        lote[columnas["Fecha"]].astype(str).str.strip(), format=formato, dayfirst=True, errors="coerce"
+    )
+
+    if "Monto" in columnas:
+        montos = _a_numero(lote[columnas["Monto"]])
+    else:
+        abonos = _a_numero(lote[columnas["Abono"]]).abs() if "Abono" in columnas else 0.0
+        cargos = _a_numero(lote[columnas["Cargo"]]).abs() if "Cargo" in columnas else 0.0
+        montos = pd.Series(0.0, index=lote.index).add(abonos, fill_value=0).sub(cargos, fill_value=0)
+
+    validas = fechas.notna() & montos.notna()
+    lote, fechas, montos = lote[validas], fechas[validas], montos[validas].round(2)
+
+    descripciones = (
+        lote[columnas["Descripcion"]].fillna("").astype(str).str.strip()
+        if "Descripcion" in columnas else pd.Series("", index=lote.index)
+    )
+    if cuenta:
+        cuentas = pd.Series(cuenta, index=lote.index)
+    elif "Cuenta" in columnas:
+        cuentas = lote[columnas["Cuenta"]].fillna("General").astype(str).str.strip()
+    else:
+        cuentas = pd.Series("General", index=lote.index)
+
+    categorias = estado.setdefault("categorizador", _Categorizador())(descripciones.to_numpy(), montos.to_numpy())
+    if "Categoria" in columnas:
+        del_archivo = lote[columnas["Categoria"]]
+        categorias = np.where(del_archivo.notna(), del_archivo.to_numpy(), categorias)
+
+    registros = pd.DataFrame({
+        "Usuario": usuario,
+        "Fecha": fechas.dt.strftime("%Y-%m-%d"),
+        "Categoria": categorias,
+        "Cuenta": cuentas,
+        "Monto": montos.astype(float),
+        "Descripcion": descripciones.where(descripciones != "", categorias),
+    })
+    registros["Huella"] = huellas_lote(
+        usuario, registros["Fecha"], registros["Categoria"], registros["Monto"], registros["Cuenta"]
+    )
+    return registros, int((~validas).sum())
+
+
+# ─── Importación ─────────────────────────────────────────────────────────
+def detectar_formato(archivo):
+    nombre = str(getattr(archivo, "name", archivo)).lower()
+    return "ofx" if nombre.endswith((".ofx", ".qfx")) else "csv"
+
+
+def importar_estado_cuenta(engine, archivo, usuario, formato=None, cuenta=None, tamano_lote=TAMANO_LOTE,
+                           separador=",", encoding="utf-8-sig", mapa_columnas=None, progreso=None):
+    """Importa un CSV/OFX (ruta o archivo abierto) y devuelve el conteo de filas.
+
+    `progreso`, si se indica, recibe el diccionario de conteos tras cada lote.
+    """
+    formato = formato or detectar_formato(archivo)
+    if formato == "ofx":
+        lotes = _leer_ofx(archivo, tamano_lote, encoding)
+    else:
+        lotes = _leer_csv(archivo, tamano_lote, separador, encoding)
+
+    marca = _MARCADORES.get(engine.dialect.paramstyle)
+    if marca is None:
+        raise ValueError(f"paramstyle no soportado: {engine.dialect.paramstyle}")
+    insertar = INSERTAR.format(columnas=", ".join(COLUMNAS_INSERTAR), marcas=", ".join([marca] * len(COLUMNAS_INSERTAR)))
+
+    conteo = {"leidas": 0, "insertadas": 0, "duplicadas": 0, "invalidas": 0, "segundos": 0.0}
+    estado = {}
+    columnas = None
+    inicio = time.perf_counter()
+    try:
+        for lote in lotes:
+            columnas = columnas or mapear_columnas(lote.columns, mapa_columnas)
+            registros, invalidas = normalizar_lote(lote, columnas, usuario, cuenta, estado)
+            conteo["leidas"] += len(lote)
+            conteo["invalidas"] += invalidas
+            if not registros.empty:
+                with engine.begin() as conn:
+                    registros.insert(0, "ID", list(reservar_ids(conn, len(registros))))
+                    # executemany directo del driver con tuplas: evita armar un dict por fila
+                    filas = list(registros[COLUMNAS_INSERTAR].itertuples(index=False, name=None))
+                    insertadas = conn.exec_driver_sql(insertar, filas).rowcount
+                conteo["insertadas"] += insertadas
+                conteo["duplicadas"] += len(registros) - insertadas
+            conteo["segundos"] = time.perf_counter() - inicio
+            if progreso:
+                progreso(dict(conteo))
+    finally:
+        # Un solo recálculo del resumen mensual al final (también si se interrumpe)
+        if conteo["insertadas"]:
+            with engine.begin() as conn:
+                recalcular_resumen(conn, usuario)
+                incrementar_version(conn, usuario)
+    conteo["segundos"] = time.perf_counter() - inicio
+    return conteo
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from db import get_engine
+
+    parser = argparse.ArgumentParser(description="Importa un estado de cuenta CSV/OFX a transacciones")
+    parser.add_argument("archivo", help="Ruta del archivo .csv, .ofx o .qfx")
+    parser.add_argument("--usuario", required=True, help="Usuario dueño de los movimientos")
+    parser.add_argument("--url", default=None, help="URL SQLAlchemy (default BILLIE_DB_URL)")
+    parser.add_argument("--formato", choices=["csv", "ofx"], default=None, help="Default: según la extensión")
+    parser.add_argument("--cuenta", default=None, help="Cuenta a asignar a todos los movimientos")
+    parser.add_argument("--tamano-lote", type=int, default=TAMANO_LOTE, help="Filas por lote/transacción")
+    parser.add_argument("--separador", default=",", help="Separador del CSV")
+    parser.add_argument("--encoding", default="utf-8-sig", help="Codificación del archivo")
+    parser.add_argument("--columna", action="append", default=[], metavar="DESTINO=ORIGEN",
+                        help="Mapeo explícito de columna, p. ej. Monto=Importe (repetible)")
+    args = parser.parse_args()
+
+    mapa = dict(par.split("=", 1) for par in args.columna)
+    resultado = importar_estado_cuenta(
+        get_engine(args.url), args.archivo, args.usuario, formato=args.formato, cuenta=args.cuenta,
+        tamano_lote=args.tamano_lote, separador=args.separador, encoding=args.encoding, mapa_columnas=mapa,
+        progreso=lambda c: print(f"  {c['leidas']:>10,} leídas · {c['insertadas']:>10,} nuevas", flush=True),
+    )
+    print(
+        f"Importación terminada en {resultado['segundos']:.1f} s: {resultado['insertadas']:,} nuevas, "
+        f"{resultado['duplicadas']:,} duplicadas, {resultado['invalidas']:,} inválidas."
+    )
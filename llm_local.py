@@ -0,0 +1,110 @@
+"""
+llm_local.py – Modelo de chat falso que transmite tokens, para pruebas sin red
+=============================================================================
+`ChatLocalStreaming` se comporta como `ChatOpenAI(streaming=True)`: entrega sus
+respuestas token por token a través de los callbacks (`on_llm_new_token`), con
+una latencia inicial y un retardo entre tokens configurables. Las respuestas se
+toman en orden de `respuestas` (y se repiten al terminarse), así que se puede
+guionizar un agente ReAct completo:
+
+    llm = ChatLocalStreaming(respuestas=[
+        "Necesito el gasto.\\nAction: Gasto total\\nAction Input: ",
+        "Ya lo tengo.\\nFinal Answer: Llevas $1,234.00 gastados.",
+    ])
+
+Con BILLIE_LLM_LOCAL=1 el agente de `agente.py` usa este modelo en lugar de
+GPT-4, para probar las páginas sin llave de OpenAI.
+
+`ChatGuion` reproduce trazas ReAct grabadas (ver `proveedores_llm.py`): la
+respuesta depende de la pregunta y del paso, no del orden de las llamadas, así
+que es determinista aunque varios agentes compartan el modelo.
+"""
+import re
+import time
+from typing import Any, Dict, Iterator, List, Optional
+
+from langchain_core.callbacks import CallbackManagerForLLMRun
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+RESPUESTA_DEFAULT = (
+    "Respondo sin consultar herramientas.\n"
+    "Final Answer: Hola, soy Billie en modo local. Esta respuesta viene de un modelo de prueba, "
+    "no de GPT-4, y sirve para revisar la interfaz sin conexión."
+)
+SIN_TRAZA = "No tengo una traza grabada para esta pregunta.\nFinal Answer: No tengo una respuesta grabada para eso."
+
+
+def trocear(texto):
+    """Divide el texto en tokens aproximados (palabra + espacios que la siguen)."""
+    return re.findall(r"\S+\s*|\s+", texto)
+
+
+class ChatLocalStreaming(BaseChatModel):
+    respuestas: List[str] = [RESPUESTA_DEFAULT]
+    latencia_inicial: float = 0.0  # segundos hasta el primer token
+    retardo_token: float = 0.0     # segundos entre tokens
+    streaming: bool = True
+    llamadas: int = 0
+
+    @property
+    def _llm_type(self):
+        return "billie-local-streaming"
+
+    def _respuesta(self, prompt):
+        return self.respuestas[self.llamadas % len(self.respuestas)]
+
+    def _siguiente(self, messages, stop=None):
+        texto = self._respuesta("\n".join(str(m.content) for m in messages))
+        self.llamadas += 1
+        if stop:
+            # Igual que la API real: se corta antes de la primera secuencia de paro
+            cortes = [texto.find(s) for s in stop if s in texto]
+            texto = texto[:min(cortes)] if cortes else texto
+        return texto
+
+    def _stream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                run_manager: Optional[CallbackManagerForLLMRun] = None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        texto = self._siguiente(messages, stop)
+        time.sleep(self.latencia_inicial)
+        for i, token in enumerate(trocear(texto)):
+            if i and self.retardo_token:
+                time.sleep(self.retardo_token)
+            trozo = ChatGenerationChunk(message=AIMessageChunk(content=token))
+            if run_manager:
+                run_manager.on_llm_new_token(token, chunk=trozo)
+            yield trozo
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Optional[CallbackManagerForLLMRun] = None, **kwargs: Any) -> ChatResult:
+        if self.streaming:
+            texto = "".join(t.message.content for t in self._stream(messages, stop, run_manager, **kwargs))
+        else:
+            texto = self._siguiente(messages, stop)
+            time.sleep(self.latencia_inicial + self.retardo_token * max(len(trocear(texto)) - 1, 0))
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=texto))])
+
+
+class ChatGuion(ChatLocalStreaming):
+    """Reproduce trazas ReAct: {pregunta: [respuesta del paso 1, paso 2, ...]}.
+
+    La pregunta se toma del prompt ("Question: ...") y el paso es el número de
+    observaciones que ya hay en el scratchpad; después del último paso se
+    repite la respuesta final.
+    """
+    trazas: Dict[str, List[str]] = {}
+
+    @property
+    def _llm_type(self):
+        return "billie-guion"
+
+    def _respuesta(self, prompt):
+        from proveedores_llm import pregunta_de_prompt
+
+        pregunta = pregunta_de_prompt(prompt)
+        pasos = self.trazas.get(pregunta)
+        if not pasos:
+            return SIN_TRAZA
+        paso = prompt.count("\nObservation:", prompt.rfind("Question:"))
+        return pasos[min(paso, len(pasos) - 1)]
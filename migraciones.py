@@ -0,0 +1,207 @@
+"""
+migraciones.py – Migraciones versionadas de transacciones.db
+===========================================================
+Cada migración es una función que recibe una conexión abierta dentro de una
+transacción. La versión aplicada se guarda en la tabla `esquema_version`, así
+que correr el módulo varias veces es seguro: sólo se ejecutan las pendientes.
+
+Uso rápido
+----------
+$ python migraciones.py                     # aplica las migraciones pendientes
+$ python migraciones.py --estado            # muestra la versión actual
+$ python migraciones.py --url sqlite:///otra.db
+"""
+from datetime import datetime
+
+from sqlalchemy import create_engine, inspect, text
+
+from huellas import huella_transaccion
+from precios import crear_tabla_precios
+from pronosticos import crear_tabla_pronosticos
+from resumenes import crear_tabla_resumen, recalcular_resumen
+from versiones import crear_tabla_versiones
+
+DB_URL_DEFAULT = "sqlite:///transacciones.db"
+
+# ─── Esquema de transacciones ────────────────────────────────────────────
+# Fecha se guarda siempre como texto ISO (YYYY-MM-DD), de modo que los filtros
+# por mes se resuelven con un rango sobre el índice (Usuario, Fecha) en lugar
+# de evaluar strftime() fila por fila.
+DDL_TRANSACCIONES = """
+    CREATE TABLE {tabla} (
+        ID INTEGER PRIMARY KEY,
+        Usuario TEXT NOT NULL,
+        Fecha TEXT NOT NULL,
+        Categoria TEXT,
+        Cuenta TEXT,
+        Monto REAL NOT NULL DEFAULT 0,
+        Descripcion TEXT
+    )
+"""
+
+INDICES_TRANSACCIONES = [
+    "CREATE INDEX IF NOT EXISTS ix_transacciones_usuario_fecha ON transacciones (Usuario, Fecha)",
+    "CREATE INDEX IF NOT EXISTS ix_transacciones_usuario_categoria ON transacciones (Usuario, Categoria)",
+]
+
+
+def _m001_transacciones_indexadas(conn):
+    tablas = inspect(conn).get_table_names()
+    if "transacciones" not in tablas:
+        conn.execute(text(DDL_TRANSACCIONES.format(tabla="transacciones")))
+    else:
+        # pysqlite confirma el DDL fuera de la transacción; limpia un intento previo fallido.
+        conn.execute(text("DROP TABLE IF EXISTS transacciones_nueva"))
+        conn.execute(text(DDL_TRANSACCIONES.format(tabla="transacciones_nueva")))
+        # Los IDs antiguos se calculaban en memoria y pueden repetirse: el primer
+        # registro conserva su ID y los duplicados reciben uno nuevo después.
+        columnas_destino = "ID, Usuario, Fecha, Categoria, Cuenta, Monto, Descripcion"
+        origen = """
+            SELECT ID, COALESCE(Usuario, '') AS Usuario, COALESCE(date(Fecha), Fecha, '') AS Fecha,
+                   Categoria, Cuenta, COALESCE(Monto, 0) AS Monto, Descripcion,
+                   ROW_NUMBER() OVER (PARTITION BY ID ORDER BY rowid) AS rn, rowid AS orden
+            FROM transacciones
+        """
+        conn.execute(text(f"""
+            INSERT INTO transacciones_nueva ({columnas_destino})
+            SELECT ID, Usuario, Fecha, Categoria, Cuenta, Monto, Descripcion FROM ({origen})
+            WHERE ID IS NOT NULL AND rn = 1 ORDER BY orden
+        """))
+        conn.execute(text(f"""
+            INSERT INTO transacciones_nueva ({columnas_destino})
+            SELECT NULL, Usuario, Fecha, Categoria, Cuenta, Monto, Descripcion FROM ({origen})
+            WHERE ID IS NULL OR rn > 1 ORDER BY orden
+        """))
+        conn.execute(text("DROP TABLE transacciones"))
+        conn.execute(text("ALTER TABLE transacciones_nueva RENAME TO transacciones"))
+    for ddl in INDICES_TRANSACCIONES:
+        conn.execute(text(ddl))
+
+
+def _m002_secuencias(conn):
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS secuencias (
+            nombre TEXT PRIMARY KEY,
+            valor INTEGER NOT NULL
+        )
+    """))
+    # Único MAX(ID) que se calcula: a partir de aquí los IDs salen de la secuencia.
+    conn.execute(text("""
+        INSERT INTO secuencias (nombre, valor)
+        SELECT 'transacciones', COALESCE(MAX(ID), 0) FROM transacciones
+        WHERE NOT EXISTS (SELECT 1 FROM secuencias WHERE nombre = 'transacciones')
+    """))
+
+
+def _m003_resumen_mensual(conn):
+    crear_tabla_resumen(conn)
+    recalcular_resumen(conn)
+
+
+def _m004_huella_transacciones(conn):
+    columnas = [c["name"] for c in inspect(conn).get_columns("transacciones")]
+    if "Huella" not in columnas:
+        conn.execute(text("ALTER TABLE transacciones ADD COLUMN Huella TEXT"))
+    # Sólo el primer registro de cada contenido recibe huella; los duplicados que
+    # ya existían se conservan con Huella NULL (el índice UNIQUE admite varios NULL).
+    vistas = set()
+    actualizaciones = []
+    filas = conn.execute(text(
+        "SELECT ID, Usuario, Fecha, Categoria, Monto, Cuenta FROM transacciones WHERE Huella IS NULL ORDER BY ID"
+    ))
+    for fila in filas:
+        huella = huella_transaccion(fila.Usuario, fila.Fecha, fila.Categoria, fila.Monto, fila.Cuenta)
+        if huella not in vistas:
+            vistas.add(huella)
+            actualizaciones.append({"id": fila.ID, "huella": huella})
+    if actualizaciones:
+        conn.execute(text("UPDATE transacciones SET Huella = :huella WHERE ID = :id"), actualizaciones)
+    conn.execute(text("CREATE UNIQUE INDEX IF NOT EXISTS ux_transacciones_huella ON transacciones (Huella)"))
+
+
+def _m005_version_datos(conn):
+    crear_tabla_versiones(conn)
+
+
+def _m006_precios(conn):
+    crear_tabla_precios(conn)
+
+
+def _m007_pronosticos(conn):
+    crear_tabla_pronosticos(conn)
+
+
+def _m008_indice_categoria_fecha(conn):
+    # Filtro por categoría ordenado por fecha (paginacion.py); cubre al índice (Usuario, Categoria)
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_transacciones_usuario_categoria_fecha ON transacciones (Usuario, Categoria, Fecha)"
+    ))
+    conn.execute(text("DROP INDEX IF EXISTS ix_transacciones_usuario_categoria"))
+
+
+# (versión, descripción, función). Agrega las nuevas al final, nunca reordenes.
+MIGRACIONES = [
+    (1, "transacciones con llave primaria, Fecha ISO e índices por usuario", _m001_transacciones_indexadas),
+    (2, "secuencia de IDs para transacciones", _m002_secuencias),
+    (3, "resumen mensual por usuario y categoría", _m003_resumen_mensual),
+    (4, "huella de contenido única en transacciones", _m004_huella_transacciones),
+    (5, "versión de los datos por usuario", _m005_version_datos),
+    (6, "almacén local de precios de Yahoo Finance", _m006_precios),
+    (7, "pronósticos precalculados de los fondos del catálogo", _m007_pronosticos),
+    (8, "índice (Usuario, Categoria, Fecha) para paginar por categoría", _m008_indice_categoria_fecha),
+]
+
+
+# ─── Motor de migraciones ────────────────────────────────────────────────
+def _asegurar_tabla_version(conn):
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS esquema_version (
+            version INTEGER PRIMARY KEY,
+            descripcion TEXT,
+            aplicada_en TEXT
+        )
+    """))
+
+
+def version_actual(engine):
+    with engine.begin() as conn:
+        _asegurar_tabla_version(conn)
+        return conn.execute(text("SELECT COALESCE(MAX(version), 0) FROM esquema_version")).scalar()
+
+
+def aplicar_migraciones(engine, hasta=None):
+    """Aplica en orden las migraciones pendientes y devuelve las versiones aplicadas."""
+    aplicadas = []
+    actual = version_actual(engine)
+    for version, descripcion, migracion in MIGRACIONES:
+        if version <= actual or (hasta is not None and version > hasta):
+            continue
+        # Cada migración corre en su propia transacción junto con su registro.
+        with engine.begin() as conn:
+            migracion(conn)
+            conn.execute(
+                text("INSERT INTO esquema_version (version, descripcion, aplicada_en) VALUES (:v, :d, :f)"),
+                {"v": version, "d": descripcion, "f": datetime.now().isoformat(timespec="seconds")}
+            )
+        aplicadas.append(version)
+    return aplicadas
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Migraciones de transacciones.db")
+    parser.add_argument("--url", default=DB_URL_DEFAULT, help="URL SQLAlchemy de la base")
+    parser.add_argument("--estado", action="store_true", help="Muestra la versión actual y sale")
+    parser.add_argument("--hasta", type=int, default=None, help="Aplica sólo hasta esta versión")
+    args = parser.parse_args()
+
+    engine = create_engine(args.url)
+    if args.estado:
+        print(f"Versión actual: {version_actual(engine)} de {MIGRACIONES[-1][0]}")
+    else:
+        aplicadas = aplicar_migraciones(engine, hasta=args.hasta)
+        if aplicadas:
+            print(f"Migraciones aplicadas: {', '.join(map(str, aplicadas))}")
+        else:
+            print("El esquema ya está al día.")
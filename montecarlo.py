@@ -0,0 +1,163 @@
+"""
+montecarlo.py – Simulación Monte Carlo de ahorro con aportaciones mensuales
+===========================================================================
+`page_simulador.py` y `calcular_evolucion_anual` proyectan una sola línea de
+interés compuesto: no dicen qué tan probable es llegar a una meta ni qué tan
+abajo puede quedar el ahorro en un mal escenario. `simular_ahorro` corre
+`CAMINOS` escenarios (default 100 000) del saldo con una aportación al final de
+cada mes y rendimientos lognormales, y devuelve las bandas P5/P50/P95 por año
+y la probabilidad de llegar a un objetivo.
+
+* Todo es NumPy vectorizado sobre los caminos, en bloques de `BLOQUE` caminos
+  para acotar la memoria, con semilla para que la misma entrada dé la misma
+  gráfica en cada rerun.
+* Por omisión se sortea un rendimiento por año y no por mes (12 veces menos
+  números aleatorios): las aportaciones de cada año crecen con su valor
+  esperado dado el rendimiento del año (puente browniano), que es exacto en
+  promedio y sólo omite la pequeña dispersión dentro del año. `mensual=True`
+  sortea mes por mes.
+* El rendimiento y la volatilidad salen de un número fijo o de la historia de
+  un fondo del catálogo (`parametros_ticker`, del almacén de precios).
+* `probabilidad_metas` evalúa cada meta de `metas_financieras` del usuario
+  desde su monto actual hasta su plazo.
+
+Configuración: BILLIE_MC_CAMINOS (default 100000) y BILLIE_MC_BLOQUE (default 25000).
+
+$ python -m benchmarks.bench_montecarlo
+"""
+import os
+import time
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+
+from planeacion_metas import meses_restantes
+
+CAMINOS = int(os.getenv("BILLIE_MC_CAMINOS", "100000"))
+BLOQUE = int(os.getenv("BILLIE_MC_BLOQUE", "25000"))
+PERCENTILES = (5, 50, 95)
+
+
+# ─── Parámetros ───────────────────────────────────────────────────────────
+def parametros_historial(hist):
+    """(rendimiento anual esperado, volatilidad anual) de los cierres mensuales de `hist`."""
+    mensual = hist["Close"].resample("ME").last().dropna()
+    log_rend = np.diff(np.log(mensual.to_numpy()))
+    if len(log_rend) < 12:
+        raise ValueError("Se necesita al menos un año de historia")
+    volatilidad = log_rend.std(ddof=1) * np.sqrt(12)
+    # E[e^X] de una lognormal: media logarítmica + la mitad de la varianza
+    rendimiento = np.exp(log_rend.mean() * 12 + volatilidad ** 2 / 2) - 1
+    return float(rendimiento), float(volatilidad)
+
+
+def parametros_ticker(ticker):
+    from precios import historial_precios
+    return parametros_historial(historial_precios(ticker))
+
+
+# ─── Simulación ───────────────────────────────────────────────────────────
+def _pasos(meses, mensual):
+    """Longitud en meses de cada paso: años completos y un resto (o meses sueltos)."""
+    if mensual:
+        return np.ones(meses, dtype=int)
+    return np.array([12] * (meses // 12) + ([meses % 12] if meses % 12 else []), dtype=int)
+
+
+def _bloque(rng, n, saldo_inicial, aportacion, pasos, mu_m, sigma_m, guardar):
+    """Saldo de `n` caminos al final de los pasos marcados en `guardar` (un renglón contiguo por paso)."""
+    # Rendimiento logarítmico de cada paso de L meses: N(L·mu, L·sigma²)
+    r = rng.standard_normal((len(pasos), n))
+    r *= (sigma_m * np.sqrt(pasos))[:, None]
+    r += (mu_m * pasos)[:, None]
+    # Aportación del mes k (de L) crece con exp(R - S_k); dado R, S_k es un puente browniano:
+    # E[exp(R - S_k) | R] = exp(R·(L-k)/L + sigma²·k·(L-k)/(2L))
+    # Suma de polinomio en g = exp(R/L) (potencias L-k), evaluada con Horner
+    factores = np.empty_like(r)
+    for L in np.unique(pasos):
+        renglones = pasos == L
+        k = np.arange(1, L + 1)
+        coeficientes = np.exp(sigma_m ** 2 * k * (L - k) / (2 * L))  # coeficiente de g^(L-k)
+        g = np.exp(r[renglones] / L)
+        acumulado = np.full_like(g, coeficientes[0])
+        for c in coeficientes[1:]:
+            acumulado *= g
+            acumulado += c
+        factores[renglones] = acumulado
+    np.exp(r, out=r)
+    saldo = np.full(n, float(saldo_inicial))
+    for j in range(len(pasos)):
+        saldo *= r[j]
+        saldo += aportacion * factores[j]
+        factores[j] = saldo
+    return factores[guardar]
+
+
+def simular_ahorro(saldo_inicial, aportacion_mensual, meses, rendimiento_anual, volatilidad_anual,
+                   objetivo=None, caminos=CAMINOS, semilla=0, mensual=False, bloque=BLOQUE):
+    """Bandas P5/P50/P95 del saldo y probabilidad de tener al menos `objetivo` al final.
+
+    Devuelve {"bandas": DataFrame por mes (0, cada cierre de año y el último) con
+    P5, P50, P95 y "Sin volatilidad", "probabilidad": float o None, "caminos", "ms"}.
+    """
+    inicio = time.perf_counter()
+    pasos = _pasos(int(meses), mensual)
+    volatilidad_anual = max(float(volatilidad_anual), 0.0)
+    sigma_m = volatilidad_anual / np.sqrt(12)
+    # Media logarítmica mensual para que la media de cada año sea (1 + rendimiento)
+    mu_m = np.log1p(rendimiento_anual) / 12 - sigma_m ** 2 / 2
+    rng = np.random.default_rng(semilla)
+
+    corte = np.cumsum(pasos)
+    # Sólo se conservan los cierres de año y el final: la memoria no crece con los pasos mensuales
+    guardar = (corte % 12 == 0) | (corte == corte[-1]) if len(pasos) else np.zeros(0, dtype=bool)
+    corte = corte[guardar]
+
+    bloques = [
+        _bloque(rng, min(bloque, caminos - desde), saldo_inicial, aportacion_mensual, pasos, mu_m, sigma_m, guardar)
+        for desde in range(0, caminos, bloque)
+    ]
+    saldos = np.concatenate(bloques, axis=1) if bloques else np.empty((len(corte), 0))
+
+    bandas = pd.DataFrame(
+        np.percentile(saldos, PERCENTILES, axis=1).T if len(corte) else np.empty((0, len(PERCENTILES))),
+        index=pd.Index(corte, name="Mes"),
+        columns=[f"P{p}" for p in PERCENTILES],
+    )
+    # Línea de referencia: el interés compuesto de siempre, con aportaciones
+    tasa_m = (1 + rendimiento_anual) ** (1 / 12) - 1
+    meses_corte = corte.astype(float)
+    crecimiento = (1 + tasa_m) ** meses_corte
+    anualidad = meses_corte if tasa_m == 0 else (crecimiento - 1) / tasa_m
+    bandas["Sin volatilidad"] = saldo_inicial * crecimiento + aportacion_mensual * anualidad
+    bandas.loc[0] = [saldo_inicial] * len(bandas.columns)
+    bandas = bandas.sort_index()
+
+    probabilidad = None
+    if objetivo is not None and len(corte):
+        probabilidad = float((saldos[-1] >= objetivo).mean())
+    return {
+        "bandas": bandas,
+        "probabilidad": probabilidad,
+        "caminos": caminos,
+        "ms": (time.perf_counter() - inicio) * 1000,
+    }
+
+
+def probabilidad_metas(engine, username, aportacion_mensual, rendimiento_anual, volatilidad_anual, **opciones):
+    """Metas de `metas_financieras` del usuario con la probabilidad de cumplir cada una en su plazo."""
+    with engine.connect() as conn:
+        metas = pd.read_sql(
+            text("SELECT * FROM metas_financieras WHERE usuario = :u ORDER BY plazo_meses ASC"),
+            conn,
+            params={"u": username}
+        )
+    metas["meses_restantes"] = meses_restantes(metas)
+    metas["probabilidad"] = [
+        simular_ahorro(0 if pd.isna(meta["monto_actual"]) else meta["monto_actual"],
+                       aportacion_mensual, meta["meses_restantes"],
+                       rendimiento_anual, volatilidad_anual, objetivo=meta["monto_objetivo"], **opciones)["probabilidad"]
+        for _, meta in metas.iterrows()
+    ]
+    return metas
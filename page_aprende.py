@@ -1,6 +1,7 @@
 import streamlit as st
 import pandas as pd
-from sqlalchemy import create_engine, text
+from sqlalchemy import text
+from db import get_engine
 import streamlit.components.v1 as components
 import uuid
 from auth import load_authenticator
@@ -25,7 +26,7 @@ st.sidebar.success(f"Hola, {name}")
 authenticator.logout("Cerrar sesión", "sidebar")
 
 # ─── Conexión a la base y carga de perfil ─────────────────────────────
-engine = create_engine("sqlite:///transacciones.db")
+engine = get_engine()
 
 def obtener_perfil_ahorro(engine, username):
     with engine.connect() as conn:
@@ -1,26 +1,24 @@
 import streamlit as st
 import sqlite3
 from langchain.agents import initialize_agent, Tool, AgentType
-from langchain.chat_models import ChatOpenAI
 from langchain.tools import tool
 from langchain.schema import HumanMessage
 from guardrails import validate_prompt
+from flujo_tokens import responder_en_vivo
+from proveedores_llm import crear_llm
 import os
 
 # Configuración de la página (debe ir primero)
 
 st.title("💬 BILLIE - Agente de Productos Financieros")
 
-# API key para OpenRouter
-api_key = st.secrets["openrouter"]["api_key"]
-
-llm = ChatOpenAI(
-    openai_api_key=api_key,
-    base_url="https://openrouter.ai/api/v1",
-    model="mistralai/mixtral-8x7b-instruct",
-    temperature=0.2,
-    max_tokens=900,
-)
+# Modelo de OpenRouter (llave en st.secrets["openrouter"])
+llm = crear_llm({
+    "model": "mistralai/mixtral-8x7b-instruct",
+    "temperature": 0.2,
+    "max_tokens": 900,
+    "streaming": True,
+}, proveedor="openrouter")
 
 # ────────────────────────────────────────────────────────
 # Herramienta: búsqueda + resumen en múltiples tablas
@@ -112,6 +110,9 @@ if prompt := st.chat_input("Pregunta sobre finanzas personales, banca o inversi
         st.session_state.history.append({"role": "assistant", "content": refusal})
         st.chat_message("assistant").markdown(refusal)
     else:
-        response = llm([HumanMessage(content=prompt)])
-        st.session_state.history.append({"role": "assistant", "content": response.content})
-        st.chat_message("assistant").markdown(response.content)
+        # Preguntas generales (sin datos del usuario): la caché se comparte entre sesiones
+        with st.chat_message("assistant"):
+            respuesta = responder_en_vivo(
+                None, prompt, lambda cb: llm([HumanMessage(content=prompt)], callbacks=cb).content,
+                solo_respuesta_final=False)
+        st.session_state.history.append({"role": "assistant", "content": respuesta})
@@ -1,7 +1,7 @@
 # app.py
 import streamlit as st
 import pandas as pd
-from sqlalchemy import create_engine
+from db import get_engine
 from auth import load_authenticator
 from utils import (
     guardar_transaccion_usuario,cargar_transacciones_usuario,
@@ -10,14 +10,16 @@ from utils import (
     get_promedio_gastos, proyeccion_saldo_fin_mes, ranking_gastos_categorias, ranking_ingresos_categorias,
     porcentaje_gastos_por_categoria, alerta_gasto_excesivo, sugerencia_ahorro, buscar_transacciones,
     evolucion_balance, comparativa_gastos_mensual, gastos_recurrentes, sugerencia_presupuesto, simulador_sin_gasto_en,
-    get_total_ahorrado, get_total_asignado_metas, get_ahorro_disponible,get_resumen_metas, get_recomendacion_asignacion,construir_presupuesto_asistido,image_to_base64
+    get_total_ahorrado, get_total_asignado_metas, get_ahorro_disponible,get_resumen_metas, get_recomendacion_asignacion,construir_presupuesto_asistido,image_to_base64,
+    rango_mes, eliminar_transaccion_usuario
 )
 from agente import crear_agente
+from versiones import incrementar_version
 from datetime import datetime
 import re
 import locale
 from sqlalchemy import text
-import matplotlib.pyplot as plt
+from graficas import donut_html
 import math
 import uuid
 
@@ -76,8 +78,8 @@ elif authentication_status is None:
 st.sidebar.success(f"Hola, {name}")
 authenticator.logout("Cerrar sesión", "sidebar")
 
-# Conexión a la base SQLite
-engine = create_engine("sqlite:///transacciones.db")
+# Conexión compartida a la base (ver db.py)
+engine = get_engine()
 
 # Cargar datos del usuario
 if "transacciones" not in st.session_state:
@@ -217,8 +219,7 @@ if seccion == "registro":
 
         # Obtener mes y año actual
         hoy = datetime.today()
-        mes = f"{hoy.month:02d}"
-        anio = str(hoy.year)
+        inicio_mes, fin_mes = rango_mes(hoy.year, hoy.month)
 
         # Consultar gastos del mes actual por categoría
         with engine.connect() as conn:
@@ -227,12 +228,11 @@ if seccion == "registro":
                     SELECT Categoria, ABS(SUM(Monto)) as Gasto
                     FROM transacciones
                     WHERE Usuario = :usuario
-                    AND strftime('%m', Fecha) = :mes
-                    AND strftime('%Y', Fecha) = :anio
+                    AND Fecha >= :inicio AND Fecha < :fin
                     GROUP BY Categoria
                 """),
                 conn,
-                params={"usuario": username, "mes": mes, "anio": anio}
+                params={"usuario": username, "inicio": inicio_mes, "fin": fin_mes}
             )
 
         gastos_dict = df_gastos.set_index("Categoria")["Gasto"].to_dict()
@@ -247,22 +247,10 @@ if seccion == "registro":
             if math.isnan(gasto):
                 gasto = 0
 
-            restante = max(presupuesto - gasto, 0)
-            porcentaje = (gasto / presupuesto) if presupuesto else 0
-
-            fig, ax = plt.subplots(figsize=(1.7,1.7))
-            fig.patch.set_facecolor(color_fondo)
-            ax.pie(
-                [gasto, restante],
-                startangle=90,
-                colors=[color_donut, "#e0e0e0"],
-                wedgeprops={"width": 0.25, "edgecolor": "white"}
-            )
-            ax.set(aspect="equal")
-            plt.axis("off")
+            # SVG memorizado por valores y colores (ver graficas.py)
+            col.markdown(donut_html(presupuesto, gasto, color_fondo, color_donut), unsafe_allow_html=True)
 
             # Texto debajo del gráfico
-            col.pyplot(fig)
             col.markdown(f"""
                 <div style="background-color:{color_fondo};padding:1px;border-radius:20px;text-align:center;color:white">
                     <div style="font-size:18px;font-weight:bold">{categoria} {emoji}</div>
@@ -527,11 +515,7 @@ if seccion == "registro":
                         # Confirmación opcional (puedes quitar esto si no lo deseas)
                         # confirm = st.confirm(f"¿Borrar transacción ID {row['ID']}?")
                         # if confirm:
-                        with engine.begin() as conn:
-                            conn.execute(
-                                text("DELETE FROM transacciones WHERE ID = :id AND Usuario = :username"),
-                                {"id": row["ID"], "username": username}
-                            )
+                        eliminar_transaccion_usuario(engine, row["ID"], username)
                         st.session_state.transacciones = cargar_transacciones_usuario(engine, username)
                         st.rerun()
 
@@ -755,6 +739,7 @@ elif seccion == "ahorro":
                             "p": plazo,
                             "f": datetime.today().strftime("%Y-%m-%d")
                         })
+                        incrementar_version(conn, username)
                     st.success("🎯 Meta creada exitosamente.")
                     st.info("✔️ Cambios realizados. Por favor recarga la página para ver los resultados.")
 
@@ -803,6 +788,7 @@ elif seccion == "ahorro":
                                         SET monto_actual = monto_actual + :m
                                         WHERE id = :id
                                     """), {"m": monto_asignar, "id": row["id"]})
+                                    incrementar_version(conn, username)
                                 st.success("✅ Monto asignado correctamente.")
                                 st.info("✔️ Cambios realizados. Por favor recarga la página para ver los resultados.")
 
@@ -825,6 +811,7 @@ elif seccion == "ahorro":
                                     "p": nuevo_plazo,
                                     "id": row["id"]
                                 })
+                                incrementar_version(conn, username)
                             st.success("✏️ Meta actualizada.")
                             st.info("✔️ Cambios realizados. Por favor recarga la página para ver los resultados.")
 
@@ -836,6 +823,7 @@ elif seccion == "ahorro":
                         if submit_eliminar and confirmar_eliminar:
                             with engine.begin() as conn:
                                 conn.execute(text("DELETE FROM metas_financieras WHERE id = :id"), {"id": row["id"]})
+                                incrementar_version(conn, username)
                             st.success("Meta eliminada.")
                             st.info("✔️ Cambios realizados. Por favor recarga la página para ver los resultados.")
     
@@ -5,7 +5,8 @@ import os
 import requests
 from langchain.chat_models import ChatOpenAI
 from langchain.schema import HumanMessage
-from sqlalchemy import create_engine, text
+from sqlalchemy import text
+from db import get_engine
 from auth import load_authenticator
 import uuid
 from utils import (
@@ -62,7 +63,7 @@ st.sidebar.success(f"Hola, {name}")
 authenticator.logout("Cerrar sesión", "sidebar")
 
 # ─── Conexión a la base de datos ──────────────────────────────────────────
-engine = create_engine("sqlite:///transacciones.db")
+engine = get_engine()
 
 # ─── URLs desde GitHub ────────────────────────────────────────────────────
 modelo_url = "https://raw.githubusercontent.com/I-CV207/modelos_billia/main/modelo_perfil_ahorro.pkl"
@@ -5,14 +5,17 @@ import os
 import requests
 from langchain.chat_models import ChatOpenAI
 from langchain.schema import HumanMessage
-from sqlalchemy import create_engine, text
+from sqlalchemy import text
+from db import get_engine
 from auth import load_authenticator
 import uuid
 from utils import (
     cargar_fondos_desde_db, construir_prompt_recomendaciones_fondos, simular_inversion,
-    calcular_evolucion_anual, obtener_perfil_ahorro,forecast_yf_ticker
+    calcular_evolucion_anual, obtener_perfil_ahorro
 )
 from agente_inversion import crear_agente_inversion
+from pronosticos import pronosticar_tickers
+from flujo_tokens import transmitir
 import matplotlib.pyplot as plt
 
 
@@ -62,7 +65,7 @@ st.sidebar.success(f"Hola, {name}")
 authenticator.logout("Cerrar sesión", "sidebar")
 
 # ─── Conexión a la base de datos ──────────────────────────────────────────
-engine = create_engine("sqlite:///transacciones.db")
+engine = get_engine()
 
 # ─── URLs desde GitHub ────────────────────────────────────────────────────
 modelo_url = "https://raw.githubusercontent.com/I-CV207/modelos_billia/main/modelo_perfil_ahorro.pkl"
@@ -341,7 +344,12 @@ else:
 
     if st.button("Recomiendame donde invertir"):
         st.session_state.mostrar_recomendaciones = True
-        st.session_state.respuesta_agente = agente.run(prompt)
+        # Se transmite en vivo; al terminar se muestra en el recuadro de abajo
+        marco = st.empty()
+        with marco.container():
+            st.session_state.respuesta_agente = st.write_stream(
+                transmitir(lambda cb: agente.run(prompt, callbacks=cb)))
+        marco.empty()
 
     if st.session_state.mostrar_recomendaciones:
         
@@ -382,32 +390,33 @@ else:
             st.warning("⚠️ No se pudieron identificar los fondos recomendados. Mostrando los primeros del perfil.")
             fondos_simulables = df_fondos[df_fondos["riesgo"].str.lower() == perfil_riesgo.lower()].dropna(subset=["ticker"]).head(3)
         
-        # Ejecutar simulaciones y guardar resultados
-        resultados_simulacion = []
-        for _, row in fondos_simulables.iterrows():
-            with st.spinner(f"Simulando {row['fondo']} con datos reales..."):
-                resultado, cagr, model, df_hist, forecast = forecast_yf_ticker(row["ticker"], monto_inicial, años)
+        # Ejecutar simulaciones (todas a la vez) y mostrar cada tarjeta en cuanto termina
+        filas_fondos = [row for _, row in fondos_simulables.iterrows()]
+        resultados_simulacion = [None] * len(filas_fondos)
+        cols = st.columns(len(filas_fondos))
+        with st.spinner(f"Simulando {len(filas_fondos)} fondos con datos reales..."):
+            for i, (resultado, cagr, model, df_hist, forecast) in pronosticar_tickers(
+                    [row["ticker"] for row in filas_fondos], monto_inicial, años):
+                row = filas_fondos[i]
                 if resultado and model:
                     fecha_corte = model.history['ds'].max()
                 else:
                     fecha_corte = None
-                resultados_simulacion.append((row, resultado, cagr, forecast, fecha_corte))
-
-        # Mostrar resumen estilo tarjetas con resultados
-        cols = st.columns(len(resultados_simulacion))
-        for i, (row, resultado, cagr, _,_) in enumerate(resultados_simulacion):
-            with cols[i]:
-                st.markdown(f"""
-                <div style='background-color: #515052; padding: 15px; border-radius: 10px; color: white; text-align: center; min-height: 200px;'>
-                    <div style='font-size: 20px; font-weight: bold;'> ${resultado:,.2f}</div>
-                    <div style='font-size: 18px; margin-top: 5px;'> CAGR: {cagr * 100:.2f}%</div>
-                    <div style='font-size: 16px; font-weight: bold;'>{row['administradora_del_fondo']}</div>
-                    <div style='font-size: 14px;'>{row['fondo']}</div>
-                    <div style='font-size: 14px;'>{row['ticker']}</div>
-                    <div style='font-size: 13px; margin-top: 5px;'>Liquidez-{row['liquidez']} | ⏳ {row['horizonte']}</div>
-                    <div style='margin-top: 10px; font-size: 12px;'>Accede aquí ⏩</div>
-                </div>
-                """, unsafe_allow_html=True)
+                resultados_simulacion[i] = (row, resultado, cagr, forecast, fecha_corte)
+
+                # Resumen estilo tarjeta con el resultado
+                with cols[i]:
+                    st.markdown(f"""
+                    <div style='background-color: #515052; padding: 15px; border-radius: 10px; color: white; text-align: center; min-height: 200px;'>
+                        <div style='font-size: 20px; font-weight: bold;'> ${resultado:,.2f}</div>
+                        <div style='font-size: 18px; margin-top: 5px;'> CAGR: {cagr * 100:.2f}%</div>
+                        <div style='font-size: 16px; font-weight: bold;'>{row['administradora_del_fondo']}</div>
+                        <div style='font-size: 14px;'>{row['fondo']}</div>
+                        <div style='font-size: 14px;'>{row['ticker']}</div>
+                        <div style='font-size: 13px; margin-top: 5px;'>Liquidez-{row['liquidez']} | ⏳ {row['horizonte']}</div>
+                        <div style='margin-top: 10px; font-size: 12px;'>Accede aquí ⏩</div>
+                    </div>
+                    """, unsafe_allow_html=True)
 
         # Mostrar gráfica individual al seleccionar un fondo recomendado
         st.markdown("## Explora la proyección de cada fondo")
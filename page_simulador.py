@@ -1,5 +1,9 @@
 import streamlit as st
 import pandas as pd
+import matplotlib.pyplot as plt
+from db import get_engine
+from montecarlo import parametros_ticker, probabilidad_metas, simular_ahorro
+from utils import cargar_fondos_desde_db
 
 # ---- Page Configuration ----
 #st.set_page_config(page_title="Fintruth - Simulador de Ahorro", layout="centered")
@@ -25,20 +29,92 @@ with col3:
 # Convert interest rate to decimal
 interest_rate = interest_rate_percent / 100
 
+# ---- Monte Carlo Inputs ----
+st.markdown("### 🎲 Escenarios")
+col4, col5, col6 = st.columns(3)
+with col4:
+    monthly_contribution = st.number_input("Aportación mensual ($)", min_value=0, value=0, step=100)
+with col5:
+    fuente = st.radio("Rendimiento y volatilidad", ["Tasa elegida", "Historia de un fondo"], horizontal=True)
+with col6:
+    volatility_percent = st.slider("Volatilidad anual (%)", 0, 40, 10, disabled=fuente != "Tasa elegida")
+
+volatility = volatility_percent / 100
+if fuente == "Historia de un fondo":
+    df_fondos = cargar_fondos_desde_db(get_engine()).dropna(subset=["ticker"])
+    fondo = st.selectbox("Fondo del catálogo", df_fondos["fondo"] + " (" + df_fondos["ticker"] + ")")
+    ticker = fondo.rsplit("(", 1)[1].rstrip(")")
+    try:
+        interest_rate, volatility = parametros_ticker(ticker)
+        st.caption(f"Con la historia de {ticker}: rendimiento anual {interest_rate:.2%}, volatilidad {volatility:.2%}")
+    except Exception as e:
+        st.warning(f"No hay suficiente historia de {ticker} ({e}); se usa la tasa elegida.")
+
+# Meta: una de metas_financieras si hay sesión, o un monto libre. `probabilidad_metas` trae cada meta
+# con su plazo restante y la probabilidad de cumplirla con la aportación, tasa y volatilidad elegidas
+metas = pd.DataFrame()
+usuario = st.session_state.get("username")
+if usuario:
+    metas = probabilidad_metas(get_engine(), usuario, monthly_contribution, interest_rate, volatility)
+if not metas.empty:
+    st.markdown("**🎯 Probabilidad de cumplir tus metas en su plazo**")
+    st.dataframe(
+        metas[["nombre_meta", "monto_actual", "monto_objetivo", "meses_restantes"]].assign(
+            probabilidad=metas["probabilidad"] * 100).rename(columns={
+            "nombre_meta": "Meta", "monto_actual": "Llevas", "monto_objetivo": "Objetivo",
+            "meses_restantes": "Meses restantes", "probabilidad": "Probabilidad"}),
+        column_config={
+            "Llevas": st.column_config.NumberColumn(format="$%.0f"),
+            "Objetivo": st.column_config.NumberColumn(format="$%.0f"),
+            "Probabilidad": st.column_config.ProgressColumn(format="%.0f%%", min_value=0, max_value=100),
+        },
+        hide_index=True, use_container_width=True
+    )
+opciones_meta = ["Monto libre"] + metas["nombre_meta"].tolist() if not metas.empty else ["Monto libre"]
+meta_elegida = st.selectbox("Meta", opciones_meta)
+saldo_inicial, meses = initial_capital, int(years) * 12
+if meta_elegida == "Monto libre":
+    goal = st.number_input("Monto objetivo ($)", min_value=0, value=0, step=1000)
+else:
+    # La meta se simula desde lo que ya lleva ahorrado y sólo por el plazo que le queda
+    meta = metas.loc[metas["nombre_meta"] == meta_elegida].iloc[0]
+    goal = float(meta["monto_objetivo"])
+    saldo_inicial = 0.0 if pd.isna(meta["monto_actual"]) else float(meta["monto_actual"])
+    meses = int(meta["meses_restantes"])
+    st.caption(f"Se simula desde los ${saldo_inicial:,.0f} que ya llevas en la meta hasta el fin de su plazo "
+               f"({meses} mes{'es' if meses != 1 else ''}); el capital inicial y los años de arriba no se usan.")
+
 # ---- Simulation ----
 #years = 20
-capital_over_time = [round(initial_capital * (1 + interest_rate) ** year,2) for year in range(years + 1)]
-
-df = pd.DataFrame({
-    "Año": list(range(years + 1)),
-    "Valor acumulado ($)": capital_over_time
-})
+simulacion = simular_ahorro(saldo_inicial, monthly_contribution, meses, interest_rate, volatility,
+                            objetivo=goal or None)
+bandas = simulacion["bandas"]
+bandas.index = bandas.index / 12
 
 # ---- Results ----
 st.markdown("### 📈 Crecimiento proyectado del ahorro")
-st.line_chart(df.set_index("Año"))
+fig, ax = plt.subplots(figsize=(8, 4))
+ax.fill_between(bandas.index, bandas["P5"], bandas["P95"], color="#56A163", alpha=0.25, label="90% de los escenarios")
+ax.plot(bandas.index, bandas["P50"], color="#56A163", linewidth=2, label="Escenario medio (P50)")
+ax.plot(bandas.index, bandas["Sin volatilidad"], color="#515052", linestyle="--", label="Interés compuesto")
+if goal:
+    ax.axhline(goal, color="#f9e423", linewidth=1.5, label="Meta")
+ax.set_xlabel("Año")
+ax.set_ylabel("Valor acumulado ($)")
+ax.yaxis.set_major_formatter(lambda valor, _: f"${valor:,.0f}")
+ax.legend(loc="upper left", frameon=False)
+st.pyplot(fig, use_container_width=True)
+plt.close(fig)
 
 # ---- Summary ----
-final_amount = capital_over_time[-1]
+plazo = f"{meses // 12} años" if meses % 12 == 0 else f"{meses} mes{'es' if meses != 1 else ''}"
+final = bandas.iloc[-1]
+# La misma línea punteada de la gráfica: interés compuesto con las aportaciones
+final_amount = final["Sin volatilidad"]
+aportaciones = f" y aportando **${monthly_contribution:,.0f} al mes**" if monthly_contribution else ""
 
-st.markdown(f"**📌 Resultado:** Después de **{years} años**, tu capital crecería a **${final_amount:,.2f}** con una tasa de interés del **{interest_rate_percent}% anual**.")
+st.markdown(f"**📌 Resultado:** Después de **{plazo}**, tu capital crecería a **${final_amount:,.2f}** con una tasa de interés del **{interest_rate:.2%} anual**{aportaciones}.")
+st.markdown(f"**🎲 Con {simulacion['caminos']:,} escenarios:** en 9 de cada 10 terminarías entre "
+            f"**${final['P5']:,.0f}** y **${final['P95']:,.0f}**; a la mitad, arriba de **${final['P50']:,.0f}**.")
+if simulacion["probabilidad"] is not None:
+    st.markdown(f"**🎯 Probabilidad de llegar a ${goal:,.0f}:** {simulacion['probabilidad']:.0%}")
@@ -1,23 +1,30 @@
 # app.py
 import streamlit as st
 import pandas as pd
-from sqlalchemy import create_engine
+from db import get_engine
 from auth import load_authenticator
 from utils import (
-    guardar_transaccion_usuario,cargar_transacciones_usuario,
     get_total_spent, get_total_earned, registrar_transaccion_desde_texto, get_ultimas_transacciones,
     resumen_mensual, get_balance_actual, get_gastos_por_categoria,
     get_promedio_gastos, proyeccion_saldo_fin_mes, ranking_gastos_categorias, ranking_ingresos_categorias,
     porcentaje_gastos_por_categoria, alerta_gasto_excesivo, sugerencia_ahorro, buscar_transacciones,
     evolucion_balance, comparativa_gastos_mensual, gastos_recurrentes, sugerencia_presupuesto, simulador_sin_gasto_en,
-    get_total_ahorrado, get_total_asignado_metas, get_ahorro_disponible,get_resumen_metas, get_recomendacion_asignacion,construir_presupuesto_asistido,image_to_base64
+    get_total_ahorrado, get_total_asignado_metas, get_ahorro_disponible,get_resumen_metas, get_recomendacion_asignacion,construir_presupuesto_asistido,image_to_base64,
+    rango_mes
 )
-from agente import crear_agente
+from agente import obtener_agente, obtener_asistente, liberar_agentes
+from enrutador import responder
+from flujo_tokens import responder_en_vivo
+from versiones import incrementar_version
+from resumenes import leer_resumen_mensual
+from importador import importar_estado_cuenta
+from paginacion import TAMANO_PAGINA, contar_transacciones, pagina_transacciones
+from sesion_transacciones import eliminar_en_sesion, guardar_en_sesion, sincronizar_sesion
 from datetime import datetime
 import re
 import locale
 from sqlalchemy import text
-import matplotlib.pyplot as plt
+from graficas import donut_html
 import math
 import uuid
 
@@ -70,18 +77,22 @@ if authentication_status is False:
     st.error("❌ Usuario o contraseña incorrectos.")
     st.stop()
 elif authentication_status is None:
+    # Al cerrar sesión se descarta el agente en caché del usuario
+    if "usuario_agente" in st.session_state:
+        liberar_agentes(st.session_state.pop("usuario_agente"))
     st.warning("🔐 Por favor inicia sesión.")
     st.stop()
 
+st.session_state.usuario_agente = username
+
 st.sidebar.success(f"Hola, {name}")
 authenticator.logout("Cerrar sesión", "sidebar")
 
-# Conexión a la base SQLite
-engine = create_engine("sqlite:///transacciones.db")
+# Conexión compartida a la base (ver db.py)
+engine = get_engine()
 
-# Cargar datos del usuario
-if "transacciones" not in st.session_state:
-    st.session_state.transacciones = cargar_transacciones_usuario(engine, username)
+# Cargar datos del usuario; en cada rerun sólo se leen los cambios hechos por fuera (ver sesion_transacciones.py)
+sincronizar_sesion(engine, username)
 
 # ───────────────────────────────────────
 # Navegación visual personalizada
@@ -122,7 +133,6 @@ if seccion == "registro":
     # Sección: Aistente presupuesto
     # ────────────────────────────────    
     
-    agent = crear_agente(username, engine)
 
     # Botón para activar asistente de presupuesto
     if "mostrar_asistente_presupuesto" not in st.session_state:
@@ -217,8 +227,7 @@ if seccion == "registro":
 
         # Obtener mes y año actual
         hoy = datetime.today()
-        mes = f"{hoy.month:02d}"
-        anio = str(hoy.year)
+        inicio_mes, fin_mes = rango_mes(hoy.year, hoy.month)
 
         # Consultar gastos del mes actual por categoría
         with engine.connect() as conn:
@@ -227,12 +236,11 @@ if seccion == "registro":
                     SELECT Categoria, ABS(SUM(Monto)) as Gasto
                     FROM transacciones
                     WHERE Usuario = :usuario
-                    AND strftime('%m', Fecha) = :mes
-                    AND strftime('%Y', Fecha) = :anio
+                    AND Fecha >= :inicio AND Fecha < :fin
                     GROUP BY Categoria
                 """),
                 conn,
-                params={"usuario": username, "mes": mes, "anio": anio}
+                params={"usuario": username, "inicio": inicio_mes, "fin": fin_mes}
             )
 
         gastos_dict = df_gastos.set_index("Categoria")["Gasto"].to_dict()
@@ -247,22 +255,10 @@ if seccion == "registro":
             if math.isnan(gasto):
                 gasto = 0
 
-            restante = max(presupuesto - gasto, 0)
-            porcentaje = (gasto / presupuesto) if presupuesto else 0
-
-            fig, ax = plt.subplots(figsize=(1.7,1.7))
-            fig.patch.set_facecolor(color_fondo)
-            ax.pie(
-                [gasto, restante],
-                startangle=90,
-                colors=[color_donut, "#e0e0e0"],
-                wedgeprops={"width": 0.25, "edgecolor": "white"}
-            )
-            ax.set(aspect="equal")
-            plt.axis("off")
+            # SVG memorizado por valores y colores (ver graficas.py)
+            col.markdown(donut_html(presupuesto, gasto, color_fondo, color_donut), unsafe_allow_html=True)
 
             # Texto debajo del gráfico
-            col.pyplot(fig)
             col.markdown(f"""
                 <div style="background-color:{color_fondo};padding:1px;border-radius:20px;text-align:center;color:white">
                     <div style="font-size:18px;font-weight:bold">{categoria} {emoji}</div>
@@ -341,10 +337,16 @@ if seccion == "registro":
                 - Si no hay registros, invítalo a comenzar.
                 """
 
+                # Se transmite en vivo y al terminar se reemplaza por el recuadro con formato
+                marco = st.empty()
                 try:
-                    respuesta_billie = agent.run(prompt_analisis)
+                    with marco.container():
+                        respuesta_billie = responder_en_vivo(
+                            username, prompt_analisis,
+                            lambda cb: obtener_agente(username).run(prompt_analisis, callbacks=cb))
                 except Exception as e:
                     respuesta_billie = "Billie no pudo hacer el análisis."
+                marco.empty()
 
                 st.markdown(f"""
                     <div style='font-size: 14px; line-height: 1.6;'>
@@ -436,14 +438,12 @@ if seccion == "registro":
         # Input de texto personalizado
         user_prompt_registro = st.chat_input(placeholder="O pregunta lo que quieras...",key=f"user_input_registro_{username}")
         # Ejecutar si hay algo que responder
+        # Registrar escribe en la base: nunca se responde desde la caché
         if user_prompt_registro:
-            with st.spinner("BILLIE está pensando..."):
-                respuesta = agent.run(user_prompt_registro)
-
-        # Mostrar respuesta (solo una sección visible)
-        if respuesta:
             st.markdown("### Respuesta")
-            st.markdown(respuesta)
+            respuesta = responder_en_vivo(
+                username, user_prompt_registro,
+                lambda cb: obtener_agente(username).run(user_prompt_registro, callbacks=cb), usar_cache=False)
 
 
     # ───────────────────────────────────────
@@ -462,9 +462,34 @@ if seccion == "registro":
             submitted = st.form_submit_button("Agregar")
 
             if submitted:
-                guardar_transaccion_usuario(engine, fecha, categoria, cuenta, monto, username,descripcion)
+                guardar_en_sesion(engine, fecha, categoria, cuenta, monto, username,descripcion)
                 st.success("✅ Transacción registrada.")
-                st.session_state.transacciones = cargar_transacciones_usuario(engine, username)
+                st.rerun()
+
+    # Importación masiva desde el estado de cuenta del banco
+    with st.expander("Importar estado de cuenta (CSV / OFX)"):
+        if "resultado_importacion" in st.session_state:
+            st.success(st.session_state.pop("resultado_importacion"))
+        archivo_banco = st.file_uploader("Archivo del banco", type=["csv", "ofx", "qfx"], key=f"importar_{username}")
+        cuenta_importada = st.text_input("Cuenta (opcional)", key=f"cuenta_importada_{username}")
+        if archivo_banco is not None and st.button("Importar movimientos"):
+            barra = st.progress(0.0, text="Importando movimientos...")
+            tamano = max(archivo_banco.size, 1)
+            try:
+                resultado = importar_estado_cuenta(
+                    engine, archivo_banco, username, cuenta=cuenta_importada or None,
+                    progreso=lambda c: barra.progress(min(archivo_banco.tell() / tamano, 1.0),
+                                                      text=f"{c['leidas']:,} movimientos leídos...")
+                )
+            except ValueError as e:
+                barra.empty()
+                st.error(f"❌ No se pudo importar el archivo: {e}")
+            else:
+                st.session_state.resultado_importacion = (
+                    f"✅ {resultado['insertadas']:,} movimientos importados · "
+                    f"{resultado['duplicadas']:,} duplicados omitidos · {resultado['invalidas']:,} filas no válidas"
+                )
+                # El rerun trae sólo los movimientos importados
                 st.rerun()
 
     # Mostrar tabla solo si hay transacciones
@@ -492,48 +517,66 @@ if seccion == "registro":
         ]
 
         with st.expander("Eliminar transacciones registradas"):
-            st.markdown("""
-            <style>
-                .tabla-header div {
-                    font-weight: bold;
-                    border-bottom: 1px solid #ccc;
-                    padding: 6px 0;
-                }
-            </style>
-            """, unsafe_allow_html=True)
-
-            header = st.columns([0.5, 1.2,1.5, 1.5, 1.5, 1, 0.7])
-            header[0].markdown("**ID**")
-            header[1].markdown("**Fecha**")
-            header[2].markdown("**Descripcion**")
-            header[3].markdown("**Categoría**")
-            header[4].markdown("**Cuenta**")
-            header[5].markdown("**Monto**")
-            header[6].markdown("**Acción**")
+            if "resultado_eliminacion" in st.session_state:
+                st.success(st.session_state.pop("resultado_eliminacion"))
+
+            # Filtros con las opciones del resumen mensual; se aplican en la consulta (ver paginacion.py)
+            resumen_usuario = leer_resumen_mensual(engine, username)
+            col_mes, col_categoria = st.columns(2)
+            mes_filtro = col_mes.selectbox(
+                "Mes", ["Todos"] + sorted(resumen_usuario["Mes"].unique(), reverse=True), key=f"eliminar_mes_{username}")
+            categoria_filtro = col_categoria.selectbox(
+                "Categoría", ["Todas"] + sorted(c for c in resumen_usuario["Categoria"].unique() if c),
+                key=f"eliminar_categoria_{username}")
+            mes_filtro = None if mes_filtro == "Todos" else mes_filtro
+            categoria_filtro = None if categoria_filtro == "Todas" else categoria_filtro
+
+            # Pila de cursores: el último es donde empieza la página actual; se reinicia al cambiar filtros
+            if st.session_state.get("eliminar_filtros") != (mes_filtro, categoria_filtro):
+                st.session_state.eliminar_filtros = (mes_filtro, categoria_filtro)
+                st.session_state.eliminar_cursores = [None]
+            cursores = st.session_state.eliminar_cursores
+            pagina, siguiente = pagina_transacciones(engine, username, cursores[-1], mes_filtro, categoria_filtro)
+
+            if pagina.empty and len(cursores) > 1:
+                # Se borró todo lo que quedaba en esta página: regresa a la anterior
+                cursores.pop()
+                st.rerun()
+            if pagina.empty:
+                st.info("No hay transacciones con esos filtros.")
+            else:
+                # La tabla de Streamlit sólo dibuja las filas visibles; la casilla marca las que se van a borrar
+                editada = st.data_editor(
+                    pagina.assign(Eliminar=False),
+                    hide_index=True,
+                    use_container_width=True,
+                    height=400,
+                    disabled=list(pagina.columns),
+                    column_config={
+                        "Monto": st.column_config.NumberColumn(format="$%.2f"),
+                        "Eliminar": st.column_config.CheckboxColumn("🗑️"),
+                    },
+                    key=f"eliminar_tabla_{username}_{mes_filtro}_{categoria_filtro}_{len(cursores)}"
+                )
+                seleccion = editada.loc[editada["Eliminar"], "ID"].tolist()
+
+                total = contar_transacciones(resumen_usuario, mes_filtro, categoria_filtro)
+                col_anterior, col_pagina, col_siguiente = st.columns([1, 2, 1])
+                if col_anterior.button("← Más recientes", disabled=len(cursores) == 1, key=f"eliminar_anterior_{username}"):
+                    cursores.pop()
+                    st.rerun()
+                col_pagina.caption(
+                    f"Página {len(cursores)} de {max(math.ceil(total / TAMANO_PAGINA), 1)} · {total:,} transacciones")
+                if col_siguiente.button("Más antiguas →", disabled=siguiente is None, key=f"eliminar_siguiente_{username}"):
+                    cursores.append(siguiente)
+                    st.rerun()
 
-            
-            #Edicion de registros
-            for idx, row in df.iterrows():
-                with st.container():
-                    cols = st.columns([0.5, 1.2,1.5, 1.5, 1.5, 1, 0.7])
-                    cols[0].write(row["ID"])
-                    cols[1].write(row["Fecha"])
-                    cols[2].write(row["Descripcion"])
-                    cols[3].write(row["Categoria"])
-                    cols[4].write(row["Cuenta"])
-                    cols[5].write(f"${row['Monto']:,.2f}")
-
-                    if cols[6].button("🗑️", key=f"delete_{row['ID']}_{idx}"):
-                        # Confirmación opcional (puedes quitar esto si no lo deseas)
-                        # confirm = st.confirm(f"¿Borrar transacción ID {row['ID']}?")
-                        # if confirm:
-                        with engine.begin() as conn:
-                            conn.execute(
-                                text("DELETE FROM transacciones WHERE ID = :id AND Usuario = :username"),
-                                {"id": row["ID"], "username": username}
-                            )
-                        st.session_state.transacciones = cargar_transacciones_usuario(engine, username)
-                        st.rerun()
+                if st.button(f"Eliminar seleccionadas ({len(seleccion)})", disabled=not seleccion,
+                             key=f"eliminar_seleccion_{username}"):
+                    # Un solo DELETE ... WHERE ID IN (...); el cursor de la página sigue siendo válido
+                    eliminadas = eliminar_en_sesion(engine, seleccion, username)
+                    st.session_state.resultado_eliminacion = f"✅ {eliminadas:,} transacciones eliminadas."
+                    st.rerun()
 
 # ─────────────────────────────────────────────────────────────
 # Sección: Ver métricas y consultar a BILLIE (agente financiero)
@@ -561,15 +604,10 @@ elif seccion == "dashboard":
         mes_numero = datetime.now().month
         anio_actual = datetime.now().year
 
-        # Filtrar transacciones del mes actual
-        df_mes = df[
-            (pd.to_datetime(df["Fecha"]).dt.month == mes_numero) &
-            (pd.to_datetime(df["Fecha"]).dt.year == anio_actual)
-        ]
-
-        # Calcular métricas del mes actual
-        ingresos = df_mes[(df_mes["Monto"] > 0)&(df_mes["Usuario"]==username)]["Monto"].sum()
-        gastos = df_mes[(df_mes["Monto"] < 0)&(df_mes["Usuario"]==username)]["Monto"].sum()
+        # Métricas del mes actual desde el resumen mensual incremental
+        resumen_mes = leer_resumen_mensual(engine, username, mes=f"{anio_actual}-{mes_numero:02d}")
+        ingresos = resumen_mes["Ingresos"].sum()
+        gastos = resumen_mes["Gastos"].sum()
         balance = ingresos + gastos
         ahorro_pct = (balance / ingresos * 100) if ingresos > 0 else 0
 
@@ -607,8 +645,7 @@ elif seccion == "dashboard":
  
 
   
-        # Agente
-        agent = crear_agente(username, engine)
+        # Agente: se construye al primer uso y se reutiliza (ver agente.RegistroAgentes)
 
         # ────────────────
         # ESTILO PERSONALIZADO
@@ -695,15 +732,12 @@ elif seccion == "dashboard":
         if user_prompt_dashboard:
             pregunta_seleccionada = user_prompt_dashboard
 
-        # Ejecutar si hay algo que responder
+        # Ejecutar si hay algo que responder; las preguntas conocidas no pasan por el LLM
         if pregunta_seleccionada:
-            with st.spinner("BILLIE está pensando..."):
-                respuesta = agent.run(pregunta_seleccionada)
-
-        # Mostrar respuesta (solo una sección visible)
-        if respuesta:
             st.markdown("### Respuesta")
-            st.markdown(respuesta)
+            respuesta = responder_en_vivo(
+                username, pregunta_seleccionada,
+                lambda cb: responder(pregunta_seleccionada, username, callbacks=cb))
 # ─────────────────────────────────────────────────────────────
 # Sección: Ver ahorro y metas financieras (agente financiero)
 # ─────────────────────────────────────────────────────────────
@@ -755,6 +789,7 @@ elif seccion == "ahorro":
                             "p": plazo,
                             "f": datetime.today().strftime("%Y-%m-%d")
                         })
+                        incrementar_version(conn, username)
                     st.success("🎯 Meta creada exitosamente.")
                     st.info("✔️ Cambios realizados. Por favor recarga la página para ver los resultados.")
     st.markdown("### Metas financieras")
@@ -840,6 +875,7 @@ elif seccion == "ahorro":
                                     SET monto_actual = monto_actual + :m
                                     WHERE id = :id
                                 """), {"m": monto_asignar, "id": row["id"]})
+                                incrementar_version(conn, username)
                             st.success("✅ Monto asignado correctamente.")
                             st.info("✔️ Cambios realizados. Por favor recarga la página para ver los resultados.")
 
@@ -862,6 +898,7 @@ elif seccion == "ahorro":
                                 "p": nuevo_plazo,
                                 "id": row["id"]
                             })
+                            incrementar_version(conn, username)
                         st.success("✏️ Meta actualizada.")
                         st.info("✔️ Cambios realizados. Por favor recarga la página para ver los resultados.")
 
@@ -873,27 +910,23 @@ elif seccion == "ahorro":
                     if submit_eliminar and confirmar_eliminar:
                         with engine.begin() as conn:
                             conn.execute(text("DELETE FROM metas_financieras WHERE id = :id"), {"id": row["id"]})
+                            incrementar_version(conn, username)
                         st.success("Meta eliminada.")
                         st.info("✔️ Cambios realizados. Por favor recarga la página para ver los resultados.")
 
             st.markdown("</div>", unsafe_allow_html=True)
 
     
-        #Insertar agente
-    agent = crear_agente(username, engine)
         #Set respuesta a None
     respuesta = None
     # Input de texto personalizado
     user_prompt_ahorro = st.chat_input(placeholder="Pregunta a BILLIE sobre tus metas...", key=f"user_input_ahorro_{username}")
     # Ejecutar si hay algo que responder
     if user_prompt_ahorro:
-        with st.spinner("BILLIE está pensando..."):
-            respuesta = agent.run(user_prompt_ahorro)
-
-        # Mostrar respuesta (solo una sección visible)
-    if respuesta:
         st.markdown("### Respuesta")
-        st.markdown(respuesta)
+        respuesta = responder_en_vivo(
+            username, user_prompt_ahorro,
+            lambda cb: obtener_asistente(username).run(user_prompt_ahorro, callbacks=cb))
     
     st.markdown(
         """
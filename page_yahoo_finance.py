@@ -1,7 +1,8 @@
 import streamlit as st
-import yfinance as yf
+import pandas as pd
 import matplotlib.pyplot as plt
 import plotly.graph_objects as go
+from precios import historial_precios, info_ticker
 
 # Configuración de la página
 #st.set_page_config(page_title="📈 Stock Info", layout="centered")
@@ -11,13 +12,11 @@ st.title("📊 Consulta de acciones - Yahoo Finance")
 # Input del usuario
 ticker_symbol = st.text_input("Escribe el símbolo del ticker (Ej: AAPL, MSFT, TSLA):", "VOO")
 
-# Obtener datos de Yahoo Finance
+# Obtener datos de Yahoo Finance (del almacén local; ver precios.py)
 try:
-    stock = yf.Ticker(ticker_symbol)
-
     # Información general
     st.subheader("📌 Información general")
-    info = stock.info
+    info = info_ticker(ticker_symbol)
     st.markdown(f"**Nombre:** {info.get('longName', 'N/A')}")
     st.markdown(f"**Sector:** {info.get('sector', 'N/A')}")
     st.markdown(f"**Precio actual:** ${info.get('currentPrice', 'N/A')}")
@@ -29,7 +28,7 @@ try:
     ##############-*******************************************************
     st.subheader("📈 Precio histórico (últimos 6 meses)")
 
-    hist = stock.history(period="6mo")
+    hist = historial_precios(ticker_symbol, desde=pd.Timestamp.today() - pd.DateOffset(months=6))
 
     fig = go.Figure()
     fig.add_trace(go.Scatter(
@@ -0,0 +1,77 @@
+"""
+paginacion.py – Transacciones de un usuario por páginas, con cursor
+===================================================================
+La tabla "Eliminar transacciones registradas" de `page_tu_dinero.py` pintaba
+una fila de widgets por cada transacción del historial. Ahora pide a SQL una
+página a la vez, de la más reciente a la más antigua:
+
+    SELECT ... FROM transacciones
+    WHERE Usuario = :u [AND Fecha >= :inicio AND Fecha < :fin] [AND Categoria = :cat]
+      AND Fecha <= :fecha AND (Fecha < :fecha OR ID < :id)
+    ORDER BY Fecha DESC, ID DESC LIMIT :n
+
+El cursor es (Fecha, ID) de la última fila mostrada, así que la página 200
+cuesta lo mismo que la primera (con OFFSET, SQLite recorre y descarta todas
+las filas anteriores). ID es la llave primaria entera y los índices
+(Usuario, Fecha) y (Usuario, Categoria, Fecha) ya entregan las filas en ese
+orden; `Fecha <= :fecha` es el rango que SQLite usa para saltar al cursor.
+
+El total de "página x de y" y las opciones de los filtros salen de
+`resumen_mensual_usuario` (ver resumenes.py), sin contar sobre transacciones.
+
+$ python -m benchmarks.bench_paginacion
+"""
+import pandas as pd
+from sqlalchemy import text
+
+TAMANO_PAGINA = 50
+COLUMNAS = ["ID", "Fecha", "Descripcion", "Categoria", "Cuenta", "Monto"]
+
+
+def _rango_mes(mes):
+    # Límites ISO [inicio, fin) de un mes 'YYYY-MM', igual que utils.rango_mes
+    anio, numero = int(mes[:4]), int(mes[5:7])
+    return f"{mes}-01", f"{anio + 1}-01-01" if numero == 12 else f"{anio}-{numero + 1:02d}-01"
+
+
+def pagina_transacciones(engine, username, cursor=None, mes=None, categoria=None, tamano=TAMANO_PAGINA):
+    """Hasta `tamano` transacciones posteriores a `cursor` (en orden de la más reciente).
+
+    `mes` es 'YYYY-MM'. Devuelve (DataFrame, cursor de la siguiente página o
+    None si ya no hay más).
+    """
+    condiciones = ["Usuario = :u"]
+    params = {"u": username, "n": tamano + 1}
+    if mes:
+        condiciones.append("Fecha >= :inicio AND Fecha < :fin")
+        params["inicio"], params["fin"] = _rango_mes(mes)
+    if categoria:
+        condiciones.append("Categoria = :cat")
+        params["cat"] = categoria
+    if cursor is not None:
+        condiciones.append("Fecha <= :fecha AND (Fecha < :fecha OR ID < :id)")
+        params["fecha"], params["id"] = cursor[0], int(cursor[1])
+    with engine.connect() as conn:
+        pagina = pd.read_sql_query(
+            text(f"""
+                SELECT {', '.join(COLUMNAS)} FROM transacciones
+                WHERE {' AND '.join(condiciones)}
+                ORDER BY Fecha DESC, ID DESC LIMIT :n
+            """),
+            conn,
+            params=params
+        )
+    # Se pide una fila de más sólo para saber si hay otra página
+    if len(pagina) <= tamano:
+        return pagina, None
+    pagina = pagina.iloc[:tamano]
+    return pagina, (pagina["Fecha"].iloc[-1], int(pagina["ID"].iloc[-1]))
+
+
+def contar_transacciones(resumen, mes=None, categoria=None):
+    """Total de transacciones con los filtros, a partir de `leer_resumen_mensual(engine, username)`."""
+    if mes:
+        resumen = resumen[resumen["Mes"] == mes]
+    if categoria:
+        resumen = resumen[resumen["Categoria"] == categoria]
+    return int(resumen["NumMovimientos"].sum())
@@ -0,0 +1,132 @@
+"""
+parser_transacciones.py – Intérprete de textos de transacciones en español
+=========================================================================
+`TransactionTextParser` convierte frases como "pagué 250 en cine con tarjeta
+el 3 de julio" en un registro con Fecha, Descripcion, Categoria, Cuenta y
+Monto, sin tocar la base de datos. Las tablas de palabras clave y las
+expresiones regulares se preparan una sola vez al crear el parser (no en cada
+llamada) y `parse_many` procesa lotes completos.
+
+Las reglas son las de siempre de `registrar_transaccion_desde_texto`, con sus
+particularidades: la categoría es la primera palabra clave (en el orden de
+CATEGORIAS_PALABRAS) que aparece como palabra completa, los verbos de ingreso y
+egreso se buscan como subcadenas y sólo se mira la primera fecha "<día> de <mes>".
+El corpus de `benchmarks/corpus_parser.jsonl` fija ese comportamiento:
+$ python -m benchmarks.bench_parser --verificar
+"""
+import re
+import unicodedata
+from datetime import date, datetime
+
+MESES_ESPANOL = {
+    "enero": "01", "febrero": "02", "marzo": "03", "abril": "04",
+    "mayo": "05", "junio": "06", "julio": "07", "agosto": "08",
+    "septiembre": "09", "octubre": "10", "noviembre": "11", "diciembre": "12"
+}
+
+# El orden importa: gana la primera palabra clave presente en el texto.
+CATEGORIAS_PALABRAS = {
+    "necesidades": "Necesidades 🍎", "super": "Necesidades 🍎", "comida": "Necesidades 🍎",
+    "renta": "Necesidades 🍎", "medico": "Necesidades 🍎", "transporte": "Necesidades 🍎", "escuela": "Necesidades 🍎",
+    "gustos": "Gustos 🎁", "cine": "Gustos 🎁", "restaurante": "Gustos 🎁", "ropa": "Gustos 🎁", "viaje": "Gustos 🎁",
+    "metas financieras": "Metas financieras 💰", "ahorro": "Metas financieras 💰",
+    "nomina": "Ingresos 💵", "ingreso": "Ingresos 💵", "quincena": "Ingresos 💵", "salario": "Ingresos 💵"
+}
+CATEGORIA_DEFAULT = "Gustos 🎁"
+CATEGORIA_INGRESOS = "Ingresos 💵"
+CATEGORIAS_NEGATIVAS = ["Necesidades 🍎", "Gustos 🎁", "Metas financieras 💰"]
+
+PALABRAS_EGRESO = ["gasto", "egreso", "pague", "pago", "compra", "retiro", "salida"]
+PALABRAS_INGRESO = ["ingreso", "abono", "deposito", "bonificacion", "reembolso", "reintegro"]
+CUENTAS = ["tarjeta", "banorte", "bbva", "hsbc", "efectivo", "cash", "card"]
+
+
+def normalizar(texto):
+    return unicodedata.normalize("NFKD", texto).encode("ASCII", "ignore").decode("utf-8").lower()
+
+
+def _alternativas(palabras):
+    return "|".join(re.escape(p) for p in palabras)
+
+
+class TransactionTextParser:
+    def __init__(self, categorias=CATEGORIAS_PALABRAS, cuentas=CUENTAS,
+                 palabras_egreso=PALABRAS_EGRESO, palabras_ingreso=PALABRAS_INGRESO, meses=MESES_ESPANOL):
+        # Posición de cada palabra clave de una sola palabra; las de varias palabras
+        # ("metas financieras") nunca coinciden con un token, igual que antes.
+        self._rango_categoria = {k: (i, v) for i, (k, v) in enumerate(categorias.items()) if " " not in k}
+        self._meses = dict(meses)
+        self._re_descripcion = re.compile(r"en ([a-zA-Záéíóúñ]+)")
+        self._re_monto = re.compile(r"(-?\$?\d+(?:[\.,]\d{1,2})?)")
+        self._re_egreso = re.compile(_alternativas(palabras_egreso))
+        self._re_ingreso = re.compile(_alternativas(palabras_ingreso))
+        self._re_cuenta = re.compile(f"({_alternativas(cuentas)})")
+        self._re_fecha = re.compile(r"(\d{1,2}) de ([a-zA-Z]+)")
+        self._limpiar_monto = str.maketrans("", "", "$,")
+
+    def categorizar(self, texto_norm, default=CATEGORIA_DEFAULT):
+        """Categoría de la primera palabra clave que aparece como palabra completa."""
+        mejor = None
+        for token in texto_norm.split():
+            encontrado = self._rango_categoria.get(token)
+            if encontrado and (mejor is None or encontrado[0] < mejor[0]):
+                mejor = encontrado
+        return mejor[1] if mejor else default
+
+    def parse(self, texto, hoy=None):
+        """Interpreta un texto y devuelve {Fecha, Descripcion, Categoria, Cuenta, Monto}.
+
+        Lanza ValueError si la fecha mencionada no existe (p. ej. "31 de febrero").
+        """
+        hoy = hoy or date.today()
+        texto_norm = normalizar(texto)
+        categoria = self.categorizar(texto_norm)
+
+        match_desc = self._re_descripcion.search(texto_norm)
+        descripcion = match_desc.group(1).capitalize() if match_desc else categoria
+
+        monto_match = self._re_monto.search(texto_norm)
+        monto = float(monto_match.group().translate(self._limpiar_monto)) if monto_match else 0.0
+        if self._re_egreso.search(texto_norm):
+            monto = -abs(monto)
+        elif self._re_ingreso.search(texto_norm):
+            monto = abs(monto)
+        if categoria in CATEGORIAS_NEGATIVAS and monto > 0:
+            monto = -abs(monto)
+
+        cuenta_match = self._re_cuenta.search(texto_norm)
+        cuenta = cuenta_match.group().capitalize() if cuenta_match else "General"
+
+        fecha = hoy
+        fecha_match = self._re_fecha.search(texto_norm)
+        if fecha_match:
+            mes = self._meses.get(fecha_match.group(2))
+            if mes:
+                dia = int(fecha_match.group(1))
+                try:
+                    fecha = date(hoy.year, int(mes), dia)
+                except ValueError:
+                    # strptime da el mismo mensaje de error que la versión original
+                    fecha = datetime.strptime(f"{hoy.year}-{mes}-{dia:02d}", "%Y-%m-%d").date()
+
+        return {"Fecha": fecha, "Descripcion": descripcion, "Categoria": categoria, "Cuenta": cuenta, "Monto": monto}
+
+    def parse_many(self, textos, hoy=None, omitir_errores=False):
+        """Interpreta un lote de textos; con `omitir_errores` los inválidos quedan como None."""
+        hoy = hoy or date.today()
+        registros = []
+        for texto in textos:
+            try:
+                registros.append(self.parse(texto, hoy))
+            except ValueError:
+                if not omitir_errores:
+                    raise
+                registros.append(None)
+        return registros
+
+
+PARSER = TransactionTextParser()
+
+
+def categorizar(texto_norm, default=CATEGORIA_DEFAULT):
+    return PARSER.categorizar(texto_norm, default)
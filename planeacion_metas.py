@@ -0,0 +1,208 @@
+"""
+planeacion_metas.py – Plan de aportaciones para las metas financieras
+=====================================================================
+`get_recomendacion_asignacion` repartía el ahorro disponible meta por meta
+con `iterrows` y no tomaba en cuenta cuánto ahorra de verdad el usuario cada
+mes. `planear_metas` resuelve, para todos los usuarios a la vez y sin ciclos
+por meta:
+
+1. ahorro disponible (lo acumulado en 'Metas financieras 💰' menos lo ya
+   asignado): se llena primero la meta con el plazo más cercano, luego la
+   siguiente (suma acumulada recortada, por usuario);
+2. aportación mensual: la tasa de ahorro del usuario es el promedio de lo que
+   mandó a 'Metas financieras 💰' en sus últimos `MESES_TASA` meses (los meses
+   sin ahorro cuentan como cero; la ventana termina en su último mes con
+   movimientos). Con una aportación fija por meta, el reparto que minimiza el
+   mayor retraso relativo (meses para completar / meses de plazo) es
+   proporcional a lo que cada meta necesita al mes para llegar a tiempo:
+   aportacion_i = tasa · requerido_i / Σ requerido. Si la tasa alcanza, todas
+   llegan a tiempo (antes, en la misma proporción); si no, todas se atrasan
+   en la misma proporción y el plan dice cuánto más habría que ahorrar.
+
+Es un plan de aportaciones fijas: cuando una meta se completa, lo que se le
+aportaba queda libre y el siguiente cálculo lo reparte.
+
+Las tasas salen de `resumen_mensual_usuario` (una consulta para todos), así que
+`plan_todos` cabe en un proceso nocturno y `plan_usuario` en la página.
+
+$ python planeacion_metas.py --usuario usuario1
+$ python planeacion_metas.py --usuario usuario1 --aportacion 3000
+$ python planeacion_metas.py --todos --csv plan_metas.csv
+$ python -m benchmarks.bench_planeacion_metas
+"""
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+
+CATEGORIA_AHORRO = "Metas financieras 💰"
+MESES_TASA = 6
+# Más allá de este plazo la meta no se considera alcanzable con la aportación actual
+HORIZONTE_MAX_MESES = 100 * 12
+
+
+# ─── Datos ────────────────────────────────────────────────────────────────
+def meses_restantes(metas, hoy=None):
+    """Meses que le quedan a cada meta: el plazo cuenta desde su fecha de creación (mínimo 1)."""
+    hoy = pd.Timestamp.today() if hoy is None else pd.Timestamp(hoy)
+    creadas = pd.to_datetime(metas["fecha_creacion"], errors="coerce")
+    transcurridos = ((hoy.year - creadas.dt.year) * 12 + hoy.month - creadas.dt.month).fillna(0)
+    return (metas["plazo_meses"].fillna(0) - transcurridos).clip(lower=1).astype(int)
+
+
+def _filtro_usuarios(usuarios, columna):
+    if usuarios is None:
+        return "", {}
+    nombres = {f"u{i}": u for i, u in enumerate(usuarios)}
+    return f" AND {columna} IN ({', '.join(':' + n for n in nombres)})", nombres
+
+
+def cargar_metas(engine, usuarios=None):
+    filtro, parametros = _filtro_usuarios(usuarios, "usuario")
+    with engine.connect() as conn:
+        return pd.read_sql(text(f"SELECT * FROM metas_financieras WHERE 1 = 1{filtro}"), conn, params=parametros)
+
+
+def tasas_ahorro(engine, usuarios=None, meses=MESES_TASA):
+    """DataFrame por usuario con `tasa_mensual` (promedio de sus últimos `meses`) y `ahorrado` (total)."""
+    filtro, parametros = _filtro_usuarios(usuarios, "Usuario")
+    with engine.connect() as conn:
+        resumen = pd.read_sql(
+            text(f"""
+                SELECT Usuario AS usuario, Mes,
+                       SUM(CASE WHEN Categoria = :cat THEN -Total ELSE 0 END) AS ahorro
+                FROM resumen_mensual_usuario
+                WHERE 1 = 1{filtro}
+                GROUP BY Usuario, Mes
+            """),
+            conn,
+            params={"cat": CATEGORIA_AHORRO, **parametros}
+        )
+    if resumen.empty:
+        return pd.DataFrame(columns=["tasa_mensual", "ahorrado"], index=pd.Index([], name="usuario"))
+    resumen["orden"] = pd.PeriodIndex(resumen["Mes"], freq="M").asi8
+    ultimo = resumen.groupby("usuario")["orden"].transform("max")
+    recientes = resumen[resumen["orden"] > ultimo - meses]
+    # Los meses sin ahorro dentro de la ventana cuentan como cero: se divide entre `meses`
+    return pd.DataFrame({
+        "tasa_mensual": recientes.groupby("usuario")["ahorro"].sum().clip(lower=0) / meses,
+        "ahorrado": resumen.groupby("usuario")["ahorro"].sum().abs(),
+    }).fillna(0)
+
+
+# ─── Plan ─────────────────────────────────────────────────────────────────
+def planear_metas(metas, tasas, hoy=None):
+    """Plan por meta: asignación del disponible, aportación mensual y fecha estimada.
+
+    `metas` tiene las columnas de metas_financieras (de uno o muchos usuarios);
+    `tasas`, indexado por usuario, `tasa_mensual` y `ahorrado` (ver tasas_ahorro).
+    """
+    hoy = pd.Timestamp.today() if hoy is None else pd.Timestamp(hoy)
+    plan = metas.copy()
+    plan["meses_restantes"] = meses_restantes(plan, hoy)
+    plan = plan.sort_values(["usuario", "meses_restantes", "id"]).reset_index(drop=True)
+    plan["tasa_mensual"] = plan["usuario"].map(tasas["tasa_mensual"]).fillna(0.0)
+    actual = plan["monto_actual"].astype(float).fillna(0.0)
+    faltante = (plan["monto_objetivo"].astype(float).fillna(0.0) - actual).clip(lower=0)
+
+    # 1. Disponible: se llena primero la meta más próxima (suma acumulada recortada por usuario)
+    disponible = (plan["usuario"].map(tasas["ahorrado"]).fillna(0.0)
+                  - actual.groupby(plan["usuario"]).transform("sum")).clip(lower=0)
+    antes = faltante.groupby(plan["usuario"]).cumsum() - faltante
+    plan["asignar_ahora"] = (disponible - antes).clip(lower=0).clip(upper=faltante)
+    restante = faltante - plan["asignar_ahora"]
+    plan["restante"] = restante
+
+    # 2. Aportación mensual proporcional a lo que cada meta necesita para llegar a tiempo
+    plan["requerido_mensual"] = restante / plan["meses_restantes"]
+    requerido_total = plan["requerido_mensual"].groupby(plan["usuario"]).transform("sum")
+    escala = np.where(requerido_total > 0, plan["tasa_mensual"] / requerido_total.where(requerido_total > 0, 1), 0.0)
+    plan["aportacion_mensual"] = plan["requerido_mensual"] * escala
+
+    completa = restante <= 0
+    con_aportacion = plan["aportacion_mensual"] > 0
+    meses = np.where(completa, 0, np.where(con_aportacion, restante / plan["aportacion_mensual"].where(con_aportacion, 1), np.nan))
+    # Sin aportación o a más de HORIZONTE_MAX_MESES: no alcanzable (NaN/NaT); además evita desbordar datetime64[ns]
+    meses = np.ceil(np.where(meses <= HORIZONTE_MAX_MESES, meses, np.nan))
+    plan["meses_para_completar"] = meses
+    plan["alcanzable"] = ~np.isnan(meses)
+    mes_actual = np.datetime64(hoy.strftime("%Y-%m"), "M")
+    fechas = mes_actual + np.nan_to_num(meses, nan=0).astype("timedelta64[M]")
+    plan["fecha_estimada"] = pd.Series(fechas.astype("datetime64[ns]")).where(plan["alcanzable"])
+    plan["a_tiempo"] = completa | (plan["meses_para_completar"] <= plan["meses_restantes"])
+    # Lo que falta ahorrar al mes para que todas lleguen a tiempo
+    plan["ahorro_faltante_mensual"] = (requerido_total - plan["tasa_mensual"]).clip(lower=0)
+    return plan
+
+
+def plan_usuario(engine, username, aportacion_mensual=None, hoy=None):
+    """Plan de un usuario; `aportacion_mensual` reemplaza su tasa de ahorro (para simular)."""
+    tasas = tasas_ahorro(engine, [username])
+    if username not in tasas.index:
+        tasas.loc[username] = [0.0, 0.0]
+    if aportacion_mensual is not None:
+        tasas.loc[username, "tasa_mensual"] = float(aportacion_mensual)
+    return planear_metas(cargar_metas(engine, [username]), tasas, hoy)
+
+
+def plan_todos(engine, hoy=None):
+    """Plan de todos los usuarios con metas, en una pasada (para el proceso nocturno)."""
+    return planear_metas(cargar_metas(engine), tasas_ahorro(engine), hoy)
+
+
+def describir_plan(plan):
+    """Texto del plan de un usuario para el agente y la página."""
+    if plan.empty:
+        return "Aún no tienes metas financieras registradas."
+    mensaje = ""
+    asignaciones = plan[plan["asignar_ahora"] > 0]
+    if not asignaciones.empty:
+        mensaje += f"Tienes ${asignaciones['asignar_ahora'].sum():,.0f} disponibles. Puedes asignarlos así:\n\n"
+        for meta, monto in zip(asignaciones["nombre_meta"], asignaciones["asignar_ahora"]):
+            mensaje += f"- Asignar ${monto:,.0f} a '{meta}'\n"
+        mensaje += "\n"
+    pendientes = plan[plan["restante"] > 0]
+    if pendientes.empty:
+        return mensaje + "Con eso tus metas quedan completas."
+    tasa = plan["tasa_mensual"].iloc[0]
+    if tasa <= 0:
+        return mensaje + (f"No registras ahorro en '{CATEGORIA_AHORRO}' en los últimos meses; para llegar a tiempo "
+                          f"necesitas ${plan['ahorro_faltante_mensual'].iloc[0]:,.0f} al mes.")
+    mensaje += f"Con tu ahorro de ${tasa:,.0f} al mes, aporta así:\n\n"
+    for _, meta in pendientes.iterrows():
+        # Una parte menor a un peso se mostraría como "$0 al mes": se trata como inalcanzable
+        if not meta["alcanzable"] or round(meta["aportacion_mensual"]) < 1:
+            mensaje += (f"- '{meta['nombre_meta']}': no la alcanzas con tu ahorro actual; para llegar a tiempo "
+                        f"necesita ${meta['requerido_mensual']:,.0f} al mes\n")
+            continue
+        atraso = int(meta["meses_para_completar"] - meta["meses_restantes"])
+        estado = "a tiempo" if meta["a_tiempo"] else f"{atraso} {'mes' if atraso == 1 else 'meses'} tarde"
+        mensaje += (f"- '{meta['nombre_meta']}': ${meta['aportacion_mensual']:,.0f} al mes, "
+                    f"la completas en {meta['fecha_estimada']:%m/%Y} ({estado})\n")
+    faltante = plan["ahorro_faltante_mensual"].iloc[0]
+    if faltante > 0:
+        mensaje += f"\nPara llegar a tiempo a todas necesitarías ahorrar ${faltante:,.0f} más al mes."
+    return mensaje.rstrip()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from db import get_engine
+
+    parser = argparse.ArgumentParser(description="Plan de aportaciones para las metas financieras")
+    grupo = parser.add_mutually_exclusive_group(required=True)
+    grupo.add_argument("--usuario")
+    grupo.add_argument("--todos", action="store_true")
+    parser.add_argument("--aportacion", type=float, default=None, help="Ahorro mensual a simular (con --usuario)")
+    parser.add_argument("--csv", default=None, help="Guarda el plan en un CSV")
+    args = parser.parse_args()
+
+    engine = get_engine()
+    if args.usuario:
+        plan = plan_usuario(engine, args.usuario, args.aportacion)
+        print(describir_plan(plan))
+    else:
+        plan = plan_todos(engine)
+        print(f"{plan['usuario'].nunique()} usuarios, {len(plan)} metas, {int(plan['a_tiempo'].sum())} a tiempo")
+    if args.csv:
+        plan.to_csv(args.csv, index=False)
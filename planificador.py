@@ -0,0 +1,140 @@
+"""
+planificador.py – Agente planificador/ejecutor para preguntas de varias partes
+=============================================================================
+Con el agente ReAct, una pregunta como "¿Cómo voy este mes?" cuesta una vuelta
+al LLM por cada herramienta (gasto, ingreso, ranking, proyección...) más la
+respuesta final: N + 1 llamadas, una detrás de otra. `AgentePlanificador`
+resuelve la misma pregunta en 2 llamadas:
+
+1. plan: el LLM devuelve de una vez la lista JSON de consultas independientes;
+2. las consultas corren en paralelo en un pool de hilos (fuera del LLM);
+3. resumen: el LLM redacta la respuesta con todos los resultados.
+
+Sólo planea con herramientas de consulta. Si la pregunta pide registrar o
+modificar datos, o el plan no se puede interpretar, la pregunta pasa al agente
+ReAct de siempre. `run(pregunta, callbacks=...)` tiene la misma forma que el de
+los agentes de LangChain, así que funciona con `flujo_tokens.transmitir`.
+
+$ python -m benchmarks.bench_planificador
+"""
+import json
+import os
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from langchain_core.agents import AgentAction
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+
+from agente import HERRAMIENTAS, HERRAMIENTAS_CON_EFECTOS, ejecutar_herramienta
+
+MAX_HILOS = int(os.getenv("BILLIE_PLAN_HILOS", "4"))
+MAX_CONSULTAS = 6
+PASAR_A_REACT = "REACT"
+MARCA_FINAL = "Final Answer:"
+
+PROMPT_PLAN = """Eres el planificador de Billie, un asistente de finanzas personales.
+Herramientas disponibles (nombre: descripción):
+{herramientas}
+
+Pregunta del usuario: {pregunta}
+
+Devuelve SOLO un arreglo JSON con las consultas independientes que hacen falta para
+responder, por ejemplo [{{"herramienta": "Gasto total", "entrada": ""}}] (máximo {maximo};
+[] si no hace falta ninguna). Si la pregunta pide registrar, borrar o modificar datos,
+responde exactamente {react}."""
+
+PROMPT_RESUMEN = """Eres Billie, asesor financiero personal. Responde en español, en lenguaje
+cotidiano y de forma breve, la pregunta del usuario usando sólo estos datos.
+
+Pregunta: {pregunta}
+
+Datos:
+{resultados}
+
+Empieza tu respuesta con "{marca}"."""
+
+
+def _texto(respuesta):
+    return getattr(respuesta, "content", respuesta)
+
+
+class AgentePlanificador:
+    def __init__(self, username, llm, herramientas=None, agente_react=None, max_hilos=MAX_HILOS):
+        self.username = username
+        self.llm = llm
+        self.agente_react = agente_react
+        self.max_hilos = max_hilos
+        self._herramientas = {
+            nombre: (descripcion, funcion) for nombre, descripcion, funcion in (herramientas or HERRAMIENTAS)
+            if nombre not in HERRAMIENTAS_CON_EFECTOS
+        }
+        self._lista = "\n".join(f"- {n}: {d}" for n, (d, _) in self._herramientas.items())
+
+    # ─── Plan ────────────────────────────────────────────────────────────
+    def planear(self, pregunta, callbacks=None):
+        """Lista de (herramienta, entrada), o None si la pregunta debe ir al agente ReAct."""
+        prompt = PROMPT_PLAN.format(herramientas=self._lista, pregunta=pregunta, maximo=MAX_CONSULTAS,
+                                    react=PASAR_A_REACT)
+        texto = _texto(self.llm.invoke(prompt, config={"callbacks": callbacks}))
+        if texto.strip() == PASAR_A_REACT:
+            return None
+        inicio, fin = texto.find("["), texto.rfind("]")
+        try:
+            pasos = json.loads(texto[inicio:fin + 1]) if inicio >= 0 else None
+        except json.JSONDecodeError:
+            pasos = None
+        if not isinstance(pasos, list):
+            return None
+        plan = []
+        for paso in pasos:
+            if not isinstance(paso, dict) or paso.get("herramienta") not in self._herramientas:
+                continue
+            consulta = (paso["herramienta"], str(paso.get("entrada") or ""))
+            if consulta not in plan:
+                plan.append(consulta)
+        return plan[:MAX_CONSULTAS]
+
+    # ─── Ejecución ───────────────────────────────────────────────────────
+    def ejecutar(self, plan, callbacks=None):
+        """Corre las consultas del plan en paralelo; devuelve [(herramienta, entrada, resultado)]."""
+        for herramienta, entrada in plan:
+            for manejador in callbacks or []:
+                if hasattr(manejador, "on_agent_action"):
+                    manejador.on_agent_action(AgentAction(herramienta, entrada, ""), run_id=uuid.uuid4())
+
+        contexto = get_script_run_ctx(suppress_warning=True)
+
+        def consultar(consulta):
+            # Los hilos del pool heredan el contexto de la página para leer st.session_state
+            add_script_run_ctx(threading.current_thread(), contexto)
+            herramienta, entrada = consulta
+            try:
+                funcion = self._herramientas[herramienta][1]
+                return herramienta, entrada, ejecutar_herramienta(herramienta, funcion, entrada, self.username)
+            except Exception as e:
+                return herramienta, entrada, f"Error: {e}"
+
+        if len(plan) <= 1:
+            return [consultar(c) for c in plan]
+        with ThreadPoolExecutor(max_workers=min(self.max_hilos, len(plan))) as pool:
+            return list(pool.map(consultar, plan))
+
+    # ─── Resumen ─────────────────────────────────────────────────────────
+    def resumir(self, pregunta, resultados, callbacks=None):
+        datos = "\n".join(
+            f"- {h}{f' ({e})' if e else ''}: {r}" for h, e, r in resultados
+        ) or "- (no se consultó ningún dato)"
+        prompt = PROMPT_RESUMEN.format(pregunta=pregunta, resultados=datos, marca=MARCA_FINAL)
+        texto = _texto(self.llm.invoke(prompt, config={"callbacks": callbacks})).strip()
+        if texto.startswith(MARCA_FINAL):
+            texto = texto[len(MARCA_FINAL):].strip()
+        return texto
+
+    def run(self, pregunta, callbacks=None):
+        plan = self.planear(pregunta, callbacks)
+        if plan is None:
+            if self.agente_react is None:
+                raise ValueError("La pregunta requiere el agente ReAct y no se configuró uno.")
+            return self.agente_react().run(pregunta, callbacks=callbacks)
+        return self.resumir(pregunta, self.ejecutar(plan, callbacks), callbacks)
@@ -0,0 +1,382 @@
+"""
+precios.py – Almacén local de precios históricos de Yahoo Finance
+=================================================================
+`forecast_yf_ticker` descargaba `history(period="max")` en cada simulación y
+`page_yahoo_finance.py` volvía a pedir `info` y 6 meses de precios en cada
+tecla. `AlmacenPrecios` guarda las barras diarias en la tabla `precios`
+(Ticker, Fecha) de la base de la app (migración 6) y las comparten ambas
+páginas:
+
+* la primera vez se descarga la historia completa; después sólo lo que va
+  desde la última fecha guardada (se vuelve a pedir esa barra porque pudo
+  guardarse a media sesión);
+* las barras de Yahoo vienen ajustadas por splits y dividendos: si el
+  incremento de un ticker trae una de esas acciones, las barras guardadas
+  quedaron sin reajustar y se vuelve a descargar su historia completa;
+* un ticker consultado hace menos de BILLIE_PRECIOS_TTL segundos (default 6 h)
+  se sirve del almacén sin tocar la red; `info` se guarda BILLIE_PRECIOS_TTL_INFO
+  (default 24 h);
+* si la descarga falla se sirve lo que haya guardado;
+* `historiales_precios([...])` actualiza varios tickers con una sola descarga
+  masiva (`yf.download`) en lugar de una por ticker.
+
+Modos sin red:
+* BILLIE_PRECIOS_OFFLINE=1  nunca descarga; sólo sirve lo guardado.
+* BILLIE_PRECIOS_FIXTURES=<dir>  descarga de archivos grabados
+  (<TICKER>.csv y <TICKER>.json) en lugar de Yahoo; se graban con
+  $ python precios.py grabar VOO QQQ --directorio fixtures_precios
+
+$ python precios.py actualizar VOO QQQ
+$ python precios.py estado
+"""
+import json
+import os
+import threading
+import time
+from functools import lru_cache
+
+import pandas as pd
+from sqlalchemy import text
+
+TTL_PRECIOS = float(os.getenv("BILLIE_PRECIOS_TTL", str(6 * 3600)))
+TTL_INFO = float(os.getenv("BILLIE_PRECIOS_TTL_INFO", str(24 * 3600)))
+OFFLINE = os.getenv("BILLIE_PRECIOS_OFFLINE") == "1"
+DIRECTORIO_FIXTURES = os.getenv("BILLIE_PRECIOS_FIXTURES")
+COLUMNAS = ["Open", "High", "Low", "Close", "Volume"]
+ACCIONES = ["Dividends", "Stock Splits"]
+
+
+def crear_tabla_precios(conn):
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS precios (
+            Ticker TEXT NOT NULL,
+            Fecha TEXT NOT NULL,
+            Open REAL, High REAL, Low REAL, Close REAL, Volume REAL,
+            PRIMARY KEY (Ticker, Fecha)
+        )
+    """))
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS precios_tickers (
+            Ticker TEXT PRIMARY KEY,
+            ConsultadoEn REAL,
+            Info TEXT,
+            InfoEn REAL
+        )
+    """))
+
+
+def _normalizar_historial(hist):
+    """Barras diarias con índice de fechas sin zona horaria ("Date"), las columnas OHLCV y las ACCIONES que traiga."""
+    if hist is None or hist.empty:
+        return pd.DataFrame(columns=COLUMNAS, index=pd.DatetimeIndex([], name="Date"))
+    hist = hist.copy()
+    indice = pd.to_datetime(hist.index)
+    if indice.tz is not None:
+        indice = indice.tz_localize(None)
+    hist.index = indice.normalize().rename("Date")
+    return hist.reindex(columns=COLUMNAS + [c for c in ACCIONES if c in hist.columns])
+
+
+def _hay_acciones(hist, desde):
+    """True si `hist` trae un split o dividendo a partir de `desde` (la última fecha guardada)."""
+    columnas = [c for c in ACCIONES if c in hist.columns]
+    if not columnas:
+        return False
+    acciones = hist.loc[hist.index >= pd.Timestamp(desde), columnas]
+    return bool((acciones.fillna(0) != 0).to_numpy().any())
+
+
+# ─── Descargadores ────────────────────────────────────────────────────────
+class DescargadorYahoo:
+    def historial(self, ticker, inicio=None):
+        import yfinance as yf
+        fondo = yf.Ticker(ticker)
+        hist = fondo.history(start=inicio) if inicio else fondo.history(period="max")
+        return _normalizar_historial(hist)
+
+    def historiales(self, tickers, inicio=None):
+        """{ticker: barras} de todos los tickers en una sola petición a Yahoo."""
+        import yfinance as yf
+        if len(tickers) == 1:
+            return {tickers[0]: self.historial(tickers[0], inicio)}
+        rango = {"start": inicio} if inicio else {"period": "max"}
+        datos = yf.download(list(tickers), group_by="ticker", actions=True, progress=False, threads=True, **rango)
+        historias = {}
+        for ticker in tickers:
+            if datos is None or ticker not in datos.columns.get_level_values(0):
+                historias[ticker] = _normalizar_historial(None)
+                continue
+            # La tabla trae la unión de fechas de todos: se quitan las que no son de este ticker
+            historias[ticker] = _normalizar_historial(datos[ticker].dropna(how="all"))
+        return historias
+
+    def info(self, ticker):
+        import yfinance as yf
+        return yf.Ticker(ticker).info
+
+
+class DescargadorFixtures:
+    """Lee historias grabadas (<TICKER>.csv, <TICKER>.json) de un directorio; nunca usa la red."""
+
+    def __init__(self, directorio):
+        self.directorio = directorio
+
+    def historial(self, ticker, inicio=None):
+        ruta = os.path.join(self.directorio, f"{ticker}.csv")
+        if not os.path.exists(ruta):
+            raise FileNotFoundError(f"No hay fixture de precios para {ticker} en {self.directorio}")
+        hist = _normalizar_historial(pd.read_csv(ruta, index_col="Date", parse_dates=["Date"]))
+        return hist[hist.index >= pd.Timestamp(inicio)] if inicio else hist
+
+    def historiales(self, tickers, inicio=None):
+        # Como yf.download: un ticker sin datos queda vacío sin tumbar a los demás
+        historias = {}
+        for ticker in tickers:
+            try:
+                historias[ticker] = self.historial(ticker, inicio)
+            except FileNotFoundError:
+                historias[ticker] = _normalizar_historial(None)
+        return historias
+
+    def info(self, ticker):
+        ruta = os.path.join(self.directorio, f"{ticker}.json")
+        if not os.path.exists(ruta):
+            return {}
+        with open(ruta, encoding="utf-8") as archivo:
+            return json.load(archivo)
+
+
+def grabar_fixtures(tickers, directorio, descargador=None):
+    """Graba la historia completa e `info` de cada ticker para DescargadorFixtures."""
+    descargador = descargador or DescargadorYahoo()
+    os.makedirs(directorio, exist_ok=True)
+    for ticker in tickers:
+        descargador.historial(ticker).to_csv(os.path.join(directorio, f"{ticker}.csv"))
+        with open(os.path.join(directorio, f"{ticker}.json"), "w", encoding="utf-8") as archivo:
+            json.dump(descargador.info(ticker), archivo, ensure_ascii=False, default=str)
+
+
+# ─── Almacén ──────────────────────────────────────────────────────────────
+class AlmacenPrecios:
+    def __init__(self, engine, descargador=None, offline=OFFLINE, ttl=TTL_PRECIOS, ttl_info=TTL_INFO):
+        self.engine = engine
+        self.descargador = descargador or DescargadorYahoo()
+        self.offline = offline
+        self.ttl = ttl
+        self.ttl_info = ttl_info
+        self._lock = threading.Lock()
+        self.estadisticas = {"descargas": 0, "barras_descargadas": 0, "del_almacen": 0, "fallas": 0, "reajustes": 0}
+
+    @staticmethod
+    def _ticker(ticker):
+        return ticker.strip().upper()
+
+    def _sumar(self, clave, valor=1):
+        with self._lock:
+            self.estadisticas[clave] += valor
+
+    def _estado(self, conn, ticker):
+        fila = conn.execute(
+            text("""
+                SELECT (SELECT MAX(Fecha) FROM precios WHERE Ticker = :t),
+                       (SELECT ConsultadoEn FROM precios_tickers WHERE Ticker = :t)
+            """),
+            {"t": ticker}
+        ).fetchone()
+        return fila[0], fila[1]
+
+    def guardar(self, conn, ticker, hist):
+        """Inserta o reemplaza las barras de `hist` (índice de fechas, columnas OHLCV)."""
+        if hist.empty:
+            return 0
+        hist = _normalizar_historial(hist)
+        filas = [
+            {"t": ticker, "f": fecha.strftime("%Y-%m-%d"), **{c: (None if pd.isna(v) else float(v)) for c, v in valores.items()}}
+            for fecha, valores in zip(hist.index, hist[COLUMNAS].to_dict("records"))
+        ]
+        conn.execute(
+            text("""
+                INSERT INTO precios (Ticker, Fecha, Open, High, Low, Close, Volume)
+                VALUES (:t, :f, :Open, :High, :Low, :Close, :Volume)
+                ON CONFLICT (Ticker, Fecha) DO UPDATE SET
+                    Open = excluded.Open, High = excluded.High, Low = excluded.Low,
+                    Close = excluded.Close, Volume = excluded.Volume
+            """),
+            filas
+        )
+        return len(filas)
+
+    def _marcar_consulta(self, conn, ticker):
+        conn.execute(
+            text("""
+                INSERT INTO precios_tickers (Ticker, ConsultadoEn) VALUES (:t, :c)
+                ON CONFLICT (Ticker) DO UPDATE SET ConsultadoEn = excluded.ConsultadoEn
+            """),
+            {"t": ticker, "c": time.time()}
+        )
+
+    def pendientes(self, tickers):
+        """{ticker: fecha desde la cual descargar (None = historia completa)} de los que están vencidos."""
+        if self.offline:
+            return {}
+        ahora = time.time()
+        vencidos = {}
+        with self.engine.connect() as conn:
+            for ticker in map(self._ticker, tickers):
+                ultima, consultado = self._estado(conn, ticker)
+                if consultado is None or ahora - consultado >= self.ttl:
+                    vencidos[ticker] = ultima
+        return vencidos
+
+    def actualizar_varios(self, tickers):
+        """Descarga las barras nuevas de los tickers vencidos; devuelve {ticker: barras guardadas}.
+
+        Una descarga para los que no tienen nada guardado (historia completa) y
+        otra para el resto, desde la fecha guardada más antigua entre ellos. Los
+        incrementales que traen un split o dividendo desde su última barra se
+        vuelven a descargar completos y reemplazan lo guardado.
+        """
+        vencidos = self.pendientes(tickers)
+        completos = [t for t, ultima in vencidos.items() if ultima is None]
+        incrementales = {t: ultima for t, ultima in vencidos.items() if ultima is not None}
+        guardadas = {}
+        for grupo, inicio in ((completos, None), (list(incrementales), min(incrementales.values(), default=None))):
+            if not grupo:
+                continue
+            historias = self.descargador.historiales(grupo, inicio=inicio)
+            self._sumar("descargas")
+            reajustar = [t for t in grupo if inicio is not None
+                         and _hay_acciones(historias.get(t, _normalizar_historial(None)), incrementales[t])]
+            if reajustar:
+                historias_completas = self.descargador.historiales(reajustar)
+                self._sumar("descargas")
+                # Si la historia completa no llegó se guarda el incremento, como antes
+                reajustar = [t for t in reajustar if not historias_completas.get(t, _normalizar_historial(None)).empty]
+                historias.update({t: historias_completas[t] for t in reajustar})
+                self._sumar("reajustes", len(reajustar))
+            with self.engine.begin() as conn:
+                for ticker in grupo:
+                    if ticker in reajustar:
+                        conn.execute(text("DELETE FROM precios WHERE Ticker = :t"), {"t": ticker})
+                    guardadas[ticker] = self.guardar(conn, ticker, historias.get(ticker, _normalizar_historial(None)))
+                    self._marcar_consulta(conn, ticker)
+            self._sumar("barras_descargadas", sum(guardadas[t] for t in grupo))
+        return guardadas
+
+    def actualizar(self, ticker):
+        """Descarga sólo las barras nuevas del ticker si está vencido; devuelve cuántas guardó."""
+        ticker = self._ticker(ticker)
+        return self.actualizar_varios([ticker]).get(ticker, 0)
+
+    def leer(self, ticker, desde=None):
+        ticker = self._ticker(ticker)
+        consulta = "SELECT Fecha, Open, High, Low, Close, Volume FROM precios WHERE Ticker = :t"
+        parametros = {"t": ticker}
+        if desde is not None:
+            consulta += " AND Fecha >= :desde"
+            parametros["desde"] = pd.Timestamp(desde).strftime("%Y-%m-%d")
+        with self.engine.connect() as conn:
+            hist = pd.read_sql_query(text(consulta + " ORDER BY Fecha"), conn, params=parametros)
+        hist.index = pd.DatetimeIndex(pd.to_datetime(hist.pop("Fecha"), format="%Y-%m-%d"), name="Date")
+        return hist
+
+    def historial(self, ticker, desde=None):
+        """Barras diarias del ticker (desde `desde`, si se indica), actualizando antes si hace falta."""
+        try:
+            self.actualizar(ticker)
+        except Exception as e:
+            # Sin red o ticker inválido: se sirve lo guardado, si hay algo
+            self._sumar("fallas")
+            print(f"No se pudieron actualizar los precios de {ticker}: {e}")
+        hist = self.leer(ticker, desde)
+        self._sumar("del_almacen")
+        return hist
+
+    def historiales(self, tickers, desde=None):
+        """{ticker: barras} de varios tickers, con una descarga masiva para los vencidos."""
+        tickers = list(dict.fromkeys(map(self._ticker, tickers)))
+        try:
+            self.actualizar_varios(tickers)
+        except Exception as e:
+            self._sumar("fallas")
+            print(f"No se pudieron actualizar los precios de {', '.join(tickers)}: {e}")
+        self._sumar("del_almacen", len(tickers))
+        return {ticker: self.leer(ticker, desde) for ticker in tickers}
+
+    def info(self, ticker):
+        """`info` de Yahoo del ticker, guardado por `ttl_info` segundos ({} si no hay)."""
+        ticker = self._ticker(ticker)
+        with self.engine.connect() as conn:
+            fila = conn.execute(
+                text("SELECT Info, InfoEn FROM precios_tickers WHERE Ticker = :t"), {"t": ticker}
+            ).fetchone()
+        guardada = json.loads(fila[0]) if fila and fila[0] else None
+        if self.offline or (guardada is not None and time.time() - fila[1] < self.ttl_info):
+            return guardada or {}
+        try:
+            info = self.descargador.info(ticker)
+        except Exception as e:
+            self._sumar("fallas")
+            print(f"No se pudo obtener la información de {ticker}: {e}")
+            return guardada or {}
+        with self.engine.begin() as conn:
+            conn.execute(
+                text("""
+                    INSERT INTO precios_tickers (Ticker, Info, InfoEn) VALUES (:t, :i, :e)
+                    ON CONFLICT (Ticker) DO UPDATE SET Info = excluded.Info, InfoEn = excluded.InfoEn
+                """),
+                {"t": ticker, "i": json.dumps(info, ensure_ascii=False, default=str), "e": time.time()}
+            )
+        return info
+
+
+def crear_descargador():
+    return DescargadorFixtures(DIRECTORIO_FIXTURES) if DIRECTORIO_FIXTURES else DescargadorYahoo()
+
+
+@lru_cache(maxsize=None)
+def obtener_almacen():
+    """Almacén único por proceso sobre el motor compartido."""
+    from db import get_engine
+    return AlmacenPrecios(get_engine(), crear_descargador())
+
+
+def historial_precios(ticker, desde=None):
+    return obtener_almacen().historial(ticker, desde)
+
+
+def historiales_precios(tickers, desde=None):
+    return obtener_almacen().historiales(tickers, desde)
+
+
+def info_ticker(ticker):
+    return obtener_almacen().info(ticker)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Almacén local de precios de Yahoo Finance")
+    sub = parser.add_subparsers(dest="comando", required=True)
+    actualizar = sub.add_parser("actualizar", help="Descarga lo pendiente de los tickers")
+    actualizar.add_argument("tickers", nargs="+")
+    grabar = sub.add_parser("grabar", help="Graba fixtures para BILLIE_PRECIOS_FIXTURES")
+    grabar.add_argument("tickers", nargs="+")
+    grabar.add_argument("--directorio", default="fixtures_precios")
+    sub.add_parser("estado", help="Muestra los tickers guardados")
+    args = parser.parse_args()
+
+    if args.comando == "grabar":
+        grabar_fixtures([t.upper() for t in args.tickers], args.directorio)
+        print(f"Fixtures grabados en {args.directorio}")
+    elif args.comando == "actualizar":
+        guardadas = obtener_almacen().actualizar_varios([t.upper() for t in args.tickers])
+        for ticker in args.tickers:
+            print(f"{ticker.upper()}: {guardadas.get(ticker.upper(), 0)} barras nuevas")
+    else:
+        with obtener_almacen().engine.connect() as conn:
+            filas = conn.execute(text(
+                "SELECT Ticker, COUNT(*), MIN(Fecha), MAX(Fecha) FROM precios GROUP BY Ticker ORDER BY Ticker"
+            )).fetchall()
+        for ticker, barras, inicio, fin in filas:
+            print(f"{ticker:<12}{barras:>8,} barras  {inicio} a {fin}")
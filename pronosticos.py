@@ -0,0 +1,346 @@
+"""
+pronosticos.py – Proyección de fondos: modelos intercambiables y pronósticos precalculados
+=========================================================================================
+`page_perfil_ahorro_V2.py` proyecta los fondos recomendados del catálogo
+`fondos_inversion_v2`. Cada resultado tiene la forma de `utils.forecast_yf_ticker`:
+(monto_final, cagr, model, df, forecast), o cinco None si falló; `forecast`
+trae ds, yhat, yhat_lower y yhat_upper (historia + proyección) y
+`model.history` los datos del ajuste.
+
+Modelos (`MODELOS`; BILLIE_PRONOSTICO_MODELO elige, default "deriva"):
+
+* "deriva": caminata aleatoria geométrica sobre cierres semanales, ajustada con
+  NumPy: deriva y volatilidad de los rendimientos logarítmicos. Proyecta desde
+  el último cierre con la banda del 80 % (el ancho por omisión de Prophet).
+  Milisegundos y sin Stan.
+* "prophet": Prophet(daily_seasonality=True) sobre los cierres diarios, el
+  modelo de siempre. Se importa sólo si se usa.
+
+Pronósticos precalculados: el catálogo son unos 34 fondos, así que
+`precalcular_catalogo()` (cada noche, desde `weekly_scraper.py`) los ajusta
+todos y guarda en la tabla `pronosticos` (migración 7) yhat, bandas y CAGR
+para cada horizonte de 1 a 20 años. `pronosticar_tickers`:
+
+1. sirve de la tabla los que se calcularon hace menos de BILLIE_PRONOSTICOS_TTL
+   segundos (default 36 h: aguanta una noche fallida);
+2. descarga los precios de los demás con una sola descarga masiva
+   (`precios.historiales_precios`);
+3. los ajusta (Prophet, en un pool de procesos del tamaño de los núcleos;
+   BILLIE_PRONOSTICO_PROCESOS para fijarlo, 1 = sin pool), los guarda y los
+   entrega conforme terminan, para ir pintando las tarjetas.
+
+El pool es uno por proceso y se crea al primer uso; sus procesos arrancan con
+"spawn" (no se copia el estado de los hilos del servidor de Streamlit) y se
+reutilizan entre simulaciones.
+
+$ python pronosticos.py precalcular --modelo prophet
+$ python pronosticos.py estado
+$ python -m benchmarks.bench_pronosticos
+$ python -m benchmarks.bench_modelos_pronostico
+"""
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+
+from precios import historiales_precios, obtener_almacen
+
+MODELO = os.getenv("BILLIE_PRONOSTICO_MODELO", "deriva")
+PROCESOS = int(os.getenv("BILLIE_PRONOSTICO_PROCESOS", "0")) or os.cpu_count() or 1
+TTL_PRONOSTICOS = float(os.getenv("BILLIE_PRONOSTICOS_TTL", str(36 * 3600)))
+HORIZONTE_MAX = 20
+# Modelos cuyo ajuste tarda lo suficiente para valer la pena mandarlo al pool
+MODELOS_EN_POOL = {"prophet"}
+Z_80 = 1.2816
+SIN_RESULTADO = (None, None, None, None, None)
+
+
+# ─── Modelos ──────────────────────────────────────────────────────────────
+MODELOS = {}
+
+
+def registrar_modelo(nombre):
+    """Registra `ajustar(df, dias) -> (model, forecast)` bajo `nombre`."""
+    def registrar(ajustar):
+        MODELOS[nombre] = ajustar
+        return ajustar
+    return registrar
+
+
+@registrar_modelo("prophet")
+def ajustar_prophet(df, dias):
+    from prophet import Prophet  # Stan tarda en cargar: sólo si se elige este modelo
+
+    model = Prophet(daily_seasonality=True)
+    model.fit(df)
+    forecast = model.predict(model.make_future_dataframe(periods=dias))
+    return model, forecast
+
+
+class ModeloDeriva:
+    """Caminata aleatoria geométrica con deriva y volatilidad por día de calendario."""
+
+    def __init__(self, history, deriva, volatilidad):
+        self.history = history
+        self.deriva = deriva
+        self.volatilidad = volatilidad
+
+    def predict(self, dias):
+        """Historia (yhat = cierre) + `dias` días de proyección desde el último cierre."""
+        y = self.history["y"].to_numpy()
+        h = np.arange(1, dias + 1)
+        centro = np.log(y[-1]) + self.deriva * h
+        ancho = Z_80 * self.volatilidad * np.sqrt(h)
+        pasado = pd.DataFrame({"ds": self.history["ds"].to_numpy(), "yhat": y, "yhat_lower": y, "yhat_upper": y})
+        futuro = pd.DataFrame({
+            "ds": self.history["ds"].iloc[-1] + pd.to_timedelta(h, unit="D"),
+            "yhat": np.exp(centro),
+            "yhat_lower": np.exp(centro - ancho),
+            "yhat_upper": np.exp(centro + ancho),
+        })
+        return pd.concat([pasado, futuro], ignore_index=True)
+
+
+@registrar_modelo("deriva")
+def ajustar_deriva(df, dias):
+    semanal = df.set_index("ds")["y"].resample("W").last().dropna()
+    rendimientos = np.diff(np.log(semanal.to_numpy()))
+    if len(rendimientos) < 2:
+        raise ValueError("Historia insuficiente para estimar la deriva")
+    model = ModeloDeriva(df, rendimientos.mean() / 7, rendimientos.std(ddof=1) / np.sqrt(7))
+    return model, model.predict(dias)
+
+
+class PronosticoGuardado:
+    """Lo que queda de un ajuste leído de la tabla `pronosticos` (para `model.history`)."""
+
+    def __init__(self, history, modelo, calculado_en):
+        self.history = history
+        self.modelo = modelo
+        self.calculado_en = calculado_en
+
+
+def _preparar(hist):
+    df = hist[["Close"]].reset_index().rename(columns={"Date": "ds", "Close": "y"})
+    df["ds"] = df["ds"].dt.tz_localize(None)
+    return df[df["y"] > 0].reset_index(drop=True)
+
+
+def _resultado(model, df, forecast, monto_inicial, años):
+    # Un ajuste a más años se recorta al horizonte pedido
+    forecast = forecast[forecast["ds"] <= df["ds"].max() + pd.Timedelta(days=años * 365)]
+    crecimiento = forecast["yhat"].iloc[-1] / df["y"].iloc[-1]
+    return monto_inicial * crecimiento, crecimiento ** (1 / años) - 1, model, df, forecast
+
+
+def pronosticar_historial(hist, monto_inicial, años, modelo=MODELO):
+    """Ajusta `modelo` a los cierres de `hist` y proyecta `años` hacia adelante."""
+    df = _preparar(hist)
+    model, forecast = MODELOS[modelo](df, años * 365)
+    return _resultado(model, df, forecast, monto_inicial, años)
+
+
+def _ajustar(hist, modelo):
+    # Puede correr en el pool: un error se devuelve como None
+    try:
+        df = _preparar(hist)
+        model, forecast = MODELOS[modelo](df, HORIZONTE_MAX * 365)
+        return model, df, forecast
+    except Exception as e:
+        print(f"No se pudo proyectar el fondo: {e}")
+        return None
+
+
+@lru_cache(maxsize=None)
+def obtener_pool():
+    """Pool de procesos único por proceso, del tamaño de los núcleos disponibles."""
+    return ProcessPoolExecutor(max_workers=PROCESOS, mp_context=multiprocessing.get_context("spawn"))
+
+
+def _ajustar_varios(trabajos, modelo, en_paralelo=True):
+    """Genera (clave, ajuste o None) de cada (clave, hist) conforme termina."""
+    if not en_paralelo or modelo not in MODELOS_EN_POOL or PROCESOS <= 1 or len(trabajos) <= 1:
+        for clave, hist in trabajos:
+            yield clave, _ajustar(hist, modelo)
+        return
+
+    pool = obtener_pool()
+    futuros = {pool.submit(_ajustar, hist, modelo): clave for clave, hist in trabajos}
+    for futuro in as_completed(futuros):
+        try:
+            yield futuros[futuro], futuro.result()
+        except BrokenProcessPool:
+            # Un proceso murió (memoria, señal): el siguiente uso arranca un pool nuevo
+            obtener_pool.cache_clear()
+            yield futuros[futuro], None
+
+
+# ─── Tabla de pronósticos ─────────────────────────────────────────────────
+def crear_tabla_pronosticos(conn):
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS pronosticos (
+            Ticker TEXT NOT NULL,
+            Modelo TEXT NOT NULL,
+            Horizonte INTEGER NOT NULL,
+            FechaCorte TEXT NOT NULL,
+            PrecioInicial REAL NOT NULL,
+            Yhat REAL NOT NULL,
+            YhatInferior REAL,
+            YhatSuperior REAL,
+            CAGR REAL NOT NULL,
+            CalculadoEn REAL NOT NULL,
+            PRIMARY KEY (Ticker, Modelo, Horizonte)
+        )
+    """))
+
+
+def guardar_pronostico(conn, ticker, modelo, df, forecast):
+    """Guarda yhat, bandas y CAGR de cada horizonte de 1 a HORIZONTE_MAX años que cubra `forecast`."""
+    corte, inicial = df["ds"].max(), float(df["y"].iloc[-1])
+    puntos = forecast.set_index("ds")
+    filas = []
+    for horizonte in range(1, HORIZONTE_MAX + 1):
+        fecha = corte + pd.Timedelta(days=horizonte * 365)
+        if fecha not in puntos.index:
+            break
+        punto = puntos.loc[fecha]
+        filas.append({
+            "t": ticker, "m": modelo, "h": horizonte, "corte": corte.strftime("%Y-%m-%d"), "inicial": inicial,
+            "yhat": float(punto["yhat"]), "inferior": float(punto["yhat_lower"]),
+            "superior": float(punto["yhat_upper"]),
+            "cagr": (float(punto["yhat"]) / inicial) ** (1 / horizonte) - 1, "en": time.time(),
+        })
+    if filas:
+        conn.execute(
+            text("""
+                INSERT INTO pronosticos (Ticker, Modelo, Horizonte, FechaCorte, PrecioInicial, Yhat,
+                                         YhatInferior, YhatSuperior, CAGR, CalculadoEn)
+                VALUES (:t, :m, :h, :corte, :inicial, :yhat, :inferior, :superior, :cagr, :en)
+                ON CONFLICT (Ticker, Modelo, Horizonte) DO UPDATE SET
+                    FechaCorte = excluded.FechaCorte, PrecioInicial = excluded.PrecioInicial,
+                    Yhat = excluded.Yhat, YhatInferior = excluded.YhatInferior,
+                    YhatSuperior = excluded.YhatSuperior, CAGR = excluded.CAGR,
+                    CalculadoEn = excluded.CalculadoEn
+            """),
+            filas
+        )
+    return len(filas)
+
+
+def leer_pronostico(engine, ticker, años, modelo=MODELO, ttl=TTL_PRONOSTICOS):
+    """Horizontes 1..años guardados del ticker, o None si faltan o están vencidos."""
+    with engine.connect() as conn:
+        filas = pd.read_sql_query(
+            text("""
+                SELECT Horizonte, FechaCorte, PrecioInicial, Yhat, YhatInferior, YhatSuperior, CAGR, CalculadoEn
+                FROM pronosticos
+                WHERE Ticker = :t AND Modelo = :m AND Horizonte <= :a
+                ORDER BY Horizonte
+            """),
+            conn,
+            params={"t": ticker, "m": modelo, "a": años}
+        )
+    if len(filas) < años or time.time() - filas["CalculadoEn"].min() >= ttl:
+        return None
+    return filas
+
+
+def _desde_tabla(filas, hist, monto_inicial, años, modelo):
+    """Resultado con la forma de forecast_yf_ticker a partir de los horizontes guardados."""
+    corte = pd.Timestamp(filas["FechaCorte"].iloc[-1])
+    df = _preparar(hist)
+    df = df[df["ds"] <= corte]
+    if df.empty:
+        return None
+    pasado = pd.DataFrame({"ds": df["ds"], "yhat": df["y"], "yhat_lower": df["y"], "yhat_upper": df["y"]})
+    futuro = pd.DataFrame({
+        "ds": corte + pd.to_timedelta(filas["Horizonte"] * 365, unit="D"),
+        "yhat": filas["Yhat"], "yhat_lower": filas["YhatInferior"], "yhat_upper": filas["YhatSuperior"],
+    })
+    forecast = pd.concat([pasado, futuro], ignore_index=True)
+    crecimiento = filas["Yhat"].iloc[-1] / filas["PrecioInicial"].iloc[-1]
+    model = PronosticoGuardado(df, modelo, filas["CalculadoEn"].min())
+    return monto_inicial * crecimiento, filas["CAGR"].iloc[-1], model, df, forecast
+
+
+# ─── Entrada ──────────────────────────────────────────────────────────────
+def pronosticar_tickers(tickers, monto_inicial, años, en_paralelo=True, modelo=MODELO):
+    """Genera (posición en `tickers`, resultado): primero los precalculados, luego los ajustados."""
+    almacen = obtener_almacen()
+    tickers = [ticker.strip().upper() for ticker in tickers]
+    vencidos = []
+    for i, ticker in enumerate(tickers):
+        filas = leer_pronostico(almacen.engine, ticker, años, modelo)
+        resultado = _desde_tabla(filas, almacen.leer(ticker), monto_inicial, años, modelo) if filas is not None else None
+        if resultado is None:
+            vencidos.append(i)
+        else:
+            yield i, resultado
+    if not vencidos:
+        return
+
+    historias = historiales_precios([tickers[i] for i in vencidos])
+    for i, ajuste in _ajustar_varios([(i, historias[tickers[i]]) for i in vencidos], modelo, en_paralelo):
+        if ajuste is None:
+            yield i, SIN_RESULTADO
+            continue
+        model, df, forecast = ajuste
+        with almacen.engine.begin() as conn:
+            guardar_pronostico(conn, tickers[i], modelo, df, forecast)
+        yield i, _resultado(model, df, forecast, monto_inicial, años)
+
+
+def precalcular_catalogo(modelo=MODELO, en_paralelo=True):
+    """Ajusta y guarda todos los tickers de `fondos_inversion_v2`; pensado para correr cada noche."""
+    almacen = obtener_almacen()
+    with almacen.engine.connect() as conn:
+        tickers = sorted({
+            fila[0].strip().upper()
+            for fila in conn.execute(text("SELECT ticker FROM fondos_inversion_v2 WHERE ticker IS NOT NULL"))
+            if fila[0].strip()
+        })
+    inicio = time.perf_counter()
+    historias = historiales_precios(tickers)
+    resumen = {"tickers": len(tickers), "guardados": 0, "fallas": []}
+    for ticker, ajuste in _ajustar_varios([(t, historias[t]) for t in tickers], modelo, en_paralelo):
+        if ajuste is None:
+            resumen["fallas"].append(ticker)
+            continue
+        _, df, forecast = ajuste
+        with almacen.engine.begin() as conn:
+            guardar_pronostico(conn, ticker, modelo, df, forecast)
+        resumen["guardados"] += 1
+    resumen["segundos"] = time.perf_counter() - inicio
+    return resumen
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Pronósticos de los fondos del catálogo")
+    sub = parser.add_subparsers(dest="comando", required=True)
+    precalcular = sub.add_parser("precalcular", help="Ajusta y guarda todo el catálogo")
+    precalcular.add_argument("--modelo", default=MODELO, choices=sorted(MODELOS))
+    sub.add_parser("estado", help="Muestra los pronósticos guardados")
+    args = parser.parse_args()
+
+    if args.comando == "precalcular":
+        resumen = precalcular_catalogo(args.modelo)
+        print(f"{resumen['guardados']}/{resumen['tickers']} tickers en {resumen['segundos']:.1f} s")
+        if resumen["fallas"]:
+            print(f"Sin pronóstico: {', '.join(resumen['fallas'])}")
+    else:
+        with obtener_almacen().engine.connect() as conn:
+            filas = conn.execute(text("""
+                SELECT Modelo, COUNT(DISTINCT Ticker), MIN(FechaCorte), MAX(CalculadoEn)
+                FROM pronosticos GROUP BY Modelo ORDER BY Modelo
+            """)).fetchall()
+        for modelo, tickers, corte, calculado in filas:
+            print(f"{modelo:<10}{tickers:>5} tickers  corte desde {corte}  "
+                  f"calculado {time.strftime('%Y-%m-%d %H:%M', time.localtime(calculado))}")
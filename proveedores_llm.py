@@ -0,0 +1,182 @@
+"""
+proveedores_llm.py – Origen de los modelos de lenguaje de Billie
+================================================================
+Los agentes y las páginas piden su modelo con `crear_llm(config, proveedor)` en
+lugar de construir `ChatOpenAI` contra `st.secrets`, así que se puede cambiar el
+backend sin tocar el código que lo usa:
+
+* openai      GPT-4 con la llave de `st.secrets["openai"]` (u OPENAI_API_KEY)
+* openrouter  modelos de OpenRouter con `st.secrets["openrouter"]` (u OPENROUTER_API_KEY)
+* local       `llm_local.ChatLocalStreaming`: respuesta fija, sin red ni llave
+* guion       `llm_local.ChatGuion`: reproduce trazas ReAct grabadas en BILLIE_LLM_TRAZAS
+
+Variables de entorno:
+* BILLIE_LLM_PROVEEDOR  fuerza un proveedor para toda la app (p. ej. guion para
+                        trabajar sin red); BILLIE_LLM_LOCAL=1 equivale a "local"
+* BILLIE_LLM_TRAZAS     JSONL de trazas que reproduce el proveedor "guion"
+* BILLIE_LLM_GRABAR     JSONL donde se graban las trazas de las llamadas reales
+
+Tokens: `contar_tokens` usa tiktoken si está instalado y, si no, la regla de
+~4 caracteres por token; `ContadorTokens` suma los de cada llamada al modelo.
+
+$ python -m benchmarks.bench_herramientas
+"""
+import json
+import os
+import re
+import threading
+
+import streamlit as st
+from langchain_core.callbacks import BaseCallbackHandler
+
+PROVEEDOR_DEFAULT = "openai"
+PROVEEDOR_FORZADO = os.getenv("BILLIE_LLM_PROVEEDOR") or ("local" if os.getenv("BILLIE_LLM_LOCAL") == "1" else None)
+RUTA_TRAZAS = os.getenv("BILLIE_LLM_TRAZAS", "trazas_billie.jsonl")
+RUTA_GRABAR = os.getenv("BILLIE_LLM_GRABAR")
+BASE_URL_OPENROUTER = "https://openrouter.ai/api/v1"
+
+# ─── Proveedores ──────────────────────────────────────────────────────────
+PROVEEDORES = {}
+
+
+def registrar_proveedor(nombre):
+    """Decorador: `fabrica(config)` construye el modelo del proveedor `nombre`."""
+    def registrar(fabrica):
+        PROVEEDORES[nombre] = fabrica
+        return fabrica
+    return registrar
+
+
+def _llave(seccion, variable):
+    try:
+        return st.secrets[seccion]["api_key"]
+    except Exception:
+        # Fuera de Streamlit (scripts, benchmarks) se usa la variable de entorno
+        return os.environ[variable]
+
+
+@registrar_proveedor("openai")
+def _openai(config):
+    from langchain.chat_models import ChatOpenAI
+    return ChatOpenAI(openai_api_key=_llave("openai", "OPENAI_API_KEY"), **config)
+
+
+@registrar_proveedor("openrouter")
+def _openrouter(config):
+    from langchain.chat_models import ChatOpenAI
+    return ChatOpenAI(openai_api_key=_llave("openrouter", "OPENROUTER_API_KEY"),
+                      base_url=BASE_URL_OPENROUTER, **config)
+
+
+@registrar_proveedor("local")
+def _local(config):
+    from llm_local import ChatLocalStreaming
+    return ChatLocalStreaming(latencia_inicial=0.5, retardo_token=0.03, streaming=config.get("streaming", True))
+
+
+@registrar_proveedor("guion")
+def _guion(config):
+    from llm_local import ChatGuion
+    return ChatGuion(trazas=cargar_trazas(RUTA_TRAZAS), streaming=config.get("streaming", True))
+
+
+def crear_llm(config=None, proveedor=None):
+    """Modelo de chat del proveedor indicado (BILLIE_LLM_PROVEEDOR tiene prioridad).
+
+    `config` son los parámetros del modelo real (`model`, `temperature`,
+    `streaming`...); los proveedores locales sólo toman `streaming`.
+    """
+    nombre = PROVEEDOR_FORZADO or proveedor or PROVEEDOR_DEFAULT
+    if nombre not in PROVEEDORES:
+        raise ValueError(f"Proveedor de LLM desconocido: {nombre} (opciones: {', '.join(PROVEEDORES)})")
+    config = dict(config or {})
+    if RUTA_GRABAR and nombre in ("openai", "openrouter"):
+        config["callbacks"] = [GrabadorTrazas(RUTA_GRABAR)]
+    return PROVEEDORES[nombre](config)
+
+
+# ─── Trazas ReAct ─────────────────────────────────────────────────────────
+# Una traza por línea: {"pregunta": "...", "respuestas": ["...Action: X\nAction Input: ", "...Final Answer: ..."]}
+_PREGUNTA = re.compile(r"Question: (.*?)\nThought:", re.S)
+
+
+def pregunta_de_prompt(prompt):
+    """Pregunta del usuario dentro del prompt ReAct, o None si no es un prompt ReAct."""
+    # La primera "Question:" es la del formato de ejemplo; la del usuario es la última
+    encontradas = _PREGUNTA.findall(prompt)
+    return encontradas[-1].strip() if encontradas else None
+
+
+def cargar_trazas(ruta):
+    """{pregunta: [respuestas del modelo en orden]} desde un JSONL (vacío si no existe)."""
+    if not os.path.exists(ruta):
+        return {}
+    trazas = {}
+    with open(ruta, encoding="utf-8") as archivo:
+        for linea in archivo:
+            if linea.strip():
+                traza = json.loads(linea)
+                trazas[traza["pregunta"]] = traza["respuestas"]
+    return trazas
+
+
+def guardar_trazas(ruta, trazas):
+    with open(ruta, "w", encoding="utf-8") as archivo:
+        for pregunta, respuestas in trazas.items():
+            archivo.write(json.dumps({"pregunta": pregunta, "respuestas": respuestas}, ensure_ascii=False) + "\n")
+
+
+class GrabadorTrazas(BaseCallbackHandler):
+    """Graba en `ruta` la traza ReAct de cada pregunta al terminar su respuesta final."""
+
+    def __init__(self, ruta):
+        self.ruta = ruta
+        self._prompts = {}
+        self._pasos = {}
+        self._lock = threading.Lock()
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        self._prompts[run_id] = "\n".join(m.content for m in messages[0])
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        pregunta = pregunta_de_prompt(self._prompts.pop(run_id, ""))
+        if pregunta is None:
+            return
+        texto = response.generations[0][0].text
+        with self._lock:
+            pasos = self._pasos.setdefault(pregunta, [])
+            pasos.append(texto)
+            if "Final Answer:" in texto:
+                del self._pasos[pregunta]
+                with open(self.ruta, "a", encoding="utf-8") as archivo:
+                    archivo.write(json.dumps({"pregunta": pregunta, "respuestas": pasos}, ensure_ascii=False) + "\n")
+
+
+# ─── Tokens ───────────────────────────────────────────────────────────────
+try:
+    import tiktoken
+    _CODIFICADOR = tiktoken.get_encoding("cl100k_base")
+except Exception:
+    _CODIFICADOR = None
+
+
+def contar_tokens(texto):
+    if _CODIFICADOR is not None:
+        return len(_CODIFICADOR.encode(texto))
+    return (len(texto) + 3) // 4
+
+
+class ContadorTokens(BaseCallbackHandler):
+    """Cuenta llamadas al modelo y tokens de prompt y de respuesta."""
+
+    def __init__(self):
+        self.llamadas = 0
+        self.tokens_prompt = 0
+        self.tokens_respuesta = 0
+
+    def on_chat_model_start(self, serialized, messages, **kwargs):
+        self.llamadas += 1
+        self.tokens_prompt += sum(contar_tokens(m.content) for m in messages[0])
+
+    def on_llm_end(self, response, **kwargs):
+        self.tokens_respuesta += sum(contar_tokens(g.text) for gen in response.generations for g in gen)
@@ -0,0 +1,128 @@
+"""
+resumenes.py – Resumen mensual por usuario mantenido de forma incremental
+========================================================================
+La tabla `resumen_mensual_usuario` guarda, por (Usuario, Mes, Categoria), las
+sumas y conteos de ingresos y gastos. Cada alta o baja en `transacciones`
+llama a `aplicar_a_resumen` dentro de su misma transacción, así que el
+dashboard lee unas cuantas filas por mes en lugar de todo el histórico.
+
+Si el resumen se desincroniza (p. ej. por ediciones manuales a la base):
+$ python resumenes.py --reconstruir
+$ python resumenes.py --reconstruir --usuario usuario1
+"""
+import pandas as pd
+from sqlalchemy import text
+
+# Mes en formato 'YYYY-MM' a partir de Fecha ISO; Categoria nula se agrupa como ''.
+_SELECT_AGREGADO = """
+    SELECT Usuario, substr(Fecha, 1, 7) AS Mes, COALESCE(Categoria, '') AS Categoria,
+           SUM(Monto) AS Total,
+           SUM(CASE WHEN Monto > 0 THEN Monto ELSE 0 END) AS Ingresos,
+           SUM(CASE WHEN Monto < 0 THEN Monto ELSE 0 END) AS Gastos,
+           COUNT(*) AS NumMovimientos,
+           SUM(CASE WHEN Monto > 0 THEN 1 ELSE 0 END) AS NumIngresos,
+           SUM(CASE WHEN Monto < 0 THEN 1 ELSE 0 END) AS NumGastos
+    FROM transacciones
+"""
+
+_COLUMNAS = "Usuario, Mes, Categoria, Total, Ingresos, Gastos, NumMovimientos, NumIngresos, NumGastos"
+
+
+def crear_tabla_resumen(conn):
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS resumen_mensual_usuario (
+            Usuario TEXT NOT NULL,
+            Mes TEXT NOT NULL,
+            Categoria TEXT NOT NULL DEFAULT '',
+            Total REAL NOT NULL DEFAULT 0,
+            Ingresos REAL NOT NULL DEFAULT 0,
+            Gastos REAL NOT NULL DEFAULT 0,
+            NumMovimientos INTEGER NOT NULL DEFAULT 0,
+            NumIngresos INTEGER NOT NULL DEFAULT 0,
+            NumGastos INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (Usuario, Mes, Categoria)
+        )
+    """))
+
+
+def aplicar_a_resumen(conn, usuario, fecha, categoria, monto, signo=1):
+    """Suma (signo=1) o resta (signo=-1) un movimiento en el resumen de su mes."""
+    fecha = fecha if isinstance(fecha, str) else fecha.strftime("%Y-%m-%d")
+    monto = float(monto or 0)
+    conn.execute(
+        text(f"""
+            INSERT INTO resumen_mensual_usuario ({_COLUMNAS})
+            VALUES (:u, :mes, :cat, :total, :ing, :gas, :n, :n_ing, :n_gas)
+            ON CONFLICT (Usuario, Mes, Categoria) DO UPDATE SET
+                Total = resumen_mensual_usuario.Total + excluded.Total,
+                Ingresos = resumen_mensual_usuario.Ingresos + excluded.Ingresos,
+                Gastos = resumen_mensual_usuario.Gastos + excluded.Gastos,
+                NumMovimientos = resumen_mensual_usuario.NumMovimientos + excluded.NumMovimientos,
+                NumIngresos = resumen_mensual_usuario.NumIngresos + excluded.NumIngresos,
+                NumGastos = resumen_mensual_usuario.NumGastos + excluded.NumGastos
+        """),
+        {
+            "u": usuario,
+            "mes": fecha[:7],
+            "cat": categoria or "",
+            "total": signo * monto,
+            "ing": signo * max(monto, 0.0),
+            "gas": signo * min(monto, 0.0),
+            "n": signo,
+            "n_ing": signo * int(monto > 0),
+            "n_gas": signo * int(monto < 0),
+        }
+    )
+    if signo < 0:
+        conn.execute(
+            text("""
+                DELETE FROM resumen_mensual_usuario
+                WHERE Usuario = :u AND Mes = :mes AND Categoria = :cat AND NumMovimientos <= 0
+            """),
+            {"u": usuario, "mes": fecha[:7], "cat": categoria or ""}
+        )
+
+
+def recalcular_resumen(conn, usuario=None):
+    """Recalcula desde `transacciones` el resumen de un usuario (o de todos)."""
+    if usuario is None:
+        conn.execute(text("DELETE FROM resumen_mensual_usuario"))
+        conn.execute(text(f"INSERT INTO resumen_mensual_usuario ({_COLUMNAS}) {_SELECT_AGREGADO} GROUP BY 1, 2, 3"))
+    else:
+        conn.execute(text("DELETE FROM resumen_mensual_usuario WHERE Usuario = :u"), {"u": usuario})
+        conn.execute(
+            text(f"INSERT INTO resumen_mensual_usuario ({_COLUMNAS}) {_SELECT_AGREGADO} WHERE Usuario = :u GROUP BY 1, 2, 3"),
+            {"u": usuario}
+        )
+
+
+def reconstruir_resumen_mensual(engine, usuario=None):
+    with engine.begin() as conn:
+        recalcular_resumen(conn, usuario)
+
+
+def leer_resumen_mensual(engine, usuario, mes=None):
+    consulta = "SELECT * FROM resumen_mensual_usuario WHERE Usuario = :u"
+    params = {"u": usuario}
+    if mes:
+        consulta += " AND Mes = :mes"
+        params["mes"] = mes
+    with engine.connect() as conn:
+        return pd.read_sql_query(text(consulta + " ORDER BY Mes, Categoria"), conn, params=params)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from db import get_engine
+
+    parser = argparse.ArgumentParser(description="Resumen mensual por usuario")
+    parser.add_argument("--reconstruir", action="store_true", help="Recalcula el resumen desde transacciones")
+    parser.add_argument("--usuario", default=None, help="Limita la reconstrucción a un usuario")
+    args = parser.parse_args()
+
+    if args.reconstruir:
+        reconstruir_resumen_mensual(get_engine(), args.usuario)
+        print("Resumen mensual reconstruido.")
+    else:
+        parser.print_help()
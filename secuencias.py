@@ -0,0 +1,70 @@
+"""
+secuencias.py – Asignación de IDs respaldada por la base de datos
+================================================================
+Los IDs de `transacciones` salen de la tabla `secuencias` (ver migración 2).
+Reservar un ID es un solo `UPDATE ... RETURNING` sobre una fila indexada por
+su llave primaria: O(1), atómico bajo el candado de escritura de SQLite (o el
+candado de fila en Postgres) y sin recorrer la tabla para calcular MAX(ID).
+
+Con `bloque > 1` cada proceso reserva rangos completos y los reparte desde
+memoria; los IDs siguen siendo únicos pero sólo son crecientes dentro de cada
+proceso, y un bloque no usado deja un hueco en la numeración.
+"""
+import os
+import threading
+
+from sqlalchemy import text
+
+BLOQUE_DEFAULT = int(os.getenv("BILLIE_BLOQUE_IDS", "1"))
+
+
+def reservar_ids(conn, cantidad=1, secuencia="transacciones"):
+    """Reserva `cantidad` IDs consecutivos dentro de la transacción de `conn`."""
+    fin = conn.execute(
+        text("UPDATE secuencias SET valor = valor + :n WHERE nombre = :s RETURNING valor"),
+        {"n": cantidad, "s": secuencia}
+    ).scalar()
+    if fin is None:
+        raise RuntimeError(f"La secuencia '{secuencia}' no existe; ejecuta `python migraciones.py`.")
+    return range(fin - cantidad + 1, fin + 1)
+
+
+class AsignadorIDs:
+    def __init__(self, engine, secuencia="transacciones", bloque=BLOQUE_DEFAULT):
+        self.engine = engine
+        self.secuencia = secuencia
+        self.bloque = max(1, bloque)
+        self._lock = threading.Lock()
+        self._siguiente = 0
+        self._limite = 0
+
+    def siguiente(self, conn=None):
+        # Sin preasignación el ID se reserva en la misma transacción del INSERT:
+        # si ésta se revierte, el contador también.
+        if self.bloque == 1 and conn is not None:
+            return reservar_ids(conn, 1, self.secuencia)[0]
+        with self._lock:
+            if self._siguiente >= self._limite:
+                rango = self.reservar(self.bloque)
+                self._siguiente, self._limite = rango.start, rango.stop
+            valor = self._siguiente
+            self._siguiente += 1
+            return valor
+
+    def reservar(self, cantidad):
+        # Transacción propia: el rango queda confirmado aunque el llamador falle,
+        # así ningún otro proceso puede recibir los mismos IDs.
+        with self.engine.begin() as conn:
+            return reservar_ids(conn, cantidad, self.secuencia)
+
+
+_asignadores = {}
+_asignadores_lock = threading.Lock()
+
+
+def obtener_asignador(engine, secuencia="transacciones"):
+    clave = (str(engine.url), secuencia)
+    with _asignadores_lock:
+        if clave not in _asignadores:
+            _asignadores[clave] = AsignadorIDs(engine, secuencia)
+        return _asignadores[clave]
@@ -0,0 +1,116 @@
+"""
+sesion_transacciones.py – Transacciones de la sesión con escritura directa
+=========================================================================
+`page_tu_dinero.py` guarda el historial del usuario en
+`st.session_state.transacciones` y antes lo volvía a leer completo de la base
+tras cada alta o baja. Ahora:
+
+* `guardar_en_sesion` y `eliminar_en_sesion` escriben en la base y aplican el
+  mismo cambio al DataFrame de la sesión y a los marcos de `analitica.py`
+  (`actualizar_analitica`): sólo se normaliza y se suma lo que cambió.
+* `sincronizar_sesion` corre al inicio de cada rerun y compara la versión de
+  datos del usuario (`version_datos`, una lectura por llave primaria) con la
+  última que vio la sesión. Si alguien más escribió (el agente, el importador,
+  otra pestaña) trae sólo las filas con ID mayor al último visto.
+* Un borrado externo no deja filas nuevas y los IDs sólo son crecientes dentro
+  de cada proceso (ver secuencias.py): si después del delta el número de filas
+  no coincide con `resumen_mensual_usuario`, se recarga el historial completo.
+
+Cada escritura propia sube la versión en uno y la sesión espera exactamente ese
+valor, así que una escritura externa intercalada se detecta en el siguiente
+rerun.
+
+$ python -m benchmarks.bench_sesion_transacciones
+"""
+import pandas as pd
+import streamlit as st
+from sqlalchemy import text
+
+from analitica import actualizar_analitica
+from utils import cargar_transacciones_usuario, eliminar_transacciones_usuario, guardar_transaccion_usuario
+from versiones import version_datos
+
+# {"usuario", "version", "ultimo_id"} de lo que hay en st.session_state.transacciones
+ESTADO = "_sesion_transacciones"
+
+
+def _recargar(engine, username):
+    with engine.connect() as conn:
+        version = version_datos(conn, username)
+    df = cargar_transacciones_usuario(engine, username)
+    st.session_state[ESTADO] = {
+        "usuario": username,
+        "version": version,
+        "ultimo_id": int(df["ID"].max()) if not df.empty else 0,
+    }
+    st.session_state.transacciones = df
+    return df
+
+
+def _aplicar(nuevas=None, ids_quitados=None):
+    """Agrega `nuevas` y quita `ids_quitados` del DataFrame de la sesión; devuelve el DataFrame nuevo."""
+    df = st.session_state.transacciones
+    quitadas = None
+    if ids_quitados:
+        mascara = df["ID"].isin(ids_quitados).to_numpy()
+        quitadas = df.index[mascara]
+        df = df[~mascara]
+    if nuevas is not None and not nuevas.empty:
+        # Índices a continuación de los existentes para no repetir etiquetas
+        inicio = int(df.index.max()) + 1 if len(df) else 0
+        nuevas = nuevas.set_axis(pd.RangeIndex(inicio, inicio + len(nuevas)))
+        df = pd.concat([df, nuevas]) if len(df) else nuevas
+        estado = st.session_state[ESTADO]
+        estado["ultimo_id"] = max(estado["ultimo_id"], int(nuevas["ID"].max()))
+    actualizar_analitica(df, nuevas, quitadas)
+    return df
+
+
+def sincronizar_sesion(engine, username):
+    """Transacciones del usuario al día con la base, leyendo sólo lo que cambió desde el último rerun."""
+    estado = st.session_state.get(ESTADO)
+    if estado is None or estado["usuario"] != username or "transacciones" not in st.session_state:
+        return _recargar(engine, username)
+    with engine.connect() as conn:
+        version = version_datos(conn, username)
+        if version == estado["version"]:
+            return st.session_state.transacciones
+        # `Usuario || ''` evita que SQLite elija el índice por usuario (recorrería todo su historial):
+        # con el rango sobre la llave primaria sólo lee las filas nuevas
+        nuevas = pd.read_sql_query(
+            text("SELECT * FROM transacciones WHERE ID > :id AND Usuario || '' = :u ORDER BY ID"),
+            conn,
+            params={"id": estado["ultimo_id"], "u": username}
+        )
+        total = conn.execute(
+            text("SELECT COALESCE(SUM(NumMovimientos), 0) FROM resumen_mensual_usuario WHERE Usuario = :u"),
+            {"u": username}
+        ).scalar()
+    if len(st.session_state.transacciones) + len(nuevas) != total:
+        return _recargar(engine, username)
+    estado["version"] = version
+    return _aplicar(nuevas)
+
+
+def _en_sesion(username):
+    estado = st.session_state.get(ESTADO)
+    return estado is not None and estado["usuario"] == username and "transacciones" in st.session_state
+
+
+def guardar_en_sesion(engine, fecha, categoria, cuenta, monto, username, descripcion):
+    """`guardar_transaccion_usuario` que además agrega la fila a la sesión; devuelve la fila insertada."""
+    fila = guardar_transaccion_usuario(engine, fecha, categoria, cuenta, monto, username, descripcion)
+    if fila and _en_sesion(username):
+        st.session_state[ESTADO]["version"] += 1
+        _aplicar(nuevas=pd.DataFrame([fila._asdict()]))
+    return fila
+
+
+def eliminar_en_sesion(engine, ids, username):
+    """`eliminar_transacciones_usuario` que además quita las filas de la sesión; devuelve cuántas se borraron."""
+    ids = [int(i) for i in ids]
+    eliminadas = eliminar_transacciones_usuario(engine, ids, username)
+    if eliminadas and _en_sesion(username):
+        st.session_state[ESTADO]["version"] += 1
+        _aplicar(ids_quitados=ids)
+    return eliminadas
@@ -5,10 +5,14 @@ import os
 from PIL import Image
 import base64
 from io import BytesIO
+from guardrails import obtener_guardrail
 
 
 st.set_page_config(page_title="Billie App", layout="wide")
 
+# Clasificador de temas: se carga y calienta una vez por proceso, no en la primera pregunta
+obtener_guardrail()
+
 # Inject custom CSS
 st.markdown(f"""
     <style>
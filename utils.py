@@ -1,18 +1,30 @@
 import pandas as pd
 import streamlit as st
-import re
 from datetime import datetime
-import unicodedata
-from sqlalchemy import text
+from sqlalchemy import bindparam, text
 from calendar import monthrange
-import yfinance as yf
-from prophet import Prophet
 import numpy as np
 import os
 from PIL import Image
 import base64
 from io import BytesIO
-
+from secuencias import obtener_asignador
+from huellas import huella_transaccion
+from resumenes import aplicar_a_resumen, leer_resumen_mensual
+from versiones import incrementar_version
+from db import get_engine
+from analitica import obtener_analitica
+from parser_transacciones import PARSER
+from precios import historial_precios
+from pronosticos import pronosticar_historial
+from planeacion_metas import describir_plan, plan_usuario
+
+
+def rango_mes(anio: int, mes: int):
+    # Límites ISO [inicio, fin) para filtrar Fecha por rango sobre el índice (Usuario, Fecha)
+    inicio = f"{anio}-{mes:02d}-01"
+    fin = f"{anio + 1}-01-01" if mes == 12 else f"{anio}-{mes + 1:02d}-01"
+    return inicio, fin
 
 def cargar_transacciones_usuario(engine, username):
     try:
@@ -27,140 +39,113 @@ def cargar_transacciones_usuario(engine, username):
         df = pd.DataFrame(columns=["ID", "Fecha","Descripcion", "Categoria", "Cuenta", "Monto", "Usuario"])
     return df
 
+def _insertar_transaccion(conn, engine, usuario, fecha, categoria, cuenta, monto, descripcion, deduplicar=True):
+    # Con `deduplicar` el duplicado se detecta con el índice UNIQUE de Huella en el mismo INSERT y
+    # devuelve None si ya existía una fila con el mismo contenido. Sin él (alta manual) siempre inserta:
+    # la huella se guarda sólo si es la primera, para que un import posterior siga reconociéndola.
+    if deduplicar:
+        sql = """
+            INSERT INTO transacciones (ID, Usuario, Fecha, Categoria, Cuenta, Monto, Descripcion, Huella)
+            VALUES (:ID, :Usuario, :Fecha, :Categoria, :Cuenta, :Monto, :Descripcion, :Huella)
+            ON CONFLICT (Huella) DO NOTHING
+            RETURNING *
+        """
+    else:
+        sql = """
+            INSERT INTO transacciones (ID, Usuario, Fecha, Categoria, Cuenta, Monto, Descripcion, Huella)
+            VALUES (:ID, :Usuario, :Fecha, :Categoria, :Cuenta, :Monto, :Descripcion,
+                    CASE WHEN EXISTS (SELECT 1 FROM transacciones WHERE Huella = :Huella) THEN NULL ELSE :Huella END)
+            RETURNING *
+        """
+    insertada = conn.execute(
+        text(sql),
+        {
+            "ID": obtener_asignador(engine).siguiente(conn),
+            "Usuario": usuario,
+            "Fecha": fecha.strftime("%Y-%m-%d"),
+            "Categoria": categoria,
+            "Cuenta": cuenta,
+            "Monto": monto,
+            "Descripcion": descripcion,
+            "Huella": huella_transaccion(usuario, fecha, categoria, monto, cuenta)
+        }
+    ).fetchone()
+    if insertada:
+        aplicar_a_resumen(conn, usuario, fecha, categoria, monto)
+        incrementar_version(conn, usuario)
+    return insertada
+
 def guardar_transaccion_usuario(engine, fecha, categoria, cuenta, monto, username, descripcion):
+    # Alta manual desde los formularios: dos movimientos iguales el mismo día pueden ser legítimos
     with engine.begin() as conn:
-        next_id = int(st.session_state.transacciones["ID"].max() + 1) if not st.session_state.transacciones.empty else 1
-        conn.execute(
-            text("""
-                INSERT INTO transacciones (ID,Usuario, Fecha, Categoria, Cuenta, Monto,Descripcion)
-                VALUES (:ID,:Usuario, :Fecha, :Categoria, :Cuenta, :Monto,:Descripcion)
-            """),
-            {
-                "ID": next_id,
-                "Usuario": username,
-                "Fecha": fecha.strftime("%Y-%m-%d"),
-                "Categoria": categoria,
-                "Cuenta": cuenta,
-                "Monto": monto,
-                "Descripcion": descripcion
-            }
-        )
+        return _insertar_transaccion(conn, engine, username, fecha, categoria, cuenta, monto, descripcion,
+                                     deduplicar=False)
+
+def eliminar_transaccion_usuario(engine, id_transaccion, username):
+    return eliminar_transacciones_usuario(engine, [id_transaccion], username) == 1
+
+def _reasignar_huellas(conn, usuario, huellas):
+    # Un duplicado guardado sin huella (alta manual o migración 4) hereda la de la fila borrada, para que
+    # el mismo contenido se siga reconociendo como duplicado. `Usuario || ''` hace que SQLite busque por
+    # el índice de Huella (sólo las filas sin huella, que son pocas) y no recorra el historial del usuario.
+    huellas = set(huellas)
+    if not huellas:
+        return
+    sin_huella = conn.execute(
+        text("SELECT ID, Fecha, Categoria, Monto, Cuenta FROM transacciones WHERE Huella IS NULL AND Usuario || '' = :u ORDER BY ID"),
+        {"u": usuario}
+    ).fetchall()
+    for fila in sin_huella:
+        huella = huella_transaccion(usuario, fila.Fecha, fila.Categoria, fila.Monto, fila.Cuenta)
+        if huella in huellas:
+            huellas.discard(huella)
+            conn.execute(text("UPDATE transacciones SET Huella = :h WHERE ID = :id"), {"h": huella, "id": fila.ID})
+            if not huellas:
+                break
+
+def eliminar_transacciones_usuario(engine, ids, username):
+    """Borra con un solo DELETE las transacciones `ids` del usuario; devuelve cuántas se borraron."""
+    ids = [int(i) for i in ids]
+    if not ids:
+        return 0
+    with engine.begin() as conn:
+        borradas = conn.execute(
+            text("DELETE FROM transacciones WHERE Usuario = :username AND ID IN :ids RETURNING Fecha, Categoria, Monto, Huella")
+            .bindparams(bindparam("ids", expanding=True)),
+            {"ids": ids, "username": username}
+        ).fetchall()
+        for borrada in borradas:
+            aplicar_a_resumen(conn, username, borrada.Fecha, borrada.Categoria, borrada.Monto, signo=-1)
+        _reasignar_huellas(conn, username, [b.Huella for b in borradas if b.Huella])
+        if borradas:
+            incrementar_version(conn, username)
+    return len(borradas)
 
 def get_total_spent(username: str):
-    df = st.session_state.get("transacciones", pd.DataFrame())
-    if df.empty:
+    if st.session_state.get("transacciones", pd.DataFrame()).empty:
         return "No hay transacciones registradas."
-    df = df[df["Usuario"] == username]
-    total = df[df["Monto"] < 0]["Monto"].sum()
-    return f"Has gastado ${abs(total):,.2f}"
+    af = obtener_analitica(username)
+    return f"Has gastado ${abs(af.total_gastos):,.2f}"
 
 def get_total_earned(username: str):
-    df = st.session_state.get("transacciones", pd.DataFrame())
-    if df.empty:
+    if st.session_state.get("transacciones", pd.DataFrame()).empty:
         return "No hay transacciones registradas."
-    df = df[df["Usuario"] == username]
-    total = df[df["Monto"] > 0]["Monto"].sum()
-    return f"Has ingresado ${total:,.2f}"
+    af = obtener_analitica(username)
+    return f"Has ingresado ${af.total_ingresos:,.2f}"
 
 def registrar_transaccion_desde_texto(texto, usuario, engine):
-    def normalizar(text):
-        return unicodedata.normalize("NFKD", text).encode("ASCII", "ignore").decode("utf-8").lower()
-
-    MESES_ESPANOL = {
-        "enero": "01", "febrero": "02", "marzo": "03", "abril": "04",
-        "mayo": "05", "junio": "06", "julio": "07", "agosto": "08",
-        "septiembre": "09", "octubre": "10", "noviembre": "11", "diciembre": "12"
-    }
-
     try:
-        texto_norm = normalizar(texto)
-        palabras_texto = set(texto_norm.split())
-        categorias = {
-            "necesidades": "Necesidades 🍎", "super": "Necesidades 🍎", "comida": "Necesidades 🍎", 
-            "renta": "Necesidades 🍎", "medico": "Necesidades 🍎", "transporte": "Necesidades 🍎", "escuela": "Necesidades 🍎",
-            "gustos": "Gustos 🎁", "cine": "Gustos 🎁", "restaurante": "Gustos 🎁", "ropa": "Gustos 🎁", "viaje": "Gustos 🎁",
-            "metas financieras": "Metas financieras 💰", "ahorro": "Metas financieras 💰",
-            "nomina": "Ingresos 💵", "ingreso": "Ingresos 💵", "quincena": "Ingresos 💵", "salario": "Ingresos 💵"
-        }
-        categoria = None
-        for k, v in categorias.items():
-            if k in palabras_texto:
-                categoria = v
-                break
-        if not categoria:
-            categoria = "Gustos 🎁"
-
-        # Buscar descripción usando "en <palabra>"
-        descripcion = categoria
-        match_desc = re.search(r"en ([a-zA-Záéíóúñ]+)", texto_norm)
-        if match_desc:
-            descripcion = match_desc.group(1).capitalize()
-
-        monto_match = re.search(r"(-?\$?\d+(?:[\.,]\d{1,2})?)", texto_norm)
-        monto = float(monto_match.group().replace("$", "").replace(",", "")) if monto_match else 0.0
-
-        palabras_egreso = ["gasto", "egreso", "pague", "pago", "compra", "retiro", "salida"]
-        palabras_ingreso = ["ingreso", "abono", "deposito", "bonificacion", "reembolso", "reintegro"]
-        if any(p in texto_norm for p in palabras_egreso):
-            monto = -abs(monto)
-        elif any(p in texto_norm for p in palabras_ingreso):
-            monto = abs(monto)
-        categorias_negativas = ["Necesidades 🍎", "Gustos 🎁", "Metas financieras 💰"]
-        if categoria in categorias_negativas and monto > 0:
-            monto = -abs(monto)
-
-        cuenta_match = re.search(r"(tarjeta|banorte|bbva|hsbc|efectivo|cash|card)", texto_norm)
-        cuenta = cuenta_match.group().capitalize() if cuenta_match else "General"
-
-        fecha = datetime.now().date()
-        fecha_match = re.search(r"(\d{1,2}) de ([a-zA-Z]+)", texto_norm)
-        if fecha_match:
-            dia = int(fecha_match.group(1))
-            mes_str = fecha_match.group(2)
-            mes_num = MESES_ESPANOL.get(mes_str)
-            if mes_num:
-                anio = datetime.today().year
-                fecha_str = f"{anio}-{mes_num}-{dia:02d}"
-                fecha = datetime.strptime(fecha_str, "%Y-%m-%d").date()
+        registro = PARSER.parse(texto)
+        fecha, descripcion, categoria, cuenta, monto = (
+            registro["Fecha"], registro["Descripcion"], registro["Categoria"], registro["Cuenta"], registro["Monto"]
+        )
 
-        with engine.connect() as conn:
-            result = conn.execute(
-                text("""
-                SELECT COUNT(*) FROM transacciones
-                WHERE Usuario = :Usuario AND Fecha = :Fecha AND Categoria = :Categoria AND Monto = :Monto AND Cuenta = :Cuenta
-                """),
-                {
-                    "Usuario": usuario,
-                    "Fecha": fecha.strftime("%Y-%m-%d"),
-                    "Categoria": categoria,
-                    "Monto": monto,
-                    "Cuenta": cuenta
-                }
-            )
-            ya_existe = result.scalar() > 0
+        with engine.begin() as conn:
+            insertada = _insertar_transaccion(conn, engine, usuario, fecha, categoria, cuenta, monto, descripcion)
 
-        if ya_existe:
+        if not insertada:
             return "⚠️ Esta transacción ya existe y no fue registrada de nuevo."
 
-        with engine.begin() as conn:
-            result = conn.execute(text("SELECT MAX(ID) FROM transacciones"))
-            next_id = (result.scalar() or 0) + 1
-            conn.execute(
-                text("""
-                    INSERT INTO transacciones (ID, Usuario, Fecha, Descripcion, Categoria, Cuenta, Monto)
-                    VALUES (:ID, :Usuario, :Fecha, :Descripcion, :Categoria, :Cuenta, :Monto)
-                """),
-                {
-                    "ID": next_id,
-                    "Usuario": usuario,
-                    "Fecha": fecha.strftime("%Y-%m-%d"),
-                    "Descripcion": descripcion,
-                    "Categoria": categoria,
-                    "Cuenta": cuenta,
-                    "Monto": monto
-                }
-            )
-
         tipo = "ingreso" if monto >= 0 else "gasto"
         return f"✅ Se registró un {tipo}: {descripcion} ({categoria}), {cuenta}, ${abs(monto):,.2f} el {fecha.isoformat()}"
 
@@ -182,72 +167,55 @@ def get_gastos_por_categoria(categoria_input: str, username: str):
     categoria_real = CATEGORIA_ALIAS.get(categoria_input)
     if not categoria_real:
         return f"La categoría '{categoria_input}' no es válida. Usa: {', '.join(CATEGORIA_ALIAS.keys())}."
-    df = df[df["Usuario"] == username]
-    mask = (df["Categoria"] == categoria_real) & (df["Monto"] < 0)
-    total = df[mask]["Monto"].sum()
+    total = obtener_analitica(username).gasto_categoria(categoria_real)
     if total == 0:
         return f"No hay gastos registrados en la categoría '{categoria_real}'."
     return f"Gasto en {categoria_real}: ${abs(total):,.2f}"
 
 def get_gastos_por_mes(mes: int, anio: int):
-    df = st.session_state.get("transacciones", pd.DataFrame())
-    if "Fecha" in df.columns:
-        df["Fecha"] = pd.to_datetime(df["Fecha"], errors="coerce")
-    mask = (df["Fecha"].dt.month == mes) & (df["Fecha"].dt.year == anio) & (df["Monto"] < 0)
-    total = df[mask]["Monto"].sum()
+    total = obtener_analitica().gasto_mes(mes, anio)
     return f"Gasto en {anio}-{mes:02d}: ${abs(total):,.2f}"
 
-def resumen_mensual():
-    df = st.session_state.get("transacciones", pd.DataFrame())
-    if "Fecha" in df.columns:
-        df["Fecha"] = pd.to_datetime(df["Fecha"], errors="coerce")
-    df["Mes"] = df["Fecha"].dt.to_period("M")
-    resumen = df.groupby("Mes")["Monto"].sum().reset_index()
+def tabla_resumen_mensual(username=None, engine=None):
+    # Neto por mes (columnas Mes, Monto); el agente la compacta en formato_salidas.py
+    if username:
+        resumen = leer_resumen_mensual(engine or get_engine(), username)
+        return resumen.groupby("Mes", as_index=False)["Total"].sum().rename(columns={"Total": "Monto"})
+    return obtener_analitica().por_mes["total"].rename("Monto").rename_axis("Mes").reset_index()
+
+def resumen_mensual(username=None, engine=None):
+    resumen = tabla_resumen_mensual(username, engine)
     resumen["Monto"] = resumen["Monto"].map(lambda x: f"${x:,.2f}")
     return resumen.to_string(index=False)
 
 def get_balance_actual():
-    df = st.session_state.get("transacciones", pd.DataFrame())
-    total = df["Monto"].sum()
+    total = obtener_analitica().balance
     return f"Tu balance actual es de ${total:,.2f}"
 
 def get_ultimas_transacciones(n=5):
-    df = st.session_state.get("transacciones", pd.DataFrame())
-    if "Fecha" in df.columns:
-        df["Fecha"] = pd.to_datetime(df["Fecha"], errors="coerce")
-    ultimas = df.sort_values("Fecha", ascending=False).head(n)
-    return ultimas[["Fecha","Descripcion","Categoria", "Cuenta", "Monto"]].to_string(index=False)
+    return obtener_analitica().ultimas(n).to_string(index=False)
+
+def get_mayor_gasto(username=None):
+    fila = obtener_analitica(username).mayor_gasto()
+    if fila is None:
+        return "No hay gastos registrados."
+    return (f"Tu mayor gasto fue de ${abs(fila['Monto']):,.2f} en {fila['Descripcion']} "
+            f"({fila['Categoria']}) el {str(fila['Fecha'])[:10]}")
 
 def get_promedio_gastos(periodo="mensual", username=None):
-    df = st.session_state.get("transacciones", pd.DataFrame())
-    if username:
-        df = df[df["Usuario"] == username]
-    df = df[df["Monto"] < 0]
-    if df.empty:
+    af = obtener_analitica(username)
+    if not af.es_gasto.any():
         return "No hay gastos registrados."
-    if "Fecha" in df.columns:
-        df["Fecha"] = pd.to_datetime(df["Fecha"], errors="coerce")
-    if periodo == "mensual":
-        res = df.groupby([df["Fecha"].dt.year, df["Fecha"].dt.month])["Monto"].sum()
-    elif periodo == "semanal":
-        res = df.groupby(df["Fecha"].dt.isocalendar().week)["Monto"].sum()
-    else:  # diario
-        res = df.groupby(df["Fecha"].dt.date)["Monto"].sum()
-    promedio = res.mean()
+    promedio = af.promedio_gastos(periodo)
     return f"El gasto promedio {periodo} es de ${abs(promedio):,.2f}"
 
 def proyeccion_saldo_fin_mes(username=None):
-    df = st.session_state.get("transacciones", pd.DataFrame())
-    if username:
-        df = df[df["Usuario"] == username]
-    if df.empty:
+    af = obtener_analitica(username)
+    if af.vacio:
         return "No hay datos suficientes."
-    if "Fecha" in df.columns:
-        df["Fecha"] = pd.to_datetime(df["Fecha"], errors="coerce")
     hoy = datetime.today()
-    saldo_actual = df["Monto"].sum()
-    gastos_mes = df[(df["Fecha"].dt.month == hoy.month) & (df["Monto"] < 0)]["Monto"].sum()
-    ingresos_mes = df[(df["Fecha"].dt.month == hoy.month) & (df["Monto"] > 0)]["Monto"].sum()
+    saldo_actual = af.balance
+    gastos_mes, ingresos_mes = af.movimientos_mes_del_anio(hoy.month)
     dias_mes = monthrange(hoy.year, hoy.month)[1]
     dias_faltantes = dias_mes - hoy.day
     gasto_diario = gastos_mes / hoy.day if hoy.day > 0 else 0
@@ -256,121 +224,115 @@ def proyeccion_saldo_fin_mes(username=None):
     return f"Tu saldo proyectado a fin de mes es de ${saldo_proyectado:,.2f}"
 
 def ranking_gastos_categorias(username=None, top=3):
-    df = st.session_state.get("transacciones", pd.DataFrame())
-    if username:
-        df = df[df["Usuario"] == username]
-    gastos = df[df["Monto"] < 0].groupby("Categoria")["Monto"].sum().abs().sort_values(ascending=False)
+    gastos = obtener_analitica(username).gastos_por_categoria
     if gastos.empty:
         return "No hay gastos registrados."
     return gastos.head(top).to_string()
 
 def ranking_ingresos_categorias(username=None, top=3):
-    df = st.session_state.get("transacciones", pd.DataFrame())
-    if username:
-        df = df[df["Usuario"] == username]
-    ingresos = df[df["Monto"] > 0].groupby("Categoria")["Monto"].sum().sort_values(ascending=False)
+    ingresos = obtener_analitica(username).ingresos_por_categoria
     if ingresos.empty:
         return "No hay ingresos registrados."
     return ingresos.head(top).to_string()
 
 def porcentaje_gastos_por_categoria(username=None):
-    df = st.session_state.get("transacciones", pd.DataFrame())
-    if username:
-        df = df[df["Usuario"] == username]
-    total_gastos = abs(df[df["Monto"] < 0]["Monto"].sum())
+    af = obtener_analitica(username)
+    total_gastos = abs(af.total_gastos)
     if total_gastos == 0:
         return "No hay gastos registrados."
-    resumen = df[df["Monto"] < 0].groupby("Categoria")["Monto"].sum().abs() / total_gastos * 100
+    resumen = af.gastos_por_categoria.sort_index() / total_gastos * 100
     return resumen.round(2).to_string()
 
-def alerta_gasto_excesivo(username=None):
-    df = st.session_state.get("transacciones", pd.DataFrame())
+def _gastos_mensuales(username, engine=None):
+    # Gasto absoluto por mes (sólo meses con gastos) leído del resumen incremental
+    resumen = leer_resumen_mensual(engine or get_engine(), username)
+    resumen = resumen[resumen["NumGastos"] > 0]
+    gastos = resumen.groupby("Mes")["Gastos"].sum().abs()
+    gastos.index = pd.PeriodIndex(gastos.index, freq="M", name="Fecha")
+    return gastos.rename("Monto")
+
+def alerta_gasto_excesivo(username=None, engine=None):
     if username:
-        df = df[df["Usuario"] == username]
-    if df.empty:
+        gastos = _gastos_mensuales(username, engine)
+        if gastos.empty:
+            return "No hay datos suficientes."
+        gastos_mes = gastos.get(pd.Period(datetime.now(), freq="M"), 0.0)
+        if gastos_mes > gastos.mean() * 1.2:
+            return "🚨 ¡Alerta! Este mes has gastado más de lo habitual. Revisa tus gastos."
+        return "Tus gastos van dentro de lo normal."
+    af = obtener_analitica()
+    if af.vacio:
         return "No hay datos suficientes."
-    if "Fecha" in df.columns:
-        df["Fecha"] = pd.to_datetime(df["Fecha"], errors="coerce")
-    mes_actual = datetime.now().month
-    gastos_mes = abs(df[(df["Fecha"].dt.month == mes_actual) & (df["Monto"] < 0)]["Monto"].sum())
-    promedio_6m = abs(df[df["Monto"] < 0].groupby(df["Fecha"].dt.to_period("M"))["Monto"].sum()).mean()
-    if gastos_mes > promedio_6m * 1.2:
+    gastos_mes, _ = af.movimientos_mes_del_anio(datetime.now().month)
+    promedio_6m = af.gastos_por_mes.mean()
+    if abs(gastos_mes) > promedio_6m * 1.2:
         return "🚨 ¡Alerta! Este mes has gastado más de lo habitual. Revisa tus gastos."
     return "Tus gastos van dentro de lo normal."
 
 def sugerencia_ahorro(username=None):
-    df = st.session_state.get("transacciones", pd.DataFrame())
-    if username:
-        df = df[df["Usuario"] == username]
-    top_gusto = df[df["Categoria"] == "Gustos 🎁"]["Monto"].sum()
+    top_gusto = obtener_analitica(username).total_categoria("Gustos 🎁")
     if top_gusto < 0:
         return f"Si reduces tus gastos en 'Gustos 🎁' un 20%, podrías ahorrar ${abs(top_gusto)*0.2:,.2f} este mes."
     return "No hay gastos suficientes para sugerencias."
 
+def tabla_busqueda(keyword, username=None):
+    return obtener_analitica(username).buscar(keyword)
+
 def buscar_transacciones(keyword, username=None):
-    df = st.session_state.get("transacciones", pd.DataFrame())
-    if username:
-        df = df[df["Usuario"] == username]
-    matches = df[df["Descripcion"].str.contains(keyword, case=False, na=False)]
+    matches = tabla_busqueda(keyword, username)
     if matches.empty:
         return "No se encontraron transacciones."
-    return matches[["Fecha","Descripcion","Categoria","Cuenta","Monto"]].to_string(index=False)
+    return matches.to_string(index=False)
 
 def evolucion_balance(username=None):
-    df = st.session_state.get("transacciones", pd.DataFrame())
-    if username:
-        df = df[df["Usuario"] == username]
-    if df.empty:
+    af = obtener_analitica(username)
+    if af.vacio:
         return pd.DataFrame(columns=["Fecha", "Balance"])
-    if "Fecha" in df.columns:
-        df["Fecha"] = pd.to_datetime(df["Fecha"], errors="coerce")
-    df = df.sort_values("Fecha")
-    df["Balance"] = df["Monto"].cumsum()
-    return df[["Fecha", "Balance"]]
+    return af.evolucion_balance()
 
-def comparativa_gastos_mensual(username=None):
-    df = st.session_state.get("transacciones", pd.DataFrame())
+def tabla_gastos_mensuales(username=None, engine=None):
     if username:
-        df = df[df["Usuario"] == username]
-    if df.empty:
+        return _gastos_mensuales(username, engine)
+    return obtener_analitica().gastos_por_mes
+
+def comparativa_gastos_mensual(username=None, engine=None):
+    gastos = tabla_gastos_mensuales(username, engine)
+    if gastos.empty:
         return "No hay transacciones."
-    if "Fecha" in df.columns:
-        df["Fecha"] = pd.to_datetime(df["Fecha"], errors="coerce")
-    resumen = df[df["Monto"] < 0].groupby(df["Fecha"].dt.to_period("M"))["Monto"].sum().abs()
-    return resumen.round(2).to_string()
+    return gastos.round(2).to_string()
+
+def tabla_gastos_recurrentes(username=None):
+    # Veces que se repite cada descripción de gasto (más de 2), de mayor a menor
+    recurrentes = obtener_analitica(username).descripciones_gasto
+    return recurrentes[recurrentes > 2]
 
 def gastos_recurrentes(username=None):
-    df = st.session_state.get("transacciones", pd.DataFrame())
-    if username:
-        df = df[df["Usuario"] == username]
-    if df.empty:
+    if obtener_analitica(username).vacio:
         return "No hay transacciones."
-    recurrentes = df[df["Monto"] < 0]["Descripcion"].value_counts()
-    recurrentes = recurrentes[recurrentes > 2]
+    recurrentes = tabla_gastos_recurrentes(username)
     if recurrentes.empty:
         return "No se detectaron gastos recurrentes."
     return recurrentes.to_string()
 
-def sugerencia_presupuesto(username=None):
-    df = st.session_state.get("transacciones", pd.DataFrame())
+def sugerencia_presupuesto(username=None, engine=None):
     if username:
-        df = df[df["Usuario"] == username]
-    if df.empty:
+        gastos = _gastos_mensuales(username, engine)
+        if gastos.empty:
+            return "No hay transacciones."
+        sugerido = gastos.mean() * 0.9  # Sugerir gastar un 10% menos
+        return f"Te sugerimos establecer un presupuesto mensual máximo de ${sugerido:,.2f}."
+    af = obtener_analitica()
+    if af.vacio:
         return "No hay transacciones."
-    if "Fecha" in df.columns:
-        df["Fecha"] = pd.to_datetime(df["Fecha"], errors="coerce")
-    promedio_gasto = abs(df[df["Monto"] < 0].groupby(df["Fecha"].dt.to_period("M"))["Monto"].sum()).mean()
-    sugerido = promedio_gasto * 0.9  # Sugerir gastar un 10% menos
+    sugerido = af.gastos_por_mes.mean() * 0.9  # Sugerir gastar un 10% menos
     return f"Te sugerimos establecer un presupuesto mensual máximo de ${sugerido:,.2f}."
 
 def simulador_sin_gasto_en(categoria, username=None):
-    df = st.session_state.get("transacciones", pd.DataFrame())
-    if username:
-        df = df[df["Usuario"] == username]
-    if df.empty:
+    af = obtener_analitica(username)
+    if af.vacio:
         return "No hay transacciones."
-    total_categoria = df[(df["Categoria"] == categoria) & (df["Monto"] < 0)]["Monto"].sum()
-    saldo_actual = df["Monto"].sum()
+    total_categoria = af.gasto_categoria(categoria)
+    saldo_actual = af.balance
     saldo_proyectado = saldo_actual - total_categoria
     return f"Si dejas de gastar en {categoria}, tu balance aumentaría a ${saldo_proyectado:,.2f}."
 
@@ -418,30 +380,8 @@ def get_resumen_metas(engine, username):
     return resumen
 
 def get_recomendacion_asignacion(engine, username):
-    with engine.connect() as conn:
-        df = pd.read_sql("SELECT * FROM metas_financieras WHERE usuario = :u ORDER BY plazo_meses ASC", conn, params={"u": username})
-        result = conn.execute(
-            text("SELECT ABS(SUM(Monto)) FROM transacciones WHERE Usuario = :u AND Categoria = 'Metas financieras 💰'"),
-            {"u": username}
-        )
-        total_ahorrado = result.scalar() or 0
-        asignado = df["monto_actual"].sum()
-        disponible = total_ahorrado - asignado
-
-    if disponible <= 0:
-        return "No tienes ahorro disponible para asignar a tus metas por ahora."
-
-    mensaje = f"Tienes ${disponible:,.0f} disponibles. Puedes asignarlos así:\n\n"
-    for _, row in df.iterrows():
-        restante = row["monto_objetivo"] - row["monto_actual"]
-        sugerido = min(disponible, restante)
-        if sugerido > 0:
-            mensaje += f"- Asignar ${sugerido:,.0f} a '{row['nombre_meta']}'\n"
-            disponible -= sugerido
-        if disponible <= 0:
-            break
-
-    return mensaje
+    # Disponible por plazo y aportación mensual según su tasa de ahorro real (ver planeacion_metas.py)
+    return describir_plan(plan_usuario(engine, username))
 
 def construir_presupuesto_asistido(username: str, engine):
     """
@@ -590,29 +530,8 @@ def calcular_evolucion_anual(monto_inicial, tasa_anual, años):
 
 def forecast_yf_ticker(ticker: str, monto_inicial: float, años: int):
     try:
-        #df = yf.Ticker(ticker, period="max", interval="1d", progress=False)[["Close"]].dropna()
-        fondo = yf.Ticker(ticker)
-        hist = fondo.history(period="max")
-        df = hist[["Close"]].reset_index()
-        df = df.reset_index().rename(columns={"Date": "ds", "Close": "y"})
-        df["ds"]=df["ds"].dt.tz_localize(None)
-        df = df[df["y"] > 0]
-
-        model = Prophet(daily_seasonality=True)
-        model.fit(df)
-
-        future = model.make_future_dataframe(periods=años * 365)
-        forecast = model.predict(future)
-
-        df_merge = forecast[["ds", "yhat"]].tail(1)
-        final_price = df_merge["yhat"].values[0]
-        initial_price = df["y"].iloc[-1]
-
-        crecimiento = final_price / initial_price
-        monto_final = monto_inicial * crecimiento
-        cagr = (crecimiento) ** (1 / años) - 1
-
-        return monto_final, cagr, model, df, forecast
+        # Del almacén local: sólo se descargan las barras nuevas (ver precios.py)
+        return pronosticar_historial(historial_precios(ticker), monto_inicial, años)
     except Exception as e:
         return None, None, None, None, None
 
@@ -0,0 +1,39 @@
+"""
+versiones.py – Versión de los datos de cada usuario
+==================================================
+`version_datos` guarda un contador por usuario que sube cada vez que cambian
+sus transacciones o sus metas financieras (ver migración 5). Quien guarda algo
+derivado de esos datos, como las respuestas de Billie en `cache_respuestas.py`,
+lo marca con la versión y lo descarta cuando ya no coincide.
+
+Igual que `aplicar_a_resumen`, `incrementar_version` se llama dentro de la misma
+transacción que modifica los datos: si ésta se revierte, la versión también.
+"""
+from sqlalchemy import text
+
+
+def crear_tabla_versiones(conn):
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS version_datos (
+            Usuario TEXT PRIMARY KEY,
+            Version INTEGER NOT NULL DEFAULT 0
+        )
+    """))
+
+
+def incrementar_version(conn, usuario):
+    conn.execute(
+        text("""
+            INSERT INTO version_datos (Usuario, Version) VALUES (:u, 1)
+            ON CONFLICT (Usuario) DO UPDATE SET Version = version_datos.Version + 1
+        """),
+        {"u": usuario}
+    )
+
+
+def version_datos(conn, usuario):
+    """Versión actual de los datos del usuario (0 si nunca han cambiado)."""
+    version = conn.execute(
+        text("SELECT Version FROM version_datos WHERE Usuario = :u"), {"u": usuario}
+    ).scalar()
+    return version or 0
@@ -20,6 +20,7 @@ recibir uploads), pydantic-settings (opcional)
 Uso rápido
 ----------
 $ python weekly_scraper.py --run-now        # ejecuta scraping y termina
+$ python weekly_scraper.py --forecasts-now  # precalcula los pronósticos de fondos (pronosticos.py)
 $ uvicorn weekly_scraper:app --reload       # arranca la API Thin en localhost:8000
 
 Producción: contenedor Docker + `CMD ["uvicorn", "weekly_scraper:app", "--host=0.0.0.0", "--port=80"]`
@@ -295,10 +296,26 @@ def run_full_scrape():
     logger.info("===== FIN SCRAPING =====")
 
 
+def run_nightly_forecasts():
+    # Import tardío: el scraper no necesita la base de la app ni los modelos para scrapear
+    from pronosticos import precalcular_catalogo
+
+    logger.info("===== INICIO PRONÓSTICOS =====")
+    try:
+        resumen = precalcular_catalogo()
+        logger.info(f"{resumen['guardados']}/{resumen['tickers']} fondos en {resumen['segundos']:.1f} s")
+        if resumen["fallas"]:
+            logger.warning(f"Sin pronóstico: {', '.join(resumen['fallas'])}")
+    except Exception as e:
+        logger.error(f"Error en pronósticos: {e}")
+    logger.info("===== FIN PRONÓSTICOS =====")
+
+
 def schedule_weekly_scrape():
     scheduler = BlockingScheduler(timezone="UTC")
     scheduler.add_job(run_full_scrape, CronTrigger(day_of_week="sun", hour=3))
-    logger.info("Scheduler activo (domingo 03:00 UTC)")
+    scheduler.add_job(run_nightly_forecasts, CronTrigger(hour=5))
+    logger.info("Scheduler activo (scraping domingo 03:00 UTC, pronósticos diario 05:00 UTC)")
     try:
         scheduler.start()
     except (KeyboardInterrupt, SystemExit):
@@ -395,10 +412,13 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Finai scraper + API")
     parser.add_argument("--run-now", action="store_true", help="Scrapea y sale")
     parser.add_argument("--schedule", action="store_true", help="Ejecuta scheduler semanal")
+    parser.add_argument("--forecasts-now", action="store_true", help="Precalcula los pronósticos y sale")
     args = parser.parse_args()
 
     if args.run_now:
         run_full_scrape()
+    elif args.forecasts_now:
+        run_nightly_forecasts()
     elif args.schedule:
         schedule_weekly_scrape()
     else: